@@ -0,0 +1,14 @@
+@echo off
+call :s_which py.exe
+if not "%_path%" == "" (
+  py -3 -m xonsh.bench %*
+) else (
+  python -m xonsh.bench %*
+)
+
+goto :eof
+
+:s_which
+  setlocal
+  endlocal & set _path=%~$PATH:1
+  goto :eof
@@ -41,6 +41,7 @@ except ImportError:
 TABLES = [
     "xonsh/lexer_table.py",
     "xonsh/parser_table.py",
+    "xonsh/parser_table.lrtab",
     "xonsh/__amalgam__.py",
     "xonsh/completers/__amalgam__.py",
     "xonsh/history/__amalgam__.py",
@@ -341,9 +342,13 @@ def main():
     if sys.platform == "win32":
         scripts.append("scripts/xonsh.bat")
         scripts.append("scripts/xonsh-cat.bat")
+        scripts.append("scripts/xonsh-bench.bat")
     else:
         scripts.append("scripts/xonsh")
         scripts.append("scripts/xonsh-cat")
+        scripts.append("scripts/xonsh-bench")
+        scripts.append("scripts/xonsh-daemon")
+        scripts.append("scripts/xonsh-client")
     skw = dict(
         name="xonsh",
         description="Python-powered, cross-platform, Unix-gazing shell",
@@ -371,7 +376,7 @@ def main():
         ],
         package_dir={"xonsh": "xonsh", "xontrib": "xontrib", "xonsh.lib": "xonsh/lib"},
         package_data={
-            "xonsh": ["*.json", "*.githash"],
+            "xonsh": ["*.json", "*.githash", "*.lrtab"],
             "xontrib": ["*.xsh"],
             "xonsh.lib": ["*.xsh"],
         },
@@ -113,3 +113,52 @@ def test_recursive_callable_partial_none(xonsh_execer, xonsh_builtins):
     args, obs = alias()
     assert args == "wakka"
     assert len(obs) == 0
+
+
+def test_get_is_cached(xonsh_execer, xonsh_builtins):
+    ales = make_aliases()
+    assert ales.get("color_ls") == ["ls", "-  -", "--color=true"]
+    assert "color_ls" in ales._cache
+    # callers may modify the returned list
+    ales.get("color_ls").append("wakka")
+    assert ales.get("color_ls") == ["ls", "-  -", "--color=true"]
+
+
+def test_expand_alias_is_cached(xonsh_execer, xonsh_builtins, monkeypatch):
+    ales = make_aliases()
+    xonsh_builtins.aliases = ales
+    assert ales.expand_alias("color_ls -a") == "ls -  - --color=true -a"
+    assert "color_ls" in ales
+    calls = []
+    eval_alias = ales.eval_alias
+    monkeypatch.setattr(
+        ales, "eval_alias", lambda *a, **kw: calls.append(a) or eval_alias(*a, **kw)
+    )
+    assert ales.expand_alias("color_ls -a") == "ls -  - --color=true -a"
+    assert calls == []
+
+
+def test_cache_invalidated_by_mutation(xonsh_execer, xonsh_builtins):
+    ales = make_aliases()
+    assert ales.get("color_ls") == ["ls", "-  -", "--color=true"]
+    ales["ls"] = ["ls", "-l"]
+    assert ales.get("color_ls") == ["ls", "-l", "--color=true"]
+    del ales["ls"]
+    assert ales.get("color_ls") == ["ls", "--color=true"]
+    ales.update(ls=["ls", "-a"])
+    assert ales.get("color_ls") == ["ls", "-a", "--color=true"]
+    ales["ls"].append("-h")
+    assert ales.get("color_ls") == ["ls", "-a", "-h", "--color=true"]
+
+
+def test_cache_invalidated_by_env(xonsh_execer, xonsh_builtins):
+    from xonsh.tools import expand_path
+
+    xonsh_builtins.__xonsh__.expand_path = expand_path
+    xonsh_builtins.__xonsh__.env = Env(EXPAND_ENV_VARS=True, WAKKA="jawaka")
+    ales = Aliases(w=["echo", "$WAKKA"])
+    assert ales.get("w") == ["echo", "jawaka"]
+    xonsh_builtins.__xonsh__.env["WAKKA"] = "snail"
+    assert ales.get("w") == ["echo", "snail"]
+    xonsh_builtins.__xonsh__.env = Env(EXPAND_ENV_VARS=True, WAKKA="slug")
+    assert ales.get("w") == ["echo", "slug"]
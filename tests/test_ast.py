@@ -140,3 +140,23 @@ def test_whitespace_subproc(test_input):
 def test_isexpression(xonsh_execer, inp, exp):
     obs = isexpression(inp)
     assert exp is obs
+
+
+def test_repeated_subproc_lines_parsed_once(xonsh_execer, monkeypatch):
+    parser = xonsh_execer.ctxtransformer.parser
+    splines = []
+    orig_parse = parser.parse
+
+    def parse(s, *args, **kwargs):
+        splines.append(s)
+        return orig_parse(s, *args, **kwargs)
+
+    code = "x = 1\nls -l\nls -l\nls -l\n"
+    tree = xonsh_execer.parse(code, ctx=None, transform=False)
+    monkeypatch.setattr(parser, "parse", parse)
+    tree = xonsh_execer.ctxtransformer.ctxvisit(tree, code, set())
+    assert splines == ["![ls -l]"]
+    for i, lsnode in enumerate(tree.body[1:], 2):
+        assert isinstance(lsnode.value, Call)
+        assert i == min_line(lsnode)
+    assert tree.body[1] is not tree.body[2]
@@ -0,0 +1,126 @@
+"""Tests the xonsh benchmark runner."""
+import json
+
+import pytest
+
+import xonsh.bench
+from xonsh.bench import (
+    BENCHMARKS,
+    BenchContext,
+    compare_results,
+    deferrable_imports,
+    main,
+    parse_importtime,
+    process_memory,
+    run_benchmarks,
+    time_benchmark,
+)
+
+
+@pytest.fixture
+def corpus(tmpdir):
+    f = tmpdir.join("corpus.xsh")
+    f.write("x = 1\nfor i in range(3):\n    x += i\n")
+    return str(f)
+
+
+def test_time_benchmark():
+    calls = []
+    res = time_benchmark(lambda: calls.append(1), repeat=3, number=4)
+    assert len(calls) == 1 + 3 * 4
+    assert res["number"] == 4
+    assert res["repeat"] == 3
+    assert 0.0 <= res["min"] <= res["mean"]
+
+
+def test_process_memory():
+    mem = process_memory()
+    assert mem["rss"] > 0
+    assert 0 < mem["private"] <= mem["rss"]
+
+
+def test_run_lexer_benchmark(corpus):
+    ctx = BenchContext(corpus_files=[corpus], scale=2)
+    results = run_benchmarks(["lexer"], ctx=ctx, repeat=2, number=1)
+    assert list(results["benchmarks"]) == ["lexer"]
+    assert results["corpus_size"] == 2 * len(open(corpus).read())
+
+
+@pytest.mark.parametrize("new, exp", [(1.0, False), (1.05, False), (1.2, True)])
+def test_compare_results(new, exp):
+    baseline = {"benchmarks": {"lexer": {"min": 1.0}, "gone": {"min": 1.0}}}
+    results = {"benchmarks": {"lexer": {"min": new}, "added": {"min": 1.0}}}
+    rows = compare_results(results, baseline, threshold=0.1)
+    assert len(rows) == 1
+    name, old, _, ratio, regressed = rows[0]
+    assert name == "lexer"
+    assert ratio == pytest.approx(new)
+    assert regressed is exp
+
+
+def test_main_list(capsys):
+    assert main(["--list"]) == 0
+    out = capsys.readouterr().out
+    assert out.split() == list(BENCHMARKS)
+
+
+def test_main_compare(corpus, tmpdir, capsys):
+    baseline = tmpdir.join("baseline.json")
+    args = ["--corpus", corpus, "-r", "1", "-n", "1", "--json", "lexer"]
+    assert main(args + ["--save", str(baseline)]) == 0
+    saved = json.loads(baseline.read())
+    assert "lexer" in saved["benchmarks"]
+    # a baseline that is impossibly fast is always a regression
+    saved["benchmarks"]["lexer"]["min"] = 1e-12
+    baseline.write(json.dumps(saved))
+    assert main(args + ["--compare", str(baseline)]) == 1
+
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |       heavy.core
+import time:        50 |        150 |     heavy
+import time:        20 |         20 |     xonsh.small
+import time:        30 |        200 |   xonsh.tools
+import time:        40 |        240 | xonsh.main
+import time:        10 |         10 | unrelated
+"""
+
+
+def test_parse_importtime():
+    recs = {rec["name"]: rec for rec in parse_importtime(IMPORTTIME)}
+    assert list(recs) == [
+        "heavy.core",
+        "heavy",
+        "xonsh.small",
+        "xonsh.tools",
+        "xonsh.main",
+        "unrelated",
+    ]
+    assert recs["heavy.core"]["parent"] == "heavy"
+    assert recs["heavy"]["parent"] == "xonsh.tools"
+    assert recs["xonsh.small"]["parent"] == "xonsh.tools"
+    assert recs["xonsh.tools"]["parent"] == "xonsh.main"
+    assert recs["xonsh.main"]["parent"] is None
+    assert recs["unrelated"]["parent"] is None
+    assert recs["heavy"]["depth"] == 2
+    assert recs["xonsh.main"]["cumulative"] == pytest.approx(240e-6)
+    assert recs["heavy"]["self"] == pytest.approx(50e-6)
+
+
+def test_deferrable_imports():
+    modules = parse_importtime(IMPORTTIME)
+    found = [rec["name"] for rec in deferrable_imports(modules, threshold=0.0)]
+    assert found == ["heavy"]
+    assert deferrable_imports(modules, threshold=1e-3) == []
+
+
+@pytest.mark.parametrize("budget, exp", [("1000", 0), ("0.1", 1)])
+def test_main_import_budget(budget, exp, monkeypatch, capsys):
+    modules = parse_importtime(IMPORTTIME)
+    imports = {"module": "xonsh.main", "total": 240e-6, "modules": modules}
+    monkeypatch.setattr(xonsh.bench, "measure_imports", lambda: imports)
+    monkeypatch.setattr(xonsh.bench, "BENCHMARKS", {})
+    assert main(["--import-budget", budget]) == exp
+    out = capsys.readouterr().out
+    assert ("EXCEEDED" in out) == bool(exp)
@@ -3,6 +3,7 @@
 from __future__ import unicode_literals, print_function
 import os
 import re
+import time
 import builtins
 import types
 from ast import AST, Module, Interactive, Expression
@@ -25,6 +26,8 @@ from xonsh.built_ins import (
     in_macro_call,
     call_macro,
     enter_macro,
+    SubprocSpec,
+    XonshSession,
 )
 from xonsh.environ import Env
 
@@ -388,3 +391,97 @@ def test_enter_macro():
     assert obj.macro_block == "wakka"
     assert obj.macro_globals
     assert obj.macro_locals
+
+
+def test_session_defer():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return "wakka"
+
+    session = XonshSession()
+    session.defer("jawaka", factory)
+    assert not session.is_loaded("jawaka")
+    assert session.jawaka == "wakka"
+    assert session.is_loaded("jawaka")
+    assert session.jawaka == "wakka"
+    assert len(calls) == 1
+    with pytest.raises(AttributeError):
+        session.zappa
+
+
+def test_session_defer_concurrent_access():
+    import threading
+
+    building = threading.Event()
+    calls = []
+
+    def factory():
+        calls.append(None)
+        building.set()
+        time.sleep(0.2)
+        return "wakka"
+
+    session = XonshSession()
+    session.defer("jawaka", factory)
+    results = []
+    builder = threading.Thread(target=lambda: results.append(session.jawaka))
+    builder.start()
+    assert building.wait(5)
+    # waits for the value that the other thread is building
+    assert session.jawaka == "wakka"
+    builder.join()
+    assert results == ["wakka"]
+    assert len(calls) == 1
+
+
+def test_resolve_stack_starts_at_call_site():
+    def alias(args, stdin, stdout, stderr, spec, stack):
+        pass
+
+    spec = types.SimpleNamespace(alias=alias, stack=None)
+
+    # mimics the call chain from a subproc_*() builtin down to build()
+    def _run_subproc():
+        SubprocSpec.resolve_stack(spec)
+
+    def run_subproc():
+        _run_subproc()
+
+    def subproc_captured_hiddenobject():
+        run_subproc()
+
+    def call_site():
+        subproc_captured_hiddenobject()
+
+    call_site()
+    assert spec.stack[0][3] == "call_site"
+
+
+@skip_if_on_windows
+@pytest.mark.skipif(
+    not built_ins.HAVE_POSIX_SPAWN or not os.path.isfile("/proc/self/status"),
+    reason="requires os.posix_spawn() and /proc",
+)
+def test_run_spawned_default_sigpipe(xonsh_builtins, monkeypatch, capfd):
+    import signal
+    from shutil import which
+
+    cat = which("cat")
+    if cat is None:
+        pytest.skip("cat not found")
+    spawned = []
+    run_spawned = built_ins._run_spawned
+    monkeypatch.setattr(
+        built_ins,
+        "_run_spawned",
+        lambda spec, captured: spawned.append(spec) or run_spawned(spec, captured),
+    )
+    xonsh_builtins.__xonsh__.env["XONSH_INTERACTIVE"] = False
+    built_ins.run_subproc([[cat, "/proc/self/status"]])
+    assert len(spawned) == 1
+    out, _ = capfd.readouterr()
+    sigign = int(re.search(r"^SigIgn:\s*([0-9a-f]+)$", out, re.M).group(1), 16)
+    assert not sigign & (1 << (signal.SIGPIPE - 1))
+    assert not sigign & (1 << (signal.SIGXFSZ - 1))
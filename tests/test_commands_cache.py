@@ -20,6 +20,73 @@ def test_commands_cache_lazy(xonsh_builtins):
     assert 0 == cc.lazylen()
 
 
+@skip_if_on_windows
+def test_commands_cache_scans_only_changed_dirs(xonsh_builtins, tmpdir, monkeypatch):
+    dirs = []
+    for name in ("a", "b", "c"):
+        d = tmpdir.mkdir(name)
+        exe = d.join("cmd")
+        exe.write("")
+        exe.chmod(0o755)
+        d.join("only_" + name).write("")
+        d.join("only_" + name).chmod(0o755)
+        dirs.append(str(d))
+    scanned = []
+    scan_dir = CommandsCache._scan_dir
+    monkeypatch.setattr(
+        CommandsCache,
+        "_scan_dir",
+        staticmethod(lambda path: scanned.append(path) or scan_dir(path)),
+    )
+    xonsh_builtins.aliases = {}
+    xonsh_builtins.__xonsh__.env = {"PATH": dirs[1:]}
+    cc = CommandsCache()
+    assert cc["cmd"][0] == os.path.join(dirs[1], "cmd")
+    assert scanned == dirs[1:]
+    # prepending a directory only scans that one, and shadows the others
+    xonsh_builtins.__xonsh__.env = {"PATH": dirs}
+    assert cc["cmd"][0] == os.path.join(dirs[0], "cmd")
+    assert "only_c" in cc
+    assert scanned == dirs[1:] + dirs[:1]
+    # removing a directory scans nothing
+    xonsh_builtins.__xonsh__.env = {"PATH": dirs[1:]}
+    assert cc["cmd"][0] == os.path.join(dirs[1], "cmd")
+    assert "only_a" not in cc
+    assert scanned == dirs[1:] + dirs[:1]
+
+
+def test_executables_in_dir_relative(xonsh_builtins, tmpdir, monkeypatch):
+    for name in ("a", "b"):
+        d = tmpdir.mkdir(name)
+        exe = d.join("only_" + name)
+        exe.write("")
+        exe.chmod(0o755)
+        # the same mtime, so that only the path tells them apart
+        os.utime(str(d), (0, 0))
+    cc = CommandsCache()
+    monkeypatch.chdir(str(tmpdir.join("a")))
+    assert cc.executables_in_dir(".") == ["only_a"]
+    monkeypatch.chdir(str(tmpdir.join("b")))
+    assert cc.executables_in_dir(".") == ["only_b"]
+    assert cc.executables_in_dir(str(tmpdir.join("a"))) == ["only_a"]
+
+
+def test_commands_cache_names_with_prefix(xonsh_builtins):
+    xonsh_builtins.aliases = {"gitk": "x", "Git-Lost": "y", "go": "z", "gi": "w"}
+    xonsh_builtins.__xonsh__.env = {"PATH": []}
+    cc = CommandsCache()
+    assert cc.names_with_prefix("gi") == ["gi", "gitk"]
+    assert cc.names_with_prefix("GI", case_sensitive=False) == [
+        "gi",
+        "Git-Lost",
+        "gitk",
+    ]
+    assert cc.names_with_prefix("h") == []
+    # the index is rebuilt when the aliases change
+    xonsh_builtins.aliases["gist"] = "v"
+    assert cc.names_with_prefix("gis") == ["gist"]
+
+
 TRUE_SHELL_ARGS = [
     ["-c", "yo"],
     ["-c=yo"],
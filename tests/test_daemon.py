@@ -0,0 +1,153 @@
+"""Tests the xonsh daemon and its client."""
+import os
+import sys
+import time
+import socket
+import subprocess
+
+import pytest
+
+import xonsh.daemon as daemon
+from xonsh.daemon import XonshDaemon, _exit_code, recv_request, send_request
+
+from tools import skip_if_on_windows
+
+pytestmark = skip_if_on_windows
+
+
+def test_request_roundtrip(tmpdir):
+    client, server = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    r, w = os.pipe()
+    env = {"FOO": "bar" * 10000}
+    try:
+        send_request(client, ["-c", "echo hi"], str(tmpdir), env, fds=(r, w, w))
+        req, fds = recv_request(server)
+        assert req == {"argv": ["-c", "echo hi"], "cwd": str(tmpdir), "env": env}
+        assert len(fds) == 3
+        # the received descriptors refer to the same pipe
+        os.write(fds[1], b"x")
+        assert os.read(r, 1) == b"x"
+        for fd in fds:
+            os.close(fd)
+    finally:
+        for fd in (r, w):
+            os.close(fd)
+        client.close()
+        server.close()
+
+
+def test_exit_code():
+    p = subprocess.Popen([sys.executable, "-c", "import sys; sys.exit(3)"])
+    _, status = os.waitpid(p.pid, 0)
+    assert _exit_code(status) == 3
+    p = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(10)"])
+    p.kill()
+    _, status = os.waitpid(p.pid, 0)
+    assert _exit_code(status) == -9
+
+
+def test_bind_refuses_running_daemon(tmpdir):
+    path = str(tmpdir.join("d.sock"))
+    first = XonshDaemon(socket_path=path)
+    first.bind()
+    try:
+        with pytest.raises(RuntimeError):
+            XonshDaemon(socket_path=path).bind()
+    finally:
+        first.close()
+    assert not os.path.exists(path)
+    # a stale socket is replaced
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+    second = XonshDaemon(socket_path=path)
+    second.bind()
+    second.close()
+
+
+def test_fallback_socket_dir_is_private(tmpdir, monkeypatch):
+    monkeypatch.delenv("XONSH_DAEMON_SOCKET", raising=False)
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setattr(daemon.tempfile, "tempdir", str(tmpdir))
+    path = daemon.default_socket_path()
+    sockdir = os.path.dirname(path)
+    assert sockdir == str(tmpdir.join("xonsh-daemon-{}".format(os.getuid())))
+    d = XonshDaemon()
+    d.bind()
+    try:
+        assert os.stat(sockdir).st_mode & 0o777 == 0o700
+    finally:
+        d.close()
+    # e.g. created by someone else beforehand
+    os.chmod(sockdir, 0o777)
+    with pytest.raises(RuntimeError):
+        XonshDaemon().bind()
+
+
+def test_peer_is_owner_without_credentials(tmpdir, monkeypatch):
+    monkeypatch.setattr(daemon, "_peer_uid", lambda sock: None)
+    private = tmpdir.mkdir("private")
+    private.chmod(0o700)
+    shared = tmpdir.mkdir("shared")
+    shared.chmod(0o777)
+    assert daemon._peer_is_owner(None, str(private.join("d.sock")))
+    assert not daemon._peer_is_owner(None, str(shared.join("d.sock")))
+
+
+def test_client_ignores_daemon_of_another_user(tmpdir, monkeypatch, capsys):
+    path = str(tmpdir.join("d.sock"))
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+
+    class RanLocally(Exception):
+        pass
+
+    def run_locally(argv):
+        raise RanLocally
+
+    monkeypatch.setattr(daemon, "_peer_uid", lambda sock: os.getuid() + 1)
+    monkeypatch.setattr(daemon, "_run_locally", run_locally)
+    try:
+        with pytest.raises(RanLocally):
+            daemon.client_main(["-c", "echo hi"], socket_path=path)
+        conn, _ = server.accept()
+        # nothing, in particular no environment or descriptors, was sent
+        assert conn.recvmsg(1024, socket.CMSG_SPACE(64)) == (b"", [], 0, None)
+        conn.close()
+    finally:
+        server.close()
+    assert "another user" in capsys.readouterr().err
+
+
+def test_preload_builds_parser_before_forking():
+    import threading
+    from xonsh.parsers.base import YaccLoader
+
+    parser = daemon.preload()
+    assert parser.parser is not None
+    assert not any(isinstance(t, YaccLoader) for t in threading.enumerate())
+
+
+def test_client_runs_through_daemon(tmpdir):
+    path = str(tmpdir.join("d.sock"))
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root, XONSH_DAEMON_SOCKET=path)
+    daemon = subprocess.Popen([sys.executable, "-m", "xonsh.daemon"], env=env)
+    try:
+        for _ in range(200):
+            if os.path.exists(path):
+                break
+            time.sleep(0.05)
+        client = os.path.join(root, "scripts", "xonsh-client")
+        out = subprocess.check_output(
+            [sys.executable, client, "--no-rc", "-c", "echo $FOO $PWD"],
+            env=dict(env, FOO="bar"),
+            cwd=str(tmpdir),
+            stdin=subprocess.DEVNULL,
+        )
+        assert out.decode().split() == ["bar", str(tmpdir)]
+    finally:
+        daemon.terminate()
+        daemon.wait(10)
+    assert not os.path.exists(path)
@@ -18,6 +18,7 @@ from xonsh.environ import (
     DEFAULT_ENSURERS,
     DEFAULT_VALUES,
     default_env,
+    default_value,
     make_args_env,
 )
 
@@ -273,3 +274,130 @@ def test_make_args_env():
         "ARG3": "3",
     }
     assert exp == obs
+
+
+def test_callable_default_cached_until_deps_change():
+    calls = []
+
+    @default_value(deps=("BASE",))
+    def derived(env):
+        calls.append(1)
+        return env.get("BASE") + "/derived"
+
+    @default_value(deps=("DERIVED",))
+    def nested(env):
+        return env.get("DERIVED") + "/nested"
+
+    env = Env(BASE="/a")
+    env._defaults = {"DERIVED": derived, "NESTED": nested}
+    assert env["NESTED"] == "/a/derived/nested"
+    assert env["DERIVED"] == "/a/derived"
+    assert len(calls) == 1
+    env["BASE"] = "/b"
+    assert env["NESTED"] == "/b/derived/nested"
+    del env["BASE"]
+    env["BASE"] = "/c"
+    assert env["DERIVED"] == "/c/derived"
+    assert len(calls) == 3
+
+
+def test_callable_default_without_deps_not_cached():
+    calls = []
+
+    @default_value
+    def undeclared(env):
+        calls.append(1)
+        return len(calls)
+
+    env = Env()
+    env._defaults = {"UNDECLARED": undeclared}
+    assert env["UNDECLARED"] == 1
+    assert env["UNDECLARED"] == 2
+
+
+def test_profile_lookups(xonsh_builtins):
+    env = Env(VAR="wakka")
+    env.profile_lookups()
+    try:
+        env["VAR"]
+        env["VAR"]
+        xonsh_builtins.events.on_postcommand.fire(cmd="", rtn=0, out=None, ts=[])
+        env["VAR"]
+        env.get("NOPE")
+        xonsh_builtins.events.on_postcommand.fire(cmd="", rtn=0, out=None, ts=[])
+        profile = dict((key, (n, per)) for key, n, per in env.lookup_profile())
+        assert env.lookup_commands == 2
+        assert profile["VAR"] == (3, 1.5)
+        assert profile["NOPE"] == (1, 0.5)
+    finally:
+        env.profile_lookups(False)
+    assert env.lookup_profile() is None
+
+
+def test_batch_coalesces_events(xonsh_builtins):
+    env = Env(TEST=0, SAME="x")
+    xonsh_builtins.__xonsh__.env = env
+    changes = []
+    new = []
+
+    @xonsh_builtins.events.on_envvar_change
+    def on_change(name, oldvalue, newvalue, **kwargs):
+        changes.append((name, oldvalue, newvalue))
+
+    @xonsh_builtins.events.on_envvar_new
+    def on_new(name, value, **kwargs):
+        new.append((name, value))
+
+    with env.batch():
+        env["TEST"] = 1
+        env["TEST"] = 2
+        env["SAME"] = "y"
+        env["SAME"] = "x"
+        env["NEW"] = "a"
+        env["GONE"] = "b"
+        del env["GONE"]
+        with env.batch():
+            env["TEST"] = 3
+        assert changes == new == []
+        assert env["TEST"] == 3
+
+    assert changes == [("TEST", 0, 3)]
+    assert new == [("NEW", "a")]
+
+
+def test_batch_rolls_back_on_error(xonsh_builtins):
+    env = Env(TEST=0, GONE="a")
+    xonsh_builtins.__xonsh__.env = env
+    changes = []
+
+    @xonsh_builtins.events.on_envvar_change
+    def on_change(name, oldvalue, newvalue, **kwargs):
+        changes.append(name)
+
+    with pytest.raises(ValueError):
+        with env.batch():
+            env["TEST"] = 1
+            env["NEW"] = "b"
+            del env["GONE"]
+            raise ValueError
+    assert env["TEST"] == 0
+    assert env["GONE"] == "a"
+    assert "NEW" not in env
+    assert changes == []
+
+
+def test_batch_updates_os_environ_once(xonsh_builtins, monkeypatch):
+    env = Env(UPDATE_OS_ENVIRON=True)
+    env.replace_env()
+    monkeypatch.setattr(env, "replace_env", lambda: 1 / 0)
+    try:
+        with env.batch():
+            env.update({"XONSH_BATCH_TEST": "a"}, XONSH_BATCH_TEST2="b")
+            assert "XONSH_BATCH_TEST" not in os.environ
+        assert os.environ["XONSH_BATCH_TEST"] == "a"
+        assert os.environ["XONSH_BATCH_TEST2"] == "b"
+        with env.batch():
+            del env["XONSH_BATCH_TEST"]
+        assert "XONSH_BATCH_TEST" not in os.environ
+    finally:
+        env.undo_replace_env()
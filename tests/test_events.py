@@ -167,3 +167,50 @@ def test_exists(events):
     events.doc("on_test", "Test event")
     assert events.exists("on_test")
     assert not events.exists("on_best")
+
+
+def test_async_handlers_ordered(events):
+    from xonsh.events import EVENT_DISPATCHER
+
+    seen = []
+
+    @events.on_test(asynchronous=True)
+    def slow(n, **_):
+        seen.append(n)
+        return n
+
+    rtns = [events.on_test.fire(n=i) for i in range(10)]
+    assert EVENT_DISPATCHER.wait(timeout=5)
+    assert rtns == [[]] * 10
+    assert seen == list(range(10))
+
+
+def test_async_event(events):
+    from xonsh.events import EVENT_DISPATCHER
+
+    seen = []
+
+    @events.on_test
+    def handler(**_):
+        seen.append(True)
+
+    events.on_test.asynchronous = True
+    assert events.on_test.fire() == []
+    assert EVENT_DISPATCHER.wait(timeout=5)
+    assert seen == [True]
+
+
+def test_handler_stats(events):
+    @events.on_test
+    def handler(**_):
+        return 1
+
+    events.on_test.fire()
+    events.on_test.fire()
+    ((name, h, stats),) = events.stats()
+    assert name == "on_test"
+    assert h is handler
+    assert stats.calls == 2
+    assert stats.total >= stats.max >= 0.0
+    events.reset_stats()
+    assert events.stats() == []
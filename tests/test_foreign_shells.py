@@ -7,7 +7,13 @@ import subprocess
 import pytest
 from tools import skip_if_on_windows, skip_if_on_unix
 
-from xonsh.foreign_shells import foreign_shell_data, parse_env, parse_aliases
+from xonsh.foreign_shells import (
+    foreign_shell_data,
+    parse_env,
+    parse_aliases,
+    foreign_shell_cache_key,
+    ForeignShellCache,
+)
 
 
 def test_parse_env():
@@ -85,6 +91,68 @@ def test_foreign_bash_data():
         assert expval == obsaliases.get(key, False)
 
 
+def test_foreign_shell_cache_key(tmpdir):
+    rcfile = tmpdir.join("rc.sh")
+    rcfile.write("export X=1\n")
+    args = (["bash", "-c"], "env", {"A": "B", "PWD": "/"}, [str(rcfile)])
+    key = foreign_shell_cache_key(*args)
+    assert key == foreign_shell_cache_key(*args)
+    # volatile variables do not change the key, others do
+    assert key == foreign_shell_cache_key(
+        ["bash", "-c"], "env", {"A": "B", "PWD": "/tmp"}, [str(rcfile)]
+    )
+    assert key != foreign_shell_cache_key(
+        ["bash", "-c"], "env", {"A": "C", "PWD": "/"}, [str(rcfile)]
+    )
+    rcfile.write("export X=12\n")
+    assert key != foreign_shell_cache_key(*args)
+
+
+def test_foreign_shell_cache_roundtrip(tmpdir):
+    fname = str(tmpdir.join("foreign_shells_cache"))
+    cache = ForeignShellCache(filename=fname)
+    cache["key"] = ({"X": "1"}, {"l": ["ls", "-CF"]})
+    assert ForeignShellCache(filename=fname)["key"] == cache["key"]
+
+
+@skip_if_on_windows
+def test_foreign_bash_data_cached(tmpdir, xonsh_builtins, monkeypatch):
+    fname = str(tmpdir.join("foreign_shells_cache"))
+    monkeypatch.setattr(ForeignShellCache, "_instance", ForeignShellCache(fname))
+    rcfile = os.path.join(os.path.dirname(__file__), "bashrc.sh")
+    kwargs = dict(currenv=(), extra_args=("--rcfile", rcfile), safe=False, cache=True)
+    try:
+        exp = foreign_shell_data.__wrapped__("bash", **kwargs)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return
+    assert len(ForeignShellCache(fname)) == 1
+    monkeypatch.setattr(
+        subprocess, "check_output", lambda *a, **kw: pytest.fail("not cached")
+    )
+    assert exp == foreign_shell_data.__wrapped__("bash", **kwargs)
+
+
+def test_foreign_shell_cache_refresh_detaches_stdin(tmpdir, monkeypatch):
+    import functools
+    from xonsh.foreign_shells import _run_foreign_shell
+
+    calls = []
+
+    def check_output(cmd, **kwargs):
+        calls.append(kwargs)
+        return ""
+
+    monkeypatch.setattr(subprocess, "check_output", check_output)
+    run = functools.partial(_run_foreign_shell, ["bash", "-c"], "env", "bash")
+    run()
+    assert calls[-1]["stdin"] is None
+    cache = ForeignShellCache(filename=str(tmpdir.join("foreign_shells_cache")))
+    cache["key"] = ({"X": "1"}, {})
+    cache._refresh([("key", run)])
+    assert calls[-1]["stdin"] is subprocess.DEVNULL
+    assert cache["key"] == ({}, {})
+
+
 @skip_if_on_unix
 def test_foreign_cmd_data():
     env = (("ENV_TO_BE_REMOVED", "test"),)
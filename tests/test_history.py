@@ -2,6 +2,7 @@
 """Tests the json history backend."""
 # pylint: disable=protected-access
 import os
+import json
 import shlex
 
 import pytest
@@ -308,3 +309,41 @@ def test_construct_history_class(xonsh_builtins):
 def test_construct_history_instance(xonsh_builtins):
     xonsh_builtins.__xonsh__.env["XONSH_HISTORY_BACKEND"] = DummyHistory()
     assert isinstance(construct_history(), DummyHistory)
+
+
+def _rusage(cpu, maxrss):
+    return {
+        "utime": cpu,
+        "stime": 0.0,
+        "maxrss": maxrss,
+        "minflt": 0,
+        "majflt": 0,
+        "inblock": 0,
+        "oublock": 0,
+    }
+
+
+@pytest.mark.parametrize(
+    "sort, exp", [("cpu", ["make", "ls"]), ("mem", ["ls", "make"])]
+)
+def test_history_stats(sort, exp, hist, xonsh_builtins, capsys):
+    xonsh_builtins.__xonsh__.history = hist
+    xonsh_builtins.__xonsh__.env["HISTCONTROL"] = set()
+    hist.append({"inp": "ls -l", "rtn": 0, "ts": [1, 2]})
+    hist.append(
+        {"inp": "ls", "rtn": 0, "ts": [2, 3], "info": {"rusage": _rusage(0.1, 900)}}
+    )
+    hist.append(
+        {"inp": "make", "rtn": 0, "ts": [3, 4], "info": {"rusage": _rusage(2, 100)}}
+    )
+    hist.append(
+        {"inp": "make a", "rtn": 0, "ts": [4, 5], "info": {"rusage": _rusage(1, 50)}}
+    )
+    history_main(["stats", "--json", "--sort", sort])
+    out, err = capsys.readouterr()
+    stats = json.loads(out)
+    assert [s["command"] for s in stats] == exp
+    make = stats[exp.index("make")]
+    assert make["count"] == 2
+    assert make["cpu"] == 3
+    assert make["maxrss"] == 100
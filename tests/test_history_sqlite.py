@@ -36,6 +36,16 @@ def test_hist_append(hist, xonsh_builtins):
     assert list(hist.all_items()) == items
 
 
+def test_hist_append_info(hist, xonsh_builtins):
+    xonsh_builtins.__xonsh__.env["HISTCONTROL"] = set()
+    info = {"rusage": {"utime": 0.5, "maxrss": 1024}}
+    hist.append({"inp": "make", "rtn": 0, "info": info})
+    hist.append({"inp": "ls", "rtn": 0})
+    items = list(hist.items())
+    assert items[0]["info"] == info
+    assert "info" not in items[1]
+
+
 def test_hist_attrs(hist, xonsh_builtins):
     xonsh_builtins.__xonsh__.env["HISTCONTROL"] = set()
     hf = hist.append({"inp": "ls foo", "rtn": 1})
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""Tests the LALR parse driver."""
+import time
+
+import pytest
+
+from xonsh.ast import pdump
+from xonsh.parser import Parser
+import xonsh.parsers.lalr as lalr
+from xonsh.parsers.lalr import LALRDriver, LALRProduction, LALRTables
+
+
+@pytest.fixture(autouse=True)
+def xonsh_builtins_autouse(xonsh_builtins):
+    return xonsh_builtins
+
+
+@pytest.fixture(scope="module")
+def parser():
+    p = Parser(lexer_optimize=False, yacc_optimize=False, yacc_debug=True)
+    while p.parser is None:
+        time.sleep(0.01)
+    return p
+
+
+def test_parser_uses_driver(parser):
+    assert isinstance(parser.parser, LALRDriver)
+
+
+@pytest.mark.parametrize(
+    "inp",
+    [
+        "x = 42\n",
+        "def f(x, *args, y=1, **kw):\n    return [x, y]\n",
+        "for i in range(10):\n    if i:\n        continue\n",
+        "$[ls -l | grep wakka]\n",
+        "![echo hi] and $(ls)\n",
+    ],
+)
+def test_same_as_ply(parser, inp):
+    driver = parser.parser
+    exp = pdump(parser.parse(inp))
+    parser.parser = driver.lrparser
+    try:
+        obs = pdump(parser.parse(inp))
+    finally:
+        parser.parser = driver
+    assert exp == obs
+
+
+def test_syntax_error(parser):
+    with pytest.raises(SyntaxError):
+        parser.parse("x = = 1\n")
+
+
+def test_production():
+    stack = [None, "a", "b", "c"]
+    p = LALRProduction(stack)
+    p.base, p.n = 1, 2
+    assert len(p) == 3
+    assert (p[1], p[2], p[-1]) == ("b", "c", "a")
+    p[0] = "d"
+    assert p[0] == "d"
+    assert p[1:] == ["b", "c"]
+
+
+def test_tables_same_as_ply(parser):
+    tables = parser.parser.tables
+    lr = parser.parser.lrparser
+    assert tables.action_dict() == lr.action
+    assert tables.goto_dict() == lr.goto
+
+
+def test_tables_save_load(parser, tmpdir):
+    tables = parser.parser.tables
+    fname = str(tmpdir.join("parser_table.lrtab"))
+    tables.save(fname)
+    loaded = LALRTables.load(fname)
+    assert loaded.signature == tables.signature
+    assert loaded.terminals == tables.terminals
+    assert list(loaded.action) == list(tables.action)
+    assert list(loaded.goto) == list(tables.goto)
+    assert loaded.productions == tables.productions
+
+
+def test_tables_load_bad_file(tmpdir):
+    fname = tmpdir.join("parser_table.lrtab")
+    fname.write_binary(b"not a table")
+    with pytest.raises(ValueError):
+        LALRTables.load(str(fname))
+
+
+def test_tables_save_read_only_dir(parser, tmpdir, monkeypatch, xonsh_builtins):
+    pkgdir = tmpdir.mkdir("pkg")
+    datadir = tmpdir.join("data")
+    xonsh_builtins.__xonsh__.env["XONSH_DATA_DIR"] = str(datadir)
+    monkeypatch.setattr(lalr.os, "access", lambda path, mode: path != str(pkgdir))
+    fname = lalr.save_tables(parser.parser.tables, "xonsh.parser_table", str(pkgdir))
+    assert fname == str(datadir.join("parser_table.lrtab"))
+    assert fname in lalr.table_filenames("xonsh.parser_table", str(pkgdir))
+    assert not pkgdir.listdir()
+    assert LALRTables.load(fname).signature == parser.parser.tables.signature
+
+
+def test_tables_save_unwritable(parser, tmpdir, monkeypatch, xonsh_builtins):
+    xonsh_builtins.__xonsh__.env["XONSH_DATA_DIR"] = str(tmpdir.join("data"))
+    monkeypatch.setattr(lalr.os, "access", lambda path, mode: False)
+    monkeypatch.setattr(lalr.os, "makedirs", lambda *a, **kw: lalr.os.mkdir("/"))
+    tables = parser.parser.tables
+    assert lalr.save_tables(tables, "xonsh.parser_table", str(tmpdir)) is None
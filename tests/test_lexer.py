@@ -460,3 +460,31 @@ def test_lexer_split(s, exp):
     lexer = Lexer()
     obs = lexer.split(s)
     assert exp == obs
+
+
+def test_cached_tokens():
+    lexer = Lexer()
+    s = "ls -l | grep wakka"
+    lexer.input(s)
+    exp = [ensure_tuple(t) for t in lexer]
+    obs = lexer.cached_tokens(s)
+    assert exp == [ensure_tuple(t) for t in obs]
+    assert obs is lexer.cached_tokens(s)
+
+
+def test_cached_tokens_cols():
+    lexer = Lexer()
+    s = "x = $(ls -l)"
+    obs = lexer.cached_tokens(s, mincol=6, maxcol=11)
+    assert obs is lexer.cached_tokens("ls -l")
+
+
+def test_cached_tokens_bounded():
+    lexer = Lexer(token_cache_size=2)
+    first = lexer.cached_tokens("a")
+    lexer.cached_tokens("b")
+    lexer.cached_tokens("a")  # most recently used now
+    lexer.cached_tokens("c")
+    assert first is lexer.cached_tokens("a")
+    assert "b" not in lexer._token_cache
+    assert len(lexer._token_cache) == 2
@@ -48,6 +48,14 @@ def test_premain_login(shell):
     assert builtins.__xonsh__.env.get("XONSH_LOGIN")
 
 
+def test_premain_uses_given_parser(shell):
+    from xonsh.parser import Parser
+
+    parser = Parser()
+    xonsh.main.premain(["-c", "1"], xonsh_parser=parser)
+    assert builtins.__xonsh__.execer.parser is parser
+
+
 def test_premain_D(shell):
     xonsh.main.premain(["-DTEST1=1616", "-DTEST2=LOL"])
     assert builtins.__xonsh__.env.get("TEST1") == "1616"
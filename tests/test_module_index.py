@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+from xonsh.completers.module_index import ModuleIndex
+
+
+def _make_tree(tmpdir):
+    root = tmpdir.mkdir("lib")
+    root.join("plainmod.py").write("import os.path\nfrom a import b as c\nX = 1\n")
+    pkg = root.mkdir("mypkg")
+    pkg.join("__init__.py").write(
+        "try:\n    import json\nexcept ImportError:\n    json = None\n"
+        "def func():\n    inner = 1\nclass Klass:\n    pass\n"
+    )
+    pkg.join("sub.py").write("")
+    pkg.mkdir("nested").join("__init__.py").write("")
+    return root
+
+
+def test_module_index_modules(tmpdir, monkeypatch):
+    root = _make_tree(tmpdir)
+    monkeypatch.setattr("sys.path", [str(root)])
+    index = ModuleIndex()
+    assert {"plainmod", "mypkg", "sys"} <= index.modules("my")
+    assert index.modules("mypkg.s") == {"mypkg.sub", "mypkg.nested"}
+    assert index.modules("mypkg.nested.") == set()
+    assert index.modules("missing.") == set()
+    # only directories that changed are scanned again
+    root.join("newmod.py").write("")
+    os.utime(str(root), (0, 0))
+    assert "newmod" in index.modules("new")
+
+
+def test_module_index_members(tmpdir, monkeypatch):
+    root = _make_tree(tmpdir)
+    monkeypatch.setattr("sys.path", [str(root)])
+    index = ModuleIndex()
+    assert index.members("plainmod") == {"os", "c", "X"}
+    assert index.members("mypkg") == {"json", "func", "Klass", "sub", "nested"}
+    assert index.members("missing") is None
+
+
+@pytest.mark.parametrize(
+    "src",
+    [
+        "from .core import *\n",
+        "def __getattr__(name):\n    pass\n",
+        "for n in 'ab':\n    globals()[n] = n\n",
+    ],
+)
+def test_module_index_members_dynamic(src, tmpdir, monkeypatch):
+    root = tmpdir.mkdir("lib")
+    pkg = root.mkdir("dynpkg")
+    pkg.join("__init__.py").write(src)
+    pkg.join("core.py").write("array = 1\n")
+    monkeypatch.setattr("sys.path", [str(root)])
+    index = ModuleIndex()
+    # falls back to importing the package
+    assert index.members("dynpkg") is None
+    assert index.members("dynpkg") is None
+    assert index.members("dynpkg.core") == {"array"}
+
+
+def test_module_index_save_load(tmpdir, monkeypatch):
+    root = _make_tree(tmpdir)
+    monkeypatch.setattr("sys.path", [str(root)])
+    filename = str(tmpdir.join("module_index_cache"))
+    index = ModuleIndex(filename)
+    for _ in index.build():
+        pass
+    assert index.ready.is_set()
+    assert os.path.isfile(filename)
+    loaded = ModuleIndex(filename)
+    loaded.load()
+    assert loaded._dirs == index._dirs
+
+
+def test_module_index_saves_only_sys_path(tmpdir, monkeypatch):
+    root = _make_tree(tmpdir)
+    other = tmpdir.mkdir("other")
+    other.join("othermod.py").write("")
+    cwd = tmpdir.mkdir("cwd")
+    cwd.join("cwdmod.py").write("Y = 1\n")
+    monkeypatch.chdir(str(cwd))
+    monkeypatch.setattr("sys.path", ["", str(root), str(other)])
+    filename = str(tmpdir.join("module_index_cache"))
+    index = ModuleIndex(filename)
+    for _ in index.build():
+        pass
+    # the current directory is completed, but not saved
+    assert "cwdmod" in index.modules("cwd")
+    assert index.members("cwdmod") == {"Y"}
+    index.save()
+    loaded = ModuleIndex(filename)
+    loaded.load()
+    assert str(cwd) not in loaded._dirs
+    assert str(other) in loaded._dirs
+    # entries that left sys.path are dropped on the next save
+    monkeypatch.setattr("sys.path", [str(root)])
+    pruned = ModuleIndex(filename)
+    pruned.load()
+    assert str(other) not in pruned._dirs
+    pruned.save()
+    reloaded = ModuleIndex(filename)
+    reloaded.load()
+    assert set(reloaded._dirs) == {str(root)}
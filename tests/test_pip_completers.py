@@ -0,0 +1,36 @@
+import os
+
+from xonsh.completers.pip import PipCompletionData, installed_packages
+
+
+def _install(site, dirname, name=None):
+    dist = site.mkdir(dirname)
+    if name is not None:
+        dist.join("METADATA").write("Metadata-Version: 2.1\nName: {}\n".format(name))
+
+
+def test_installed_packages(tmpdir):
+    site = tmpdir.mkdir("site-packages")
+    _install(site, "Django-2.2.dist-info", "Django")
+    _install(site, "typing_extensions-3.7.dist-info", "typing-extensions")
+    _install(site, "no_metadata-1.0.dist-info")
+    site.join("legacy-0.1-py3.7.egg-info").write("Name: legacy\n")
+    site.join("devpkg.egg-link").write("")
+    site.mkdir("django")
+    exp = {"Django", "typing-extensions", "no_metadata", "legacy", "devpkg"}
+    assert installed_packages([str(site), str(tmpdir.join("missing"))]) == exp
+
+
+def test_pip_completion_data_refreshes_packages(tmpdir):
+    site = tmpdir.mkdir("site-packages")
+    _install(site, "a-1.0.dist-info", "a")
+    data = PipCompletionData("pip")
+    data._site_dirs = [str(site)]
+    assert data.packages == {"a"}
+    _install(site, "b-1.0.dist-info", "b")
+    os.utime(str(site), (0, 0))
+    # the packages are read again in the background
+    assert data._refresh is None
+    data.packages
+    data._refresh.join()
+    assert data.packages == {"a", "b"}
@@ -0,0 +1,192 @@
+"""Tests the xonsh process proxies."""
+import os
+import sys
+import signal
+import threading
+
+import pytest
+
+from xonsh.platform import HAVE_POSIX_SPAWN
+from xonsh.proc import (
+    RUSAGE_FIELDS,
+    ProcProxyPool,
+    SpawnedProc,
+    merge_rusage,
+    object_pipe,
+    rusage_to_dict,
+)
+
+skip_if_no_posix_spawn = pytest.mark.skipif(
+    not HAVE_POSIX_SPAWN, reason="requires os.posix_spawn()"
+)
+
+
+def test_pool_reuses_workers():
+    pool = ProcProxyPool(max_idle=1)
+    idents = []
+    for _ in range(5):
+        done = threading.Event()
+        pool.submit(lambda: (idents.append(threading.get_ident()), done.set()))
+        assert done.wait(5)
+    assert len(set(idents)) == 1
+    assert pool.nworkers == 1
+
+
+def test_pool_runs_tasks_concurrently():
+    # the tasks wait on each other, as the aliases in a pipeline may
+    pool = ProcProxyPool(max_idle=0)
+    first, second = threading.Event(), threading.Event()
+    done = threading.Event()
+    pool.submit(lambda: (first.set(), second.wait(5) and done.set()))
+    pool.submit(lambda: (first.wait(5), second.set()))
+    assert done.wait(5)
+
+
+def test_object_pipe_text():
+    r, w = object_pipe()
+    w.write("snail\nsl")
+    w.flush()
+    w.write("ug\nwakka")
+    w.close()
+    assert r.readline() == "snail\n"
+    assert list(r) == ["slug\n", "wakka"]
+    assert r.read() == ""
+
+
+def test_object_pipe_read_size():
+    r, w = object_pipe()
+    w.write("snail")
+    w.close()
+    assert r.read(2) == "sn"
+    assert r.readline(2) == "ai"
+    assert r.read() == "l"
+
+
+def test_object_pipe_objects():
+    r, w = object_pipe()
+    w.send({"x": 1})
+    w.write("text")
+    w.send(42)
+    w.close()
+    assert list(r.iterobjects()) == [{"x": 1}, "text", 42]
+
+
+def test_object_pipe_objects_as_text():
+    r, w = object_pipe()
+    w.send(42)
+    w.close()
+    assert r.read() == "42\n"
+
+
+def test_object_pipe_broken():
+    r, w = object_pipe(maxsize=1)
+    r.close()
+    with pytest.raises(BrokenPipeError):
+        w.send("snail")
+    w.close()
+
+
+def test_object_pipe_backpressure():
+    r, w = object_pipe(maxsize=1)
+    written = threading.Event()
+
+    def write():
+        for i in range(3):
+            w.send(i)
+        written.set()
+        w.close()
+
+    threading.Thread(target=write, daemon=True).start()
+    assert not written.wait(0.2)
+    assert list(r.iterobjects()) == [0, 1, 2]
+    assert written.is_set()
+
+
+@skip_if_no_posix_spawn
+@pytest.mark.parametrize("cmd, rtn", [("true", 0), ("false", 1)])
+def test_spawned_proc_returncode(cmd, rtn):
+    from shutil import which
+
+    exe = which(cmd)
+    if exe is None:
+        pytest.skip("{} not found".format(cmd))
+    proc = SpawnedProc([exe], exe, dict(os.environ))
+    assert proc.wait() == rtn
+    assert proc.returncode == rtn
+    assert proc.signal is None
+    assert proc.poll() == rtn
+
+
+@skip_if_no_posix_spawn
+def test_spawned_proc_signal():
+    from shutil import which
+
+    exe = which("sleep")
+    if exe is None:
+        pytest.skip("sleep not found")
+    proc = SpawnedProc([exe, "10"], exe, dict(os.environ))
+    assert proc.poll() is None
+    proc.terminate()
+    assert proc.wait() == -signal.SIGTERM
+    assert proc.signal == (signal.SIGTERM, False)
+
+
+@skip_if_no_posix_spawn
+@pytest.mark.parametrize("method", ["poll", "wait"])
+def test_spawned_proc_reaped_elsewhere(method):
+    from shutil import which
+
+    exe = which("true")
+    if exe is None:
+        pytest.skip("true not found")
+    proc = SpawnedProc([exe], exe, dict(os.environ))
+    # e.g. by the job control, after an interrupted wait()
+    os.waitpid(proc.pid, 0)
+    assert getattr(proc, method)() == 0
+    assert proc.returncode == 0
+
+
+@skip_if_no_posix_spawn
+def test_spawned_proc_reaped_on_interrupt(monkeypatch):
+    from shutil import which
+
+    exe = which("sleep")
+    if exe is None:
+        pytest.skip("sleep not found")
+    proc = SpawnedProc([exe, "10"], exe, dict(os.environ))
+    wait4 = os.wait4
+    interrupted = []
+
+    def interrupted_wait4(pid, options):
+        if options == 0 and not interrupted:
+            interrupted.append(pid)
+            raise KeyboardInterrupt
+        return wait4(pid, options)
+
+    monkeypatch.setattr(os, "wait4", interrupted_wait4)
+    with pytest.raises(KeyboardInterrupt):
+        proc.wait()
+    assert interrupted == [proc.pid]
+    assert proc.returncode == -signal.SIGKILL
+    with pytest.raises(ChildProcessError):
+        os.waitpid(proc.pid, os.WNOHANG)
+
+
+@skip_if_no_posix_spawn
+def test_spawned_proc_rusage():
+    proc = SpawnedProc(
+        [sys.executable, "-c", "bytearray(1 << 25)"], sys.executable, dict(os.environ)
+    )
+    assert proc.wait() == 0
+    ru = rusage_to_dict(proc.rusage)
+    assert ru["maxrss"] > (1 << 25) // 1024
+
+
+def test_merge_rusage():
+    x = {f: 1 for f in RUSAGE_FIELDS}
+    y = dict(x, maxrss=5)
+    assert merge_rusage(None, x) is x
+    assert merge_rusage(x, None) is x
+    z = merge_rusage(x, y)
+    assert z["utime"] == 2
+    assert z["maxrss"] == 5
@@ -0,0 +1,64 @@
+"""Tests the command profiler."""
+import json
+
+from xonsh.timings import CommandProfiler, write_chrome_trace
+
+
+def test_profiler_inactive(xonsh_builtins):
+    profiler = CommandProfiler()
+    with profiler.span("compile"):
+        pass
+    profiler.add("end", 0.0, 1.0)
+    assert profiler.spans == []
+
+
+def test_profiler_fires_event(xonsh_builtins):
+    xonsh_builtins.__xonsh__.env["XONSH_PROFILE_COMMANDS"] = True
+    profiles = []
+
+    @xonsh_builtins.events.on_command_profile
+    def on_profile(cmd, spans, **kwargs):
+        profiles.append((cmd, spans))
+
+    profiler = CommandProfiler()
+    assert profiler.enabled
+    assert profiler.start("ls")
+    assert not profiler.start("nested")
+    with profiler.span("compile"):
+        pass
+    profiler.add("end", 1.0, 2.0)
+    profiler.stop()
+    assert not profiler.active
+    [(cmd, spans)] = profiles
+    assert cmd == "ls"
+    assert [s[0] for s in spans] == ["compile", "end"]
+    assert spans[1] == ("end", 1.0, 2.0)
+
+
+def test_profiler_cancel(xonsh_builtins):
+    profiles = []
+
+    @xonsh_builtins.events.on_command_profile
+    def on_profile(cmd, spans, **kwargs):
+        profiles.append(cmd)
+
+    profiler = CommandProfiler()
+    profiler.start("if True:")
+    profiler.cancel()
+    profiler.stop()
+    assert profiles == []
+
+
+def test_write_chrome_trace(tmpdir):
+    filename = str(tmpdir.join("trace.json"))
+    write_chrome_trace(filename, "ls\n", [("compile", 1.0, 1.5), ("end", 1.5, 3.0)])
+    write_chrome_trace(filename, "pwd\n", [("compile", 4.0, 4.25)])
+    with open(filename) as f:
+        s = f.read()
+    # the array is left open, so that more commands may be appended
+    evts = json.loads(s.rstrip().rstrip(",") + "]")
+    assert [e["name"] for e in evts] == ["ls", "compile", "end", "pwd", "compile"]
+    assert evts[0]["ts"] == 1e6
+    assert evts[0]["dur"] == 2e6
+    assert evts[2]["dur"] == 1.5e6
+    assert all(e["ph"] == "X" for e in evts)
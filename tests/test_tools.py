@@ -100,6 +100,14 @@ def test_subproc_toks_ls_l():
     assert exp == obs
 
 
+def test_subproc_toks_dedent_leaves_cached_tokens():
+    s = "    ls -l"
+    exp = "    ![ls -l]"
+    assert exp == subproc_toks(s, lexer=LEXER, returnline=True)
+    assert "DEDENT" == LEXER.cached_tokens(s)[-1].type
+    assert exp == subproc_toks(s, lexer=LEXER, returnline=True)
+
+
 def test_subproc_toks_git():
     s = 'git commit -am "hello doc"'
     exp = "![{0}]".format(s)
@@ -0,0 +1,70 @@
+"""Tests the xonsh tracer."""
+import sys
+import importlib
+
+import pytest
+
+from xonsh.tracer import TracerType
+
+
+@pytest.fixture
+def tracer_mod(tmpdir):
+    """A small module to trace, with its file name."""
+    f = tmpdir.join("traced_mod.py")
+    f.write(
+        "def loop(n):\n    x = 0\n    for i in range(n):\n        x += i\n    return x\n"
+    )
+    sys.path.insert(0, str(tmpdir))
+    try:
+        yield importlib.import_module("traced_mod"), str(f)
+    finally:
+        del sys.path[0]
+        sys.modules.pop("traced_mod", None)
+
+
+@pytest.fixture
+def tracer():
+    t = TracerType()
+    yield t
+    for f in set(t.files):
+        t.stop(f)
+    t.set_mode("print")
+    t.counts.clear()
+
+
+def test_count_mode(tracer, tracer_mod, xonsh_builtins):
+    xonsh_builtins.__xonsh__.env["HOME"] = "/home/snail"
+    mod, fname = tracer_mod
+    tracer.set_mode("count")
+    tracer.start(fname)
+    try:
+        assert mod.loop(10) == 45
+    finally:
+        tracer.stop(fname)
+    counts = {lineno: n for (f, lineno), n in tracer.counts.items()}
+    assert counts[4] == 10
+    assert counts[5] == 1
+    assert "traced_mod.py:3:" in tracer.report(top=1)
+
+
+def test_untraced_code_is_skipped(tracer, tracer_mod, tmpdir):
+    mod, fname = tracer_mod
+    tracer.set_mode("count")
+    tracer.start(str(tmpdir.join("other.py")))
+    try:
+        mod.loop(10)
+    finally:
+        tracer.stop(str(tmpdir.join("other.py")))
+    assert len(tracer.counts) == 0
+    assert tracer.code_file(mod.loop.__code__) is None
+
+
+def test_mode_switch_while_tracing(tracer, tracer_mod):
+    mod, fname = tracer_mod
+    tracer.set_mode("count")
+    tracer.start(fname)
+    try:
+        with pytest.raises(ValueError):
+            tracer.set_mode("print")
+    finally:
+        tracer.stop(fname)
@@ -0,0 +1,71 @@
+"""Tests the idle-time warm-up scheduler."""
+import threading
+
+from xonsh.warmup import WarmupScheduler
+
+
+def test_tasks_run_in_order_when_idle():
+    order = []
+    sched = WarmupScheduler(idle_delay=0.0)
+    sched.add("a", lambda: order.append("a"))
+    sched.add("b", lambda: order.append("b"))
+    assert sched.join(timeout=0.1) is False
+    assert order == []
+    sched.idle()
+    assert sched.join(timeout=5.0)
+    assert order == ["a", "b"]
+    assert [t.state for t in sched.tasks.values()] == ["done", "done"]
+    assert all(t.duration >= 0.0 for t in sched.tasks.values())
+    sched.cancel()
+
+
+def test_busy_pauses_iterator_tasks():
+    stepped = threading.Event()
+    resume = threading.Event()
+    steps = []
+    sched = WarmupScheduler(idle_delay=0.0)
+
+    def task():
+        steps.append(1)
+        stepped.set()
+        resume.wait(timeout=5.0)
+        yield
+        steps.append(2)
+
+    sched.add("t", task)
+    sched.idle()
+    assert stepped.wait(timeout=5.0)
+    sched.busy()
+    resume.set()
+    assert not sched.join(timeout=0.2)
+    assert steps == [1]
+    assert sched.tasks["t"].state == "paused"
+    sched.idle()
+    assert sched.join(timeout=5.0)
+    assert steps == [1, 2]
+    assert sched.tasks["t"].state == "done"
+    sched.cancel()
+
+
+def test_cancel():
+    sched = WarmupScheduler(idle_delay=0.0)
+    sched.add("a", lambda: None)
+    sched.cancel()
+    sched.idle()
+    assert sched.tasks["a"].state == "cancelled"
+    assert sched.add("b", lambda: None).state == "cancelled"
+
+
+def test_failed_task():
+    def task():
+        raise ValueError("wakka")
+
+    sched = WarmupScheduler(idle_delay=0.0)
+    sched.add("a", task)
+    sched.add("b", lambda: None)
+    sched.idle()
+    assert sched.join(timeout=5.0)
+    assert sched.tasks["a"].state == "failed"
+    assert sched.tasks["a"].error == "ValueError: wakka"
+    assert sched.tasks["b"].state == "done"
+    sched.cancel()
@@ -77,3 +77,103 @@ hello = 'world'
 
     ctx = xontrib_context("script")
     assert ctx == {"hello": "world"}
+
+
+def test_deferred_alias(tmpmod, xonsh_builtins):
+    """
+    Tests that a deferred xontrib is only loaded when its alias is looked up
+    """
+    from xonsh.aliases import Aliases
+    from xonsh.xontribs import DeferredXontrib, XONTRIB_LOAD_TIMES
+
+    with tmpmod.mkdir("xontrib").join("spamalias.py").open("w") as x:
+        x.write(
+            """
+import builtins
+builtins.aliases['spam'] = ['echo', 'eggs']
+"""
+        )
+    xonsh_builtins.aliases = Aliases()
+    DeferredXontrib("spamalias", aliases=["spam"]).install()
+    assert "xontrib.spamalias" not in sys.modules
+    assert "spam" in xonsh_builtins.aliases
+    assert xonsh_builtins.aliases.get("spam") == ["echo", "eggs"]
+    assert "xontrib.spamalias" in sys.modules
+    assert "spamalias" in XONTRIB_LOAD_TIMES
+
+
+def test_deferred_event(tmpmod, xonsh_builtins):
+    """
+    Tests that a deferred xontrib is loaded, and its handler called, when an
+    event that it declares is fired
+    """
+    from xonsh.xontribs import DeferredXontrib
+
+    with tmpmod.mkdir("xontrib").join("spamevent.py").open("w") as x:
+        x.write(
+            """
+@events.on_spam
+def spam_handler(**kwargs):
+    return 'eggs'
+
+@events.on_spam
+def ham_handler(**kwargs):
+    return 'ham'
+"""
+        )
+    xonsh_builtins.__xonsh__.ctx["events"] = xonsh_builtins.events
+    DeferredXontrib("spamevent", events=["on_spam"]).install()
+    assert "xontrib.spamevent" not in sys.modules
+    # the values of all of the loaded handlers are returned
+    assert sorted(xonsh_builtins.events.on_spam.fire()) == ["eggs", "ham"]
+    assert "xontrib.spamevent" in sys.modules
+    assert sorted(xonsh_builtins.events.on_spam.fire()) == ["eggs", "ham"]
+
+
+def test_load_time_only_on_success(tmpmod, xonsh_builtins):
+    from xonsh.xontribs import XONTRIB_LOAD_TIMES, update_context
+
+    update_context("nosuchxontrib", ctx={})
+    assert "nosuchxontrib" not in XONTRIB_LOAD_TIMES
+    assert update_context.bad_imports == ["nosuchxontrib"]
+    del update_context.bad_imports
+
+
+def test_deferred_completer_order(tmpmod, xonsh_builtins):
+    """
+    Tests that the placeholder of a deferred completer sits where the loaded
+    completer goes, and that completers which the xontrib removes are
+    restored before it is loaded
+    """
+    from collections import OrderedDict
+    from xonsh.xontribs import DeferredXontrib
+
+    with tmpmod.mkdir("xontrib").join("spamcomp.py").open("w") as x:
+        x.write(
+            """
+import builtins
+from xonsh.completers._aliases import _add_one_completer
+
+def complete_spam(prefix, line, begidx, endidx, ctx):
+    return {'eggs'}
+
+_add_one_completer('spam', complete_spam, 'end')
+del builtins.__xonsh__.completers['python_mode']
+"""
+        )
+
+    def comp(prefix, line, begidx, endidx, ctx):
+        return set()
+
+    completers = OrderedDict([("a", comp), ("python_mode", comp), ("b", comp)])
+    xonsh_builtins.__xonsh__.completers = completers
+    xontrib = DeferredXontrib(
+        "spamcomp", completers={"spam": "end", "python_mode": None}
+    )
+    xontrib.install()
+    assert list(completers) == ["a", "b", "spam"]
+    xontrib.uninstall()
+    assert list(completers) == ["a", "python_mode", "b"]
+    xontrib.install()
+    assert completers["spam"]("", "", 0, 0, {}) == {"eggs"}
+    assert list(completers) == ["a", "b", "spam"]
@@ -3,7 +3,7 @@ __version__ = "0.8.12"
 
 # amalgamate exclude jupyter_kernel parser_table parser_test_table pyghooks
 # amalgamate exclude winutils wizard pytest_plugin fs macutils pygments_cache
-# amalgamate exclude jupyter_shell
+# amalgamate exclude jupyter_shell bench daemon
 import os as _os
 
 if _os.getenv("XONSH_DEBUG", ""):
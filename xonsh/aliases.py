@@ -31,10 +31,11 @@ from xonsh.tools import (
     ALIAS_KWARG_NAMES,
     unthreadable,
     print_color,
+    POSIX_ENVVAR_REGEX,
 )
 from xonsh.replay import replay_main
 from xonsh.timings import timeit_alias
-from xonsh.xontribs import xontribs_main
+from xonsh.xontribs import xontribs_main, DeferredXontribAlias
 from xonsh.ast import isexpression
 
 import xonsh.completers._aliases as xca
@@ -52,6 +53,10 @@ class Aliases(cabc.MutableMapping):
 
     def __init__(self, *args, **kwargs):
         self._raw = {}
+        # resolved aliases, see get(), and the number of modifications that
+        # they are checked against
+        self._cache = {}
+        self._version = 0
         self.update(*args, **kwargs)
 
     def get(self, key, default=None):
@@ -61,15 +66,77 @@ class Aliases(cabc.MutableMapping):
         is an iterable of strings it will be evaluated recursively to expand
         other aliases, resulting in a new list or a "partially applied"
         callable.
+
+        Resolved values are cached until the aliases are modified, including
+        in place, or until the environment variables that the expansion used
+        change.
         """
-        val = self._raw.get(key)
-        if val is None:
-            return default
-        elif isinstance(val, cabc.Iterable) or callable(val):
-            return self.eval_alias(val, seen_tokens={key})
+        cached = self._cache.get(key)
+        if cached is not None and self._cache_is_valid(cached):
+            rtn = cached[0]
         else:
-            msg = "alias of {!r} has an inappropriate type: {!r}"
-            raise TypeError(msg.format(key, val))
+            val = self._raw_value(key)
+            if val is None:
+                return default
+            elif isinstance(val, cabc.Iterable) or callable(val):
+                rtn = self.eval_alias(val, seen_tokens={key})
+            else:
+                msg = "alias of {!r} has an inappropriate type: {!r}"
+                raise TypeError(msg.format(key, val))
+            expansion = self._expansion_deps(key)
+            if expansion is not None:
+                deps, chain = expansion
+                env = builtins.__xonsh__.env
+                values = _dep_values(env, deps)
+                self._cache[key] = (rtn, self._version, chain, deps, env, values)
+        # callers are free to modify the list they get back
+        return list(rtn) if isinstance(rtn, list) else rtn
+
+    def _cache_is_valid(self, cached):
+        _, version, chain, deps, env, values = cached
+        if version != self._version:
+            return False
+        for token, val, items in chain:
+            if self._raw.get(token) is not val or tuple(val) != items:
+                # replaced, or modified in place through self[token]
+                return False
+        current = builtins.__xonsh__.env
+        if env is not current:
+            return False
+        return not deps or _dep_values(current, deps) == values
+
+    def _expansion_deps(self, key):
+        """Returns the names of the environment variables that evaluating an
+        alias depends on, with ``"~"`` standing for the home directory, and
+        the aliases that were expanded, as ``(token, value, items)`` triples,
+        or None if the resolved value should not be cached.
+        """
+        deps = set()
+        chain = []
+        expand_path = builtins.__xonsh__.expand_path
+        seen = {key}
+        val = self._raw.get(key)
+        while not callable(val):
+            if not isinstance(val, cabc.Sequence) or len(val) == 0:
+                return None
+            chain.append((key, val, tuple(val)))
+            for token in val:
+                if "$" in token:
+                    deps.add("EXPAND_ENV_VARS")
+                    deps.update(
+                        m.group("envvar") for m in POSIX_ENVVAR_REGEX.finditer(token)
+                    )
+                if "~" in token:
+                    deps.add("~")
+            token = expand_path(val[0])
+            if token in seen or token not in self._raw:
+                break
+            seen.add(token)
+            key = token
+            val = self._raw.get(key)
+        if isinstance(val, DeferredXontribAlias):
+            return None
+        return tuple(sorted(deps)), tuple(chain)
 
     def eval_alias(self, value, seen_tokens=frozenset(), acc_args=()):
         """
@@ -97,10 +164,23 @@ class Aliases(cabc.MutableMapping):
                 rtn.extend(rest)
                 rtn.extend(acc_args)
                 return rtn
-            else:
-                seen_tokens = seen_tokens | {token}
-                acc_args = rest + list(acc_args)
-                return self.eval_alias(self._raw[token], seen_tokens, acc_args)
+            value = self._raw_value(token)
+            if value is None:
+                # deferred xontrib did not actually provide the alias
+                return [token] + rest + list(acc_args)
+            seen_tokens = seen_tokens | {token}
+            acc_args = rest + list(acc_args)
+            return self.eval_alias(value, seen_tokens, acc_args)
+
+    def _raw_value(self, key):
+        """Returns the unevaluated value of an alias, or None. Placeholders
+        for deferred xontribs are replaced by loading the xontrib first.
+        """
+        val = self._raw.get(key)
+        if isinstance(val, DeferredXontribAlias):
+            val.load()
+            val = self._raw.get(key)
+        return val
 
     def expand_alias(self, line):
         """Expands any aliases present in line if alias does not point to a
@@ -117,10 +197,14 @@ class Aliases(cabc.MutableMapping):
     # Mutable mapping interface
     #
 
+    def __contains__(self, key):
+        return key in self._raw
+
     def __getitem__(self, key):
         return self._raw[key]
 
     def __setitem__(self, key, val):
+        self._version += 1
         if isinstance(val, str):
             f = "<exec-alias:" + key + ">"
             if SUB_EXEC_ALIAS_RE.search(val) is not None:
@@ -137,6 +221,7 @@ class Aliases(cabc.MutableMapping):
             self._raw[key] = val
 
     def __delitem__(self, key):
+        self._version += 1
         del self._raw[key]
 
     def update(self, *args, **kwargs):
@@ -167,6 +252,13 @@ class Aliases(cabc.MutableMapping):
                 p.pretty(dict(self))
 
 
+def _dep_values(env, deps):
+    """Returns the current values of the dependencies of an alias."""
+    return tuple(
+        os.path.expanduser("~") if name == "~" else str(env.get(name)) for name in deps
+    )
+
+
 class ExecAlias:
     """Provides a callable alias for xonsh source code."""
 
@@ -508,14 +600,15 @@ def source_foreign(args, stdin=None, stdout=None, stderr=None):
             return (None, msg, 1)
     # apply results
     denv = env.detype()
-    for k, v in fsenv.items():
-        if k in denv and v == denv[k]:
-            continue  # no change from original
-        env[k] = v
-    # Remove any env-vars that were unset by the script.
-    for k in denv:
-        if k not in fsenv:
-            env.pop(k, None)
+    with env.batch():
+        for k, v in fsenv.items():
+            if k in denv and v == denv[k]:
+                continue  # no change from original
+            env[k] = v
+        # Remove any env-vars that were unset by the script.
+        for k in denv:
+            if k not in fsenv:
+                env.pop(k, None)
     # Update aliases
     baliases = builtins.aliases
     for k, v in fsaliases.items():
@@ -105,6 +105,7 @@ from ast import (
 from ast import Ellipsis as EllipsisNode
 
 # pylint: enable=unused-import
+import copy
 import textwrap
 import itertools
 
@@ -345,6 +346,16 @@ class CtxAwareTransformer(NodeTransformer):
         self._nwith = 0
         self.filename = "<xonsh-code>"
         self.debug_level = 0
+        self._clear_caches()
+
+    def _clear_caches(self):
+        """Clears the per-compilation caches of logical lines, subprocess
+        wrappings, and wrapped line parses.
+        """
+        self._logical_lines = {}
+        self._break_cache = {}
+        self._spline_cache = {}
+        self._parse_cache = {}
 
     def ctxvisit(self, node, inp, ctx, mode="exec", filename=None, debug_level=0):
         """Transforms the node in a context-dependent way.
@@ -373,9 +384,13 @@ class CtxAwareTransformer(NodeTransformer):
         self.contexts = [ctx, set()]
         self.mode = mode
         self._nwith = 0
-        node = self.visit(node)
-        del self.lines, self.contexts, self.mode
-        self._nwith = 0
+        self._clear_caches()
+        try:
+            node = self.visit(node)
+        finally:
+            del self.lines, self.contexts, self.mode
+            self._nwith = 0
+            self._clear_caches()
         return node
 
     def ctxupdate(self, iterable):
@@ -393,9 +408,72 @@ class CtxAwareTransformer(NodeTransformer):
                 ctx.remove(value)
                 break
 
+    def _get_logical_line(self, idx):
+        """Memoized version of get_logical_line() for the current lines."""
+        rtn = self._logical_lines.get(idx)
+        if rtn is None:
+            rtn = self._logical_lines[idx] = get_logical_line(self.lines, idx)
+        return rtn
+
+    def _find_next_break(self, line, mincol):
+        """Memoized version of find_next_break() for the current compilation."""
+        key = (line, mincol)
+        cache = self._break_cache
+        if key not in cache:
+            cache[key] = find_next_break(line, mincol=mincol, lexer=self.parser.lexer)
+        return cache[key]
+
+    def _subproc_toks(self, line, mincol, maxcol, greedy=False):
+        """Memoized version of subproc_toks() for the current compilation."""
+        key = (line, mincol, maxcol, greedy)
+        cache = self._spline_cache
+        if key not in cache:
+            cache[key] = subproc_toks(
+                line,
+                mincol=mincol,
+                maxcol=maxcol,
+                returnline=False,
+                lexer=self.parser.lexer,
+                greedy=greedy,
+            )
+        return cache[key]
+
+    def _parse_spline(self, spline, lineno):
+        """Parses a subprocess-wrapped line, whose nodes are given line numbers
+        starting at lineno. Returns None if the line is not valid syntax.
+        Identical lines are only parsed once per compilation, later
+        occurrences receive a copy of the first tree, renumbered.
+        """
+        cached = self._parse_cache.get(spline, False)
+        if cached is None:
+            return None
+        elif cached is not False:
+            tree, prev_lineno = cached
+            newnode = copy.deepcopy(tree)
+            increment_lineno(newnode, n=lineno - prev_lineno)
+            return newnode
+        try:
+            newnode = self.parser.parse(
+                spline,
+                mode=self.mode,
+                filename=self.filename,
+                debug_level=(self.debug_level > 2),
+            )
+        except SyntaxError:
+            self._parse_cache[spline] = None
+            return None
+        newnode = newnode.body
+        if not isinstance(newnode, AST):
+            # take the first (and only) Expr
+            newnode = newnode[0]
+        increment_lineno(newnode, n=lineno - 1)
+        # copy before the node is placed in the tree and possibly altered
+        self._parse_cache[spline] = (copy.deepcopy(newnode), lineno)
+        return newnode
+
     def try_subproc_toks(self, node, strip_expr=False):
         """Tries to parse the line of the node as a subprocess."""
-        line, nlogical, idx = get_logical_line(self.lines, node.lineno - 1)
+        line, nlogical, idx = self._get_logical_line(node.lineno - 1)
         if self.mode == "eval":
             mincol = len(line) - len(line.lstrip())
             maxcol = None
@@ -403,52 +481,29 @@ class CtxAwareTransformer(NodeTransformer):
             mincol = max(min_col(node) - 1, 0)
             maxcol = max_col(node)
             if mincol == maxcol:
-                maxcol = find_next_break(line, mincol=mincol, lexer=self.parser.lexer)
+                maxcol = self._find_next_break(line, mincol)
             elif nlogical > 1:
                 maxcol = None
             elif maxcol < len(line) and line[maxcol] == ";":
                 pass
             else:
                 maxcol += 1
-        spline = subproc_toks(
-            line,
-            mincol=mincol,
-            maxcol=maxcol,
-            returnline=False,
-            lexer=self.parser.lexer,
-        )
+        spline = self._subproc_toks(line, mincol, maxcol)
         if spline is None or spline != "![{}]".format(line[mincol:maxcol].strip()):
             # failed to get something consistent, try greedy wrap
-            spline = subproc_toks(
-                line,
-                mincol=mincol,
-                maxcol=maxcol,
-                returnline=False,
-                lexer=self.parser.lexer,
-                greedy=True,
-            )
+            spline = self._subproc_toks(line, mincol, maxcol, greedy=True)
         if spline is None:
             return node
-        try:
-            newnode = self.parser.parse(
-                spline,
-                mode=self.mode,
-                filename=self.filename,
-                debug_level=(self.debug_level > 2),
-            )
-            newnode = newnode.body
-            if not isinstance(newnode, AST):
-                # take the first (and only) Expr
-                newnode = newnode[0]
-            increment_lineno(newnode, n=node.lineno - 1)
+        newnode = self._parse_spline(spline, node.lineno)
+        if newnode is None:
+            newnode = node
+        else:
             newnode.col_offset = node.col_offset
             if self.debug_level > 1:
                 msg = "{0}:{1}:{2}{3} - {4}\n" "{0}:{1}:{2}{3} + {5}"
                 mstr = "" if maxcol is None else ":" + str(maxcol)
                 msg = msg.format(self.filename, node.lineno, mincol, mstr, line, spline)
                 print(msg, file=sys.stderr)
-        except SyntaxError:
-            newnode = node
         if strip_expr and isinstance(newnode, Expr):
             newnode = newnode.value
         return newnode
@@ -26,6 +26,7 @@ from xonsh.codecache import (
 from xonsh.completer import Completer
 from xonsh.prompt.base import multiline_prompt, PromptFormatter
 from xonsh.events import events
+from xonsh.timings import COMMAND_PROFILER
 from xonsh.shell import transform_command
 from xonsh.lazyimps import pygments, pyghooks
 from xonsh.ansi_colors import ansi_partial_color_format
@@ -343,8 +344,14 @@ class BaseShell(object):
     def default(self, line):
         """Implements code execution."""
         line = line if line.endswith("\n") else line + "\n"
+        profiler = COMMAND_PROFILER
+        if profiler.enabled:
+            # report the last command, if the prompt was not redrawn since
+            profiler.stop()
+            profiler.start(line)
         src, code = self.push(line)
         if code is None:
+            profiler.cancel()
             return
 
         events.on_precommand.fire(cmd=src)
@@ -383,6 +390,7 @@ class BaseShell(object):
             tee.close()
             self._fix_cwd()
         if builtins.__xonsh__.exit:  # pylint: disable=no-member
+            profiler.stop()
             return True
 
     def _append_history(self, tee_out=None, **info):
@@ -403,12 +411,17 @@ class BaseShell(object):
             info["out"] = last_out
         else:
             info["out"] = tee_out + "\n" + last_out
+        rusage = getattr(hist, "last_cmd_rusage", None)
+        if rusage is not None:
+            info["info"] = {"rusage": rusage}
         events.on_postcommand.fire(
             cmd=info["inp"], rtn=info["rtn"], out=info.get("out", None), ts=info["ts"]
         )
         if hist is not None:
-            hist.append(info)
+            with COMMAND_PROFILER.span("append_history"):
+                hist.append(info)
             hist.last_cmd_rtn = hist.last_cmd_out = None
+            hist.last_cmd_rusage = None
 
     def _fix_cwd(self):
         """Check if the cwd changed out from under us."""
@@ -535,10 +548,12 @@ class BaseShell(object):
             return self.mlprompt
         env = builtins.__xonsh__.env  # pylint: disable=no-member
         p = env.get("PROMPT")
-        try:
-            p = self.prompt_formatter(p)
-        except Exception:  # pylint: disable=broad-except
-            print_exception()
+        with COMMAND_PROFILER.span("prompt"):
+            try:
+                p = self.prompt_formatter(p)
+            except Exception:  # pylint: disable=broad-except
+                print_exception()
+        COMMAND_PROFILER.stop()
         self.settitle()
         return p
 
@@ -0,0 +1,731 @@
+"""Benchmarks for xonsh's own hot paths.
+
+These time the lexer, parser, and execer on a corpus of xonsh source code,
+running captured and uncaptured subprocess pipelines and callable aliases, tab
+completion, prompt rendering, history appending and flushing, and cold start
+up. Results may be written out as JSON and compared against a stored baseline,
+so that performance regressions can be caught before they are released::
+
+    $ xonsh-bench --save baseline.json
+    $ xonsh-bench --compare baseline.json --threshold 0.1
+
+Use ``xonsh-bench --list`` to see the available benchmarks. The memory used
+by the parser tables, with and without the compact table format, may be
+measured with ``xonsh-bench --memory``. The time that ``import xonsh.main``
+takes, module by module, is measured with ``xonsh-bench --imports``, and
+``--import-budget`` fails the run if it takes longer than a number of
+milliseconds::
+
+    $ xonsh-bench --import-budget 150 startup
+"""
+import os
+import sys
+import json
+import glob
+import time
+import shutil
+import argparse
+import builtins
+import platform
+import tempfile
+import statistics
+import subprocess
+import collections
+
+from xonsh import __version__ as XONSH_VERSION
+
+
+BENCHMARKS = collections.OrderedDict()
+"""Mapping from benchmark names to setup functions. Each setup function takes
+a ``BenchContext`` and returns a zero-argument callable to time.
+"""
+
+
+def benchmark(name):
+    """Decorator that registers a benchmark setup function under a name."""
+
+    def dec(f):
+        BENCHMARKS[name] = f
+        return f
+
+    return dec
+
+
+def default_corpus_files():
+    """Returns the xonsh source files shipped with xonsh itself, which serve
+    as the default benchmark corpus.
+    """
+    pkgdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    patterns = [
+        os.path.join(pkgdir, "xontrib", "*.xsh"),
+        os.path.join(pkgdir, "xonsh", "lib", "*.xsh"),
+        os.path.join(pkgdir, "tests", "*.xsh"),
+    ]
+    files = []
+    for pattern in patterns:
+        files.extend(sorted(glob.glob(pattern)))
+    return files
+
+
+class BenchContext(object):
+    """State shared between benchmarks, such as the corpus and the xonsh
+    session, which is only started if a benchmark needs it.
+    """
+
+    def __init__(self, corpus_files=None, scale=1):
+        self.corpus_files = corpus_files or default_corpus_files()
+        self.scale = scale
+        self._corpus = None
+        self._session = False
+        self.tmpdir = tempfile.mkdtemp(prefix="xonsh-bench-")
+
+    @property
+    def corpus(self):
+        """Source code of the corpus, repeated ``scale`` times."""
+        if self._corpus is None:
+            srcs = []
+            for fname in self.corpus_files:
+                with open(fname, encoding="utf-8") as f:
+                    src = f.read()
+                if not src.endswith("\n"):
+                    src += "\n"
+                srcs.append(src)
+            self._corpus = "".join(srcs) * self.scale
+        return self._corpus
+
+    def session(self):
+        """Starts up a non-interactive xonsh session, if needed."""
+        if not self._session:
+            from xonsh.main import premain
+
+            premain(["--no-rc", "-c", "pass"])
+            builtins.__xonsh__.env["XONSH_DATA_DIR"] = self.tmpdir
+            self._session = True
+        return builtins.__xonsh__
+
+    def cleanup(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+@benchmark("lexer")
+def _bench_lexer(ctx):
+    from xonsh.lexer import Lexer
+
+    lexer = Lexer()
+    src = ctx.corpus
+
+    def run():
+        lexer.input(src)
+        for _ in lexer:
+            pass
+
+    return run
+
+
+@benchmark("parser")
+def _bench_parser(ctx):
+    execer = ctx.session().execer
+    src = ctx.corpus
+
+    def run():
+        # context-free parsing, including the wrapping of subprocess lines
+        execer._parse_ctx_free(src, mode="exec", filename="<bench>")
+
+    return run
+
+
+@benchmark("parser_ply")
+def _bench_parser_ply(ctx):
+    execer = ctx.session().execer
+    parser = execer.parser
+    src = ctx.corpus
+
+    def run():
+        # the same as the parser benchmark, but with PLY's generic LR driver
+        driver = parser.parser
+        parser.parser = driver.lrparser
+        try:
+            execer._parse_ctx_free(src, mode="exec", filename="<bench>")
+        finally:
+            parser.parser = driver
+
+    return run
+
+
+@benchmark("execer")
+def _bench_execer(ctx):
+    execer = ctx.session().execer
+    src = ctx.corpus
+    glbs = {}
+
+    def run():
+        execer.compile(src, mode="exec", glbs=glbs, locs=None, filename="<bench>")
+
+    return run
+
+
+@benchmark("subproc_captured")
+def _bench_subproc_captured(ctx):
+    xsh = ctx.session()
+    cmd = ["echo", "snail"]
+
+    def run():
+        xsh.subproc_captured_stdout(cmd)
+
+    return run
+
+
+@benchmark("subproc_uncaptured")
+def _bench_subproc_uncaptured(ctx):
+    xsh = ctx.session()
+    cmd = ["true"] if shutil.which("true") else ["echo"]
+
+    def run():
+        xsh.subproc_uncaptured(cmd)
+
+    return run
+
+
+@benchmark("callable_alias")
+def _bench_callable_alias(ctx):
+    xsh = ctx.session()
+    builtins.aliases["bench-alias"] = lambda args: "snail\n"
+    cmd = ["bench-alias"]
+
+    def run():
+        xsh.subproc_captured_stdout(cmd)
+
+    return run
+
+
+@benchmark("completer")
+def _bench_completer(ctx):
+    xsh = ctx.session()
+    from xonsh.completer import Completer
+
+    completer = Completer()
+    if xsh.completers is None:
+        from xonsh.completers.init import default_completers
+
+        xsh.completers = default_completers()
+    pyctx = {"snail": 1, "snails": 2, "print": print}
+    lines = ["ls -", "pri", "cd ", "import o", "ec"]
+
+    def run():
+        for line in lines:
+            prefix = line.rsplit(" ", 1)[-1]
+            end = len(line)
+            completer.complete(prefix, line, end - len(prefix), end, pyctx)
+
+    return run
+
+
+@benchmark("prompt")
+def _bench_prompt(ctx):
+    xsh = ctx.session()
+    from xonsh.prompt.base import PromptFormatter
+
+    formatter = PromptFormatter()
+    template = xsh.env["PROMPT"]
+
+    def run():
+        formatter(template)
+
+    return run
+
+
+def _history_commands(n=100):
+    return [
+        {"inp": "echo {0}\n".format(i), "rtn": 0, "ts": [1.0 * i, 1.0 * i + 0.5]}
+        for i in range(n)
+    ]
+
+
+@benchmark("history_json")
+def _bench_history_json(ctx):
+    ctx.session()
+    from xonsh.history.json import JsonHistory
+
+    fname = os.path.join(ctx.tmpdir, "bench-history.json")
+    cmds = _history_commands()
+
+    def run():
+        # a fresh session each time, so that the file does not keep growing
+        hist = JsonHistory(
+            filename=fname,
+            gc=False,
+            buffersize=len(cmds) + 1,
+            ts=[time.time(), None],
+            locked=True,
+        )
+        for cmd in cmds:
+            hist.append(cmd)
+        hist.flush(at_exit=True)
+
+    return run
+
+
+@benchmark("history_sqlite")
+def _bench_history_sqlite(ctx):
+    ctx.session()
+    from xonsh.history.sqlite import SqliteHistory
+
+    fname = os.path.join(ctx.tmpdir, "bench-history.sqlite")
+    cmds = _history_commands()
+
+    def run():
+        if os.path.exists(fname):
+            os.remove(fname)
+        hist = SqliteHistory(filename=fname, gc=False)
+        for cmd in cmds:
+            hist.append(cmd)
+        hist.flush(at_exit=True)
+
+    return run
+
+
+def _startup_runner(ctx, lean):
+    cmd = [sys.executable, "-m", "xonsh", "--no-rc", "-c", "echo hi"]
+    env = dict(os.environ, XONSH_DATA_DIR=ctx.tmpdir)
+    env["XONSH_LEAN_BOOT"] = "1" if lean else "0"
+
+    def run():
+        subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL, check=True)
+
+    return run
+
+
+@benchmark("startup")
+def _bench_startup(ctx):
+    return _startup_runner(ctx, lean=True)
+
+
+@benchmark("startup_full")
+def _bench_startup_full(ctx):
+    # builds the whole session up front, as interactive use does
+    return _startup_runner(ctx, lean=False)
+
+
+def time_benchmark(func, repeat=5, number=None, min_time=0.2):
+    """Times a callable, returning a dict of per-call statistics in seconds.
+    If number is None, it is chosen so that each repetition takes at least
+    min_time seconds.
+    """
+    func()  # warm up
+    if number is None:
+        number = 1
+        while True:
+            t0 = time.perf_counter()
+            for _ in range(number):
+                func()
+            dt = time.perf_counter() - t0
+            if dt >= min_time or number >= 10 ** 6:
+                break
+            number *= 10 if dt < min_time / 10 else 2
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - t0) / number)
+    return {
+        "min": min(times),
+        "mean": statistics.mean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def run_benchmarks(names=None, ctx=None, repeat=5, number=None, verbose=False):
+    """Runs the named benchmarks (all by default) and returns the results
+    as a JSON-serializable dict.
+    """
+    names = list(BENCHMARKS) if not names else names
+    ctx = BenchContext() if ctx is None else ctx
+    results = collections.OrderedDict()
+    try:
+        for name in names:
+            func = BENCHMARKS[name](ctx)
+            if verbose:
+                print("running {0}...".format(name), file=sys.stderr)
+            results[name] = time_benchmark(func, repeat=repeat, number=number)
+    finally:
+        ctx.cleanup()
+    return {
+        "xonsh": XONSH_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus_size": len(ctx.corpus) if ctx._corpus is not None else None,
+        "benchmarks": results,
+    }
+
+
+_MEMORY_SCRIPT = """
+import gc, json, time
+import xonsh.parsers.lalr
+xonsh.parsers.lalr.USE_COMPACT_TABLES = {compact}
+from xonsh.bench import process_memory
+before = process_memory()
+from xonsh.parser import Parser
+p = Parser()
+while p.parser is None:
+    time.sleep(0.001)
+gc.collect()
+after = process_memory()
+print(json.dumps({{k: after[k] - before[k] for k in after}}))
+"""
+
+
+def process_memory():
+    """Returns a dict of the resident set size, and the part of it that is
+    private to this process, in bytes. Pages that are shared with other
+    processes, such as memory mapped files, are not private. On platforms
+    without ``/proc``, both are the peak resident set size.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            fields = f.read().split()
+    except OSError:
+        import resource
+
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        rss *= 1 if sys.platform == "darwin" else 1024
+        return {"rss": rss, "private": rss}
+    pagesize = os.sysconf("SC_PAGE_SIZE")
+    rss = int(fields[1]) * pagesize
+    shared = int(fields[2]) * pagesize
+    return {"rss": rss, "private": rss - shared}
+
+
+def _subprocess_env():
+    """Returns an environment in which fresh interpreters import this xonsh."""
+    pkgdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [pkgdir] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+    )
+    return env
+
+
+def measure_parser_memory(repeat=3):
+    """Measures how much memory constructing a ``Parser()`` takes in a fresh
+    interpreter, with and without the compact parser tables. Returns a dict
+    mapping ``"parser_compact"`` and ``"parser_ply"`` to the minimum of the
+    ``process_memory()`` deltas, in bytes.
+    """
+    env = _subprocess_env()
+    results = collections.OrderedDict()
+    for name, compact in [("parser_compact", True), ("parser_ply", False)]:
+        cmd = [sys.executable, "-c", _MEMORY_SCRIPT.format(compact=compact)]
+        # the first run may have to write out the tables
+        subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL, check=True)
+        runs = []
+        for _ in range(repeat):
+            out = subprocess.run(
+                cmd, env=env, stdout=subprocess.PIPE, check=True
+            ).stdout
+            runs.append(json.loads(out.decode()))
+        results[name] = {k: min(r[k] for r in runs) for k in runs[0]}
+    return results
+
+
+def parse_importtime(text):
+    """Parses the output of ``python -X importtime`` into a list of dicts,
+    one per module, in the order in which their imports finished. Each dict
+    has the module ``name``, its ``self`` and ``cumulative`` import times in
+    seconds, its nesting ``depth``, and its ``parent``, i.e. the module whose
+    import triggered it, or None for top-level imports.
+    """
+    records = []
+    pending = collections.defaultdict(list)
+    for line in text.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # the header line
+            continue
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        rec = {
+            "name": name,
+            "self": int(fields[0]) * 1e-6,
+            "cumulative": int(fields[1]) * 1e-6,
+            "depth": depth,
+            "parent": None,
+        }
+        # children are reported before the module that imports them
+        for child in pending.pop(depth + 1, ()):
+            child["parent"] = name
+        pending[depth].append(rec)
+        records.append(rec)
+    return records
+
+
+def measure_imports(module="xonsh.main", repeat=3):
+    """Measures the import graph of a module in fresh interpreters, with
+    ``python -X importtime``. Returns a dict with the ``module``, the
+    ``total`` time that importing it takes, the ``modules`` that it imports
+    as returned by ``parse_importtime()``, and the modules that were
+    ``preloaded`` by the interpreter before. Times are the minimum over the
+    repetitions.
+    """
+    env = _subprocess_env()
+    src = "import sys; print('\\n'.join(sys.modules)); import " + module
+    cmd = [sys.executable, "-X", "importtime", "-c", src]
+    # the first run may have to write out bytecode
+    subprocess.run(
+        cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True
+    )
+    best = collections.OrderedDict()
+    for _ in range(repeat):
+        proc = subprocess.run(
+            cmd, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+        )
+        preloaded = proc.stdout.decode().split()
+        err = proc.stderr
+        for rec in parse_importtime(err.decode(errors="replace")):
+            old = best.get(rec["name"])
+            if old is None:
+                best[rec["name"]] = rec
+            else:
+                old["self"] = min(old["self"], rec["self"])
+                old["cumulative"] = min(old["cumulative"], rec["cumulative"])
+    total = best[module]["cumulative"] if module in best else 0.0
+    return {
+        "module": module,
+        "total": total,
+        "modules": list(best.values()),
+        "preloaded": preloaded,
+    }
+
+
+def deferrable_imports(modules, threshold=1e-3, package="xonsh"):
+    """Finds the modules from outside of a package that the package imports
+    eagerly, and which take at least threshold seconds to import. These are
+    the candidates for ``xonsh.lazyasd.lazyobject()`` or
+    ``load_module_in_background()``. The modules are as returned by
+    ``parse_importtime()``, and the candidates are sorted slowest first.
+    """
+
+    def inpkg(name):
+        return name == package or name.startswith(package + ".")
+
+    found = [
+        rec
+        for rec in modules
+        if rec["parent"] is not None
+        and inpkg(rec["parent"])
+        and not inpkg(rec["name"])
+        and rec["cumulative"] >= threshold
+    ]
+    found.sort(key=lambda rec: rec["cumulative"], reverse=True)
+    return found
+
+
+def compare_results(results, baseline, threshold=0.1):
+    """Compares results against a baseline. Returns a list of
+    ``(name, baseline time, new time, ratio, regressed)`` tuples, where a
+    benchmark has regressed if its min time grew by more than threshold.
+    """
+    rows = []
+    base = baseline.get("benchmarks", {})
+    for name, res in results["benchmarks"].items():
+        if name not in base:
+            continue
+        old = base[name]["min"]
+        new = res["min"]
+        ratio = new / old if old > 0 else float("inf")
+        rows.append((name, old, new, ratio, ratio > 1.0 + threshold))
+    if "imports" in results and "imports" in baseline:
+        old = baseline["imports"]["total"]
+        new = results["imports"]["total"]
+        ratio = new / old if old > 0 else float("inf")
+        name = "import " + results["imports"]["module"]
+        rows.append((name, old, new, ratio, ratio > 1.0 + threshold))
+    return rows
+
+
+def _format_time(t):
+    from xonsh.timings import format_time
+
+    return format_time(t)
+
+
+def _print_results(results):
+    for name, res in results["benchmarks"].items():
+        print(
+            "{0:<20} {1:>12} min {2:>12} mean {3:>10.0f}/s  ({4} loops x {5})".format(
+                name,
+                _format_time(res["min"]),
+                _format_time(res["mean"]),
+                1.0 / res["min"] if res["min"] > 0 else float("inf"),
+                res["number"],
+                res["repeat"],
+            )
+        )
+
+
+def _print_memory(memory):
+    for name, res in memory.items():
+        print(
+            "{0:<20} {1:>9.1f} MiB rss {2:>9.1f} MiB private".format(
+                name, res["rss"] / 2 ** 20, res["private"] / 2 ** 20
+            )
+        )
+
+
+def _print_imports(imports, budget=None, n=10):
+    print(
+        "{0:<20} {1:>12} import time".format(
+            "import " + imports["module"], _format_time(imports["total"])
+        )
+    )
+    if budget is not None:
+        over = imports["total"] > budget
+        print(
+            "{0:<20} {1:>12} {2}".format(
+                "import budget", _format_time(budget), "EXCEEDED" if over else "ok"
+            )
+        )
+    slowest = deferrable_imports(imports["modules"])[:n]
+    if slowest:
+        print("slowest eager imports of other packages:")
+    for rec in slowest:
+        print(
+            "  {0:<30} {1:>12} imported by {2}".format(
+                rec["name"], _format_time(rec["cumulative"]), rec["parent"]
+            )
+        )
+
+
+def _print_comparison(rows):
+    for name, old, new, ratio, regressed in rows:
+        flag = "REGRESSED" if regressed else ""
+        print(
+            "{0:<20} {1:>12} -> {2:>12} {3:>7.2f}x {4}".format(
+                name, _format_time(old), _format_time(new), ratio, flag
+            ).rstrip()
+        )
+
+
+def _create_parser():
+    p = argparse.ArgumentParser(
+        prog="xonsh-bench", description="Benchmarks xonsh's own hot paths."
+    )
+    p.add_argument(
+        "benchmarks", nargs="*", default=(), help="benchmarks to run, default all"
+    )
+    p.add_argument(
+        "-l", "--list", action="store_true", default=False, help="list benchmarks"
+    )
+    p.add_argument(
+        "--corpus",
+        action="append",
+        default=None,
+        help="xonsh file to lex, parse, and compile, may be given multiple "
+        "times, default: xonsh's own",
+    )
+    p.add_argument(
+        "--scale",
+        type=int,
+        default=1,
+        help="number of times to repeat the corpus, default 1",
+    )
+    p.add_argument("-r", "--repeat", type=int, default=5, help="repetitions, default 5")
+    p.add_argument(
+        "-n",
+        "--number",
+        type=int,
+        default=None,
+        help="loops per repetition, default: determined automatically",
+    )
+    p.add_argument(
+        "--json", action="store_true", default=False, help="print results as json"
+    )
+    p.add_argument("--save", default=None, help="file to save json results to")
+    p.add_argument(
+        "--compare", default=None, help="baseline json results file to compare to"
+    )
+    p.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative slowdown that counts as a regression, default 0.1",
+    )
+    p.add_argument(
+        "--memory",
+        action="store_true",
+        default=False,
+        help="also measure the memory used by the parser tables",
+    )
+    p.add_argument(
+        "--imports",
+        action="store_true",
+        default=False,
+        help="also measure the import time of xonsh.main, module by module",
+    )
+    p.add_argument(
+        "--import-budget",
+        type=float,
+        default=None,
+        metavar="MS",
+        help="fail if importing xonsh.main takes longer than this many "
+        "milliseconds, implies --imports",
+    )
+    return p
+
+
+def main(args=None):
+    """Entry point for xonsh-bench. Returns 1 if a benchmark regressed
+    compared to the baseline or the import budget was exceeded, and 0
+    otherwise.
+    """
+    ns = _create_parser().parse_args(args)
+    if ns.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+    unknown = set(ns.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        print("xonsh-bench: unknown benchmarks: " + ", ".join(sorted(unknown)))
+        return 2
+    ctx = BenchContext(corpus_files=ns.corpus, scale=ns.scale)
+    results = run_benchmarks(
+        ns.benchmarks, ctx=ctx, repeat=ns.repeat, number=ns.number, verbose=not ns.json
+    )
+    if ns.memory:
+        if not ns.json:
+            print("measuring parser memory...", file=sys.stderr)
+        results["memory"] = measure_parser_memory()
+    budget = None if ns.import_budget is None else ns.import_budget * 1e-3
+    if ns.imports or budget is not None:
+        if not ns.json:
+            print("measuring import time...", file=sys.stderr)
+        results["imports"] = measure_imports()
+    over_budget = budget is not None and results["imports"]["total"] > budget
+    if ns.save is not None:
+        with open(ns.save, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+    if ns.json:
+        print(json.dumps(results, indent=1, sort_keys=True))
+    else:
+        _print_results(results)
+        if ns.memory:
+            _print_memory(results["memory"])
+        if "imports" in results:
+            _print_imports(results["imports"], budget=budget)
+    if ns.compare is None:
+        return 1 if over_budget else 0
+    with open(ns.compare) as f:
+        baseline = json.load(f)
+    rows = compare_results(results, baseline, threshold=ns.threshold)
+    if not ns.json:
+        print()
+        _print_comparison(rows)
+    return 1 if over_budget or any(row[-1] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,6 +17,7 @@ import inspect
 import warnings
 import builtins
 import itertools
+import threading
 import subprocess
 import contextlib
 import collections.abc as cabc
@@ -27,11 +28,13 @@ from xonsh.inspectors import Inspector
 from xonsh.aliases import Aliases, make_default_aliases
 from xonsh.environ import Env, default_env, locate_binary
 from xonsh.jobs import add_job
-from xonsh.platform import ON_POSIX, ON_WINDOWS, ON_WSL
+from xonsh.platform import ON_POSIX, ON_WINDOWS, ON_WSL, HAVE_POSIX_SPAWN
 from xonsh.proc import (
     PopenThread,
     ProcProxyThread,
     ProcProxy,
+    SpawnedProc,
+    object_pipe,
     ConsoleParallelReader,
     pause_call_resume,
     CommandPipeline,
@@ -48,8 +51,7 @@ from xonsh.tools import (
 from xonsh.lazyimps import pty, termios
 from xonsh.commands_cache import CommandsCache
 from xonsh.events import events
-
-import xonsh.completers.init
+from xonsh.timings import COMMAND_PROFILER
 
 BUILTINS_LOADED = False
 INSPECTOR = LazyObject(Inspector, globals(), "INSPECTOR")
@@ -554,10 +556,50 @@ class SubprocSpec:
         self._post_run_event_fire(event_name, p)
         return p
 
+    def spawn(self):
+        """Launches the command with ``os.posix_spawn()``, inheriting the
+        standard streams, and returns the process. This is only valid for
+        the simple commands that ``can_spawn()`` accepts.
+        """
+        event_name = self._cmd_event_name()
+        self._pre_run_event_fire(event_name)
+        kwargs = {}
+        self.prep_env(kwargs)
+        self._fix_null_cmd_bytes()
+        try:
+            with COMMAND_PROFILER.span("spawn"):
+                p = SpawnedProc(self.cmd, self.cmd[0], kwargs["env"])
+        except PermissionError:
+            e = "xonsh: subprocess mode: permission denied: {0}"
+            raise XonshError(e.format(self.cmd[0]))
+        p.spec = self
+        p.last_in_pipeline = self.last_in_pipeline = True
+        p.captured_stdout = p.captured_stderr = None
+        self._post_run_event_fire(event_name, p)
+        return p
+
+    def can_spawn(self):
+        """Whether the command may be started with ``spawn()``, rather than
+        ``run()``. This is the case for a binary that is neither a callable
+        alias nor a script, and whose streams are not redirected.
+        """
+        return (
+            HAVE_POSIX_SPAWN
+            and self.cls is subprocess.Popen
+            and not callable(self.alias)
+            and self.binary_loc is not None
+            and self.cmd[0] == self.binary_loc
+            and self.stdin is None
+            and self.stdout is None
+            and self.stderr is None
+            and not self.background
+        )
+
     def _run_binary(self, kwargs):
         try:
             bufsize = 1
-            p = self.cls(self.cmd, bufsize=bufsize, **kwargs)
+            with COMMAND_PROFILER.span("spawn"):
+                p = self.cls(self.cmd, bufsize=bufsize, **kwargs)
         except PermissionError:
             e = "xonsh: subprocess mode: permission denied: {0}"
             raise XonshError(e.format(self.cmd[0]))
@@ -749,13 +791,17 @@ class SubprocSpec:
         sig = inspect.signature(self.alias)
         if len(sig.parameters) <= 5 and "stack" not in sig.parameters:
             return
-        # compute the stack, and filter out these build methods
-        # run_subproc() is the 4th command in the stack
-        # we want to filter out one up, e.g. subproc_captured_hiddenobject()
-        # after that the stack from the call site starts.
+        # compute the stack, and filter out these build methods up to and
+        # including run_subproc(). We want to filter out one up, too, e.g.
+        # subproc_captured_hiddenobject(). After that the stack from the call
+        # site starts.
         stack = inspect.stack(context=0)
-        assert stack[3][3] == "run_subproc", "xonsh stack has changed!"
-        del stack[:5]
+        for i, frame in enumerate(stack):
+            if frame[3] == "run_subproc":
+                break
+        else:
+            raise AssertionError("xonsh stack has changed!")
+        del stack[: i + 2]
         self.stack = stack
 
 
@@ -783,9 +829,10 @@ def _update_last_spec(last):
         pass
     else:
         cmds_cache = builtins.__xonsh__.commands_cache
-        thable = cmds_cache.predict_threadable(
-            last.args
-        ) and cmds_cache.predict_threadable(last.cmd)
+        with COMMAND_PROFILER.span("predict_threadable"):
+            thable = cmds_cache.predict_threadable(
+                last.args
+            ) and cmds_cache.predict_threadable(last.cmd)
         if captured and thable:
             last.cls = PopenThread
         elif not thable:
@@ -850,10 +897,33 @@ def _update_last_spec(last):
         last.captured_stderr = last.captured_stdout
 
 
+def _can_fuse_pipe(left, right):
+    """Whether two specs that are piped together may be connected by an
+    in-memory pipe, which is only the case for threadable callable aliases.
+    """
+    return (
+        left.cls is ProcProxyThread
+        and right.cls is ProcProxyThread
+        and left.stdout is None
+        and right.stdin is None
+        and builtins.__xonsh__.env.get("XONSH_FUSE_ALIAS_PIPES")
+    )
+
+
 def cmds_to_specs(cmds, captured=False):
     """Converts a list of cmds to a list of SubprocSpec objects that are
     ready to be executed.
     """
+    specs = _cmds_to_piped_specs(cmds, captured=captured)
+    # Apply boundary conditions
+    _update_last_spec(specs[-1])
+    return specs
+
+
+def _cmds_to_piped_specs(cmds, captured=False):
+    """Converts a list of cmds to a list of SubprocSpec objects that are
+    piped together, but whose last spec is not yet set up to be captured.
+    """
     # first build the subprocs independently and separate from the redirects
     i = 0
     specs = []
@@ -871,7 +941,12 @@ def cmds_to_specs(cmds, captured=False):
             i += 1
     # now modify the subprocs based on the redirects.
     for i, redirect in enumerate(redirects):
-        if redirect == "|":
+        if redirect == "|" and _can_fuse_pipe(specs[i], specs[i + 1]):
+            # connect the aliases in memory, rather than through the OS
+            r, w = object_pipe()
+            specs[i].stdout = w
+            specs[i + 1].stdin = r
+        elif redirect == "|":
             # these should remain integer file descriptors, and not Python
             # file objects since they connect processes.
             r, w = os.pipe()
@@ -881,8 +956,6 @@ def cmds_to_specs(cmds, captured=False):
             specs[-1].background = True
         else:
             raise XonshError("unrecognized redirect {0!r}".format(redirect))
-    # Apply boundary conditions
-    _update_last_spec(specs[-1])
     return specs
 
 
@@ -909,7 +982,31 @@ def run_subproc(cmds, captured=False):
 
     Lastly, the captured argument affects only the last real command.
     """
-    specs = cmds_to_specs(cmds, captured=captured)
+    profiler = COMMAND_PROFILER
+    if profiler.active or not profiler.enabled:
+        return _run_subproc(cmds, captured)
+    # commands that are not run from the prompt, e.g. by scripts, are
+    # profiled on their own
+    profiler.start(_cmds_to_str(cmds))
+    try:
+        return _run_subproc(cmds, captured)
+    finally:
+        profiler.stop()
+
+
+def _cmds_to_str(cmds):
+    """Returns the command line that a list of cmds represents."""
+    return " ".join(c if isinstance(c, str) else " ".join(map(str, c)) for c in cmds)
+
+
+def _run_subproc(cmds, captured):
+    with COMMAND_PROFILER.span("cmds_to_specs"):
+        specs = _cmds_to_piped_specs(cmds, captured=captured)
+        spawn = _can_spawn_directly(specs, captured)
+        if not spawn:
+            _update_last_spec(specs[-1])
+    if spawn:
+        return _run_spawned(specs[0], captured)
     captured = specs[-1].captured
     if captured == "hiddenobject":
         command = HiddenCommandPipeline(specs)
@@ -954,6 +1051,33 @@ def run_subproc(cmds, captured=False):
         return
 
 
+def _can_spawn_directly(specs, captured):
+    """Whether a command may skip the capturing and job control machinery.
+    This is the case for a single binary run by a script, whose output is
+    not captured.
+    """
+    if len(specs) != 1 or not specs[0].can_spawn():
+        return False
+    env = builtins.__xonsh__.env
+    if env.get("XONSH_INTERACTIVE"):
+        return False
+    elif captured == "hiddenobject":
+        return not env.get("XONSH_STORE_STDOUT")
+    return not captured
+
+
+def _run_spawned(spec, captured):
+    """Runs a command with spec.spawn() and waits for it."""
+    proc = spec.spawn()
+    if captured == "hiddenobject":
+        command = HiddenCommandPipeline([spec], procs=[proc])
+    else:
+        command = CommandPipeline([spec], procs=[proc])
+    proc.wait()
+    command.end(tee_output=False)
+    return command if captured == "hiddenobject" else None
+
+
 def subproc_captured_stdout(*cmds):
     """Runs a subprocess, capturing the output. Returns the stdout
     that was produced as a str.
@@ -1275,7 +1399,7 @@ def load_builtins(execer=None, ctx=None):
 
 
 def _lastflush(s=None, f=None):
-    if hasattr(builtins, "__xonsh__"):
+    if hasattr(builtins, "__xonsh__") and builtins.__xonsh__.is_loaded("history"):
         if builtins.__xonsh__.history is not None:
             builtins.__xonsh__.history.flush(at_exit=True)
 
@@ -1316,9 +1440,19 @@ def xonsh_builtins(execer=None):
     unload_builtins()
 
 
+def _default_completers():
+    import xonsh.completers.init
+
+    return xonsh.completers.init.default_completers()
+
+
 class XonshSession:
     """All components defining a xonsh session.
 
+    Some components are expensive to build and are not needed by every
+    session, e.g. the completers are not used by scripts. These may be
+    deferred with ``defer()``, and are then built when they are first
+    accessed.
     """
 
     def __init__(self, execer=None, ctx=None):
@@ -1332,6 +1466,50 @@ class XonshSession:
         """
         self.execer = execer
         self.ctx = {} if ctx is None else ctx
+        self._deferred = {}
+        # held while a deferred component is built, so that other threads
+        # wait for it rather than finding it missing
+        self._deferred_lock = threading.RLock()
+
+    def __getattr__(self, name):
+        deferred = self.__dict__.get("_deferred")
+        msg = "{!r} object has no attribute {!r}".format(type(self).__name__, name)
+        if not deferred or name not in deferred:
+            raise AttributeError(msg)
+        with self._deferred_lock:
+            if name in self.__dict__:
+                # built by another thread while this one waited
+                return self.__dict__[name]
+            factory = deferred.get(name)
+            if factory is None:
+                # built by another thread, and deleted again since
+                raise AttributeError(msg)
+            value = factory()
+            setattr(self, name, value)
+            del deferred[name]
+        return value
+
+    def defer(self, name, factory):
+        """Defers building a component of the session until it is first
+        accessed.
+
+        Parameters
+        ----------
+        name : str
+            The attribute name of the component, e.g. 'history'.
+        factory : callable
+            Zero-argument function that builds the component. It is called at
+            most once, and its return value is stored on the session.
+        """
+        with self._deferred_lock:
+            self.__dict__.pop(name, None)
+            self._deferred[name] = factory
+
+    def is_loaded(self, name):
+        """Returns whether a component of the session has been built, without
+        building it if it was deferred.
+        """
+        return name in self.__dict__
 
     def load(self, execer=None, ctx=None):
         """Loads the session with default values.
@@ -1378,7 +1556,7 @@ class XonshSession:
 
         self.list_of_list_of_strs_outer_product = list_of_list_of_strs_outer_product
 
-        self.completers = xonsh.completers.init.default_completers()
+        self.defer("completers", _default_completers)
         self.call_macro = call_macro
         self.enter_macro = enter_macro
         self.path_literal = path_literal
@@ -7,7 +7,9 @@ and returns whether or not the process can be run in the background (returns
 True) or must be run the foreground (returns False).
 """
 import os
+import stat
 import time
+import bisect
 import builtins
 import argparse
 import collections.abc as cabc
@@ -29,7 +31,11 @@ class CommandsCache(cabc.Mapping):
         self._cmds_cache = {}
         self._path_checksum = None
         self._alias_checksum = None
-        self._path_mtime = -1
+        # maps the directories that have been scanned to their mtime, and
+        # the commands in them, as a dict from the command keys to their paths
+        self._dir_cmds = {}
+        # sorted names of the cached commands, built on demand for completion
+        self._name_index = None
         self.threadable_predictors = default_threadable_predictors()
 
     def __contains__(self, key):
@@ -37,7 +43,11 @@ class CommandsCache(cabc.Mapping):
         return self.lazyin(key)
 
     def __iter__(self):
-        for cmd, (path, is_alias) in self.all_commands.items():
+        yield from self._names(self.all_commands)
+
+    @staticmethod
+    def _names(cmds):
+        for cmd, (path, is_alias) in cmds.items():
             if ON_WINDOWS and path is not None:
                 # All command keys are stored in uppercase on Windows.
                 # This ensures the original command name is returned.
@@ -79,40 +89,103 @@ class CommandsCache(cabc.Mapping):
     def all_commands(self):
         paths = builtins.__xonsh__.env.get("PATH", [])
         paths = CommandsCache.remove_dups(paths)
-        path_immut = tuple(x for x in paths if os.path.isdir(x))
+        # did the contents of any directory in PATH change? only the new
+        # directories, and those that did change, are scanned.
+        cache_valid = True
+        path_immut = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if not stat.S_ISDIR(st.st_mode):
+                continue
+            path_immut.append(path)
+            scanned = self._dir_cmds.get(path)
+            if scanned is None or scanned[0] != st.st_mtime:
+                self._dir_cmds[path] = (st.st_mtime, self._scan_dir(path))
+                cache_valid = False
+        path_immut = tuple(path_immut)
         # did PATH change?
         path_hash = hash(path_immut)
-        cache_valid = path_hash == self._path_checksum
+        cache_valid = cache_valid and path_hash == self._path_checksum
         self._path_checksum = path_hash
         # did aliases change?
         alss = getattr(builtins, "aliases", dict())
         al_hash = hash(frozenset(alss))
         cache_valid = cache_valid and al_hash == self._alias_checksum
         self._alias_checksum = al_hash
-        # did the contents of any directory in PATH change?
-        max_mtime = 0
-        for path in path_immut:
-            mtime = os.stat(path).st_mtime
-            if mtime > max_mtime:
-                max_mtime = mtime
-        cache_valid = cache_valid and (max_mtime <= self._path_mtime)
-        self._path_mtime = max_mtime
         if cache_valid:
             return self._cmds_cache
-        allcmds = {}
+        locs = {}
         for path in reversed(path_immut):
             # iterate backwards so that entries at the front of PATH overwrite
             # entries at the back.
-            for cmd in executables_in(path):
-                key = cmd.upper() if ON_WINDOWS else cmd
-                allcmds[key] = (os.path.join(path, cmd), alss.get(key, None))
+            locs.update(self._dir_cmds[path][1])
+        allcmds = {key: (loc, alss.get(key, None)) for key, loc in locs.items()}
         for cmd in alss:
             if cmd not in allcmds:
                 key = cmd.upper() if ON_WINDOWS else cmd
                 allcmds[key] = (cmd, True)
         self._cmds_cache = allcmds
+        self._name_index = None
         return allcmds
 
+    def names_with_prefix(self, prefix, case_sensitive=True):
+        """Returns the names of the commands and aliases that start with a
+        prefix, sorted case insensitively if the prefix is. The names are
+        looked up in a sorted index of the cache, so this takes O(log n + k)
+        time for k matches once the index is built.
+        """
+        _ = self.all_commands
+        index = self._name_index
+        if index is None:
+            names = sorted(set(self._names(self._cmds_cache)))
+            lowered = sorted((name.lower(), name) for name in names)
+            index = self._name_index = (
+                names,
+                [low for low, _ in lowered],
+                [name for _, name in lowered],
+            )
+        if case_sensitive:
+            keys = values = index[0]
+        else:
+            prefix = prefix.lower()
+            keys, values = index[1], index[2]
+        matches = []
+        for i in range(bisect.bisect_left(keys, prefix), len(keys)):
+            if not keys[i].startswith(prefix):
+                break
+            matches.append(values[i])
+        return matches
+
+    def executables_in_dir(self, path):
+        """Returns the names of the executables in a directory. The directory
+        is only scanned if it has changed since it was last scanned, e.g.
+        because it is in $PATH.
+        """
+        # relative paths, e.g. ".", name a different directory after a cd
+        key = os.path.abspath(path)
+        try:
+            mtime = os.stat(key).st_mtime
+        except OSError:
+            return []
+        scanned = self._dir_cmds.get(key)
+        if scanned is None or scanned[0] != mtime:
+            scanned = self._dir_cmds[key] = (mtime, self._scan_dir(key))
+        return [pathbasename(loc) for loc in scanned[1].values()]
+
+    @staticmethod
+    def _scan_dir(path):
+        """Returns a dict mapping the keys of the executables in a directory
+        to their paths.
+        """
+        cmds = {}
+        for cmd in executables_in(path):
+            key = cmd.upper() if ON_WINDOWS else cmd
+            cmds[key] = os.path.join(path, cmd)
+        return cmds
+
     def cached_name(self, name):
         """Returns the name that would appear in the cache, if it exists."""
         if name is None:
@@ -31,7 +31,8 @@ class Completer(object):
             Length of the prefix to be replaced in the completion.
         """
         ctx = ctx or {}
-        for func in builtins.__xonsh__.completers.values():
+        # copy, since completers may add or remove others while running
+        for func in list(builtins.__xonsh__.completers.values()):
             try:
                 out = func(prefix, line, begidx, endidx, ctx)
             except StopIteration:
@@ -1,11 +1,8 @@
 import os
 import builtins
 
-import xonsh.tools as xt
 import xonsh.platform as xp
 
-from xonsh.completers.tools import get_filter_function
-
 SKIP_TOKENS = {"sudo", "time", "timeit", "which", "showcmd", "man"}
 END_PROC_TOKENS = {"|", "||", "&&", "and", "or"}
 
@@ -15,17 +12,17 @@ def complete_command(cmd, line, start, end, ctx):
     Returns a list of valid commands starting with the first argument
     """
     space = " "
-    out = {
-        s + space
-        for s in builtins.__xonsh__.commands_cache
-        if get_filter_function()(s, cmd)
-    }
+    cc = builtins.__xonsh__.commands_cache
+    csc = builtins.__xonsh__.env.get("CASE_SENSITIVE_COMPLETIONS")
+    out = {s + space for s in cc.names_with_prefix(cmd, case_sensitive=csc)}
     if xp.ON_WINDOWS:
-        out |= {i for i in xt.executables_in(".") if i.startswith(cmd)}
+        out |= {i for i in cc.executables_in_dir(".") if i.startswith(cmd)}
     base = os.path.basename(cmd)
     if os.path.isdir(base):
         out |= {
-            os.path.join(base, i) for i in xt.executables_in(base) if i.startswith(cmd)
+            os.path.join(base, i)
+            for i in cc.executables_in_dir(base)
+            if i.startswith(cmd)
         }
     return out
 
@@ -50,7 +47,7 @@ def complete_skipper(cmd, line, start, end, ctx):
 
     # If there's no space following an END_PROC_TOKEN, insert one
     if parts[-1] in END_PROC_TOKENS:
-        return(set(" "), 0)
+        return (set(" "), 0)
 
     if len(parts) == skip_part_num + 1:
         comp_func = complete_command
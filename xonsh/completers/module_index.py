@@ -0,0 +1,289 @@
+"""An index of the modules that can be imported from ``sys.path``, so that
+imports can be completed without importing, or even searching for, every
+module on each completion.
+"""
+import os
+import ast
+import sys
+import pickle
+import pkgutil
+import builtins
+import threading
+
+import xonsh.lazyasd as xl
+
+MODULE_INDEX_FORMAT = 2
+
+
+class ModuleIndex:
+    """Index of the names of importable modules. The modules in each
+    ``sys.path`` entry, and the submodules in each package directory, are kept
+    per directory along with its mtime, so that only the directories that
+    changed since they were last scanned are scanned again. Similarly, the
+    names that modules define are read from their source, and kept along with
+    the mtime of the source. The index may be saved to and loaded from a file,
+    which only keeps what is under the absolute ``sys.path`` entries, so that
+    neither the current directory nor entries that were removed from
+    ``sys.path`` accumulate in it.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        self.ready = threading.Event()
+        self._dirs = {}
+        self._members = {}
+        self._dirty = False
+        self._building = False
+        self._lock = threading.RLock()
+
+    def load(self):
+        """Loads the saved index, if there is one for this version of
+        python.
+        """
+        try:
+            with open(self.filename, "rb") as f:
+                saved = pickle.load(f)
+        except Exception:
+            return
+        if saved.get("key") != (MODULE_INDEX_FORMAT, sys.version):
+            return
+        roots = _saved_roots()
+        dirs = _entries_under(saved["dirs"], roots)
+        members = _entries_under(saved["members"], roots)
+        with self._lock:
+            self._dirs.update(dirs)
+            self._members.update(members)
+            if len(dirs) < len(saved["dirs"]) or len(members) < len(saved["members"]):
+                # drop what is no longer on sys.path from the saved index
+                self._dirty = True
+
+    def save(self):
+        """Saves the index, if it has changed."""
+        if self.filename is None or not self._dirty:
+            return
+        roots = _saved_roots()
+        with self._lock:
+            saved = {
+                "key": (MODULE_INDEX_FORMAT, sys.version),
+                "dirs": _entries_under(self._dirs, roots),
+                "members": _entries_under(self._members, roots),
+            }
+            self._dirty = False
+        tmp = "{0}.{1}.tmp".format(self.filename, os.getpid())
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump(saved, f)
+            os.replace(tmp, self.filename)
+        except OSError:
+            pass
+
+    def build(self):
+        """Loads the saved index and brings the modules of each ``sys.path``
+        entry up to date, then saves the index. This is a generator that
+        yields after each step, so that it may be paused, and it does nothing
+        if the index is already being built.
+        """
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        try:
+            self.load()
+            if self._dirs:
+                # the saved index is checked as it is used
+                self.ready.set()
+            yield
+            for path in self._path_entries():
+                self._scan(path)
+                yield
+            self.save()
+            self.ready.set()
+        finally:
+            self._building = False
+
+    def build_in_background(self):
+        """Builds the index on a background thread, unless it is ready or
+        already being built.
+        """
+        if self.ready.is_set() or self._building:
+            return
+
+        def run():
+            for _ in self.build():
+                pass
+
+        threading.Thread(target=run, name="xonsh-module-index", daemon=True).start()
+
+    @staticmethod
+    def _path_entries():
+        return [p or os.getcwd() for p in sys.path]
+
+    def _scan(self, path):
+        """Returns a dict mapping the names of the modules in a directory, or
+        zip file, to whether they are packages.
+        """
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return {}
+        with self._lock:
+            scanned = self._dirs.get(path)
+            if scanned is None or scanned[0] != mtime:
+                try:
+                    mods = {m[1]: m[2] for m in pkgutil.iter_modules([path])}
+                except Exception:
+                    mods = {}
+                scanned = self._dirs[path] = (mtime, mods)
+                self._dirty = self._dirty or _is_under(path, _saved_roots())
+        return scanned[1]
+
+    def _package_dirs(self, parts):
+        """Returns the directories of a (possibly namespace) package, given
+        the parts of its dotted name.
+        """
+        dirs = self._path_entries()
+        for part in parts:
+            dirs = [
+                os.path.join(d, part)
+                for d in dirs
+                if self._scan(d).get(part) and os.path.isdir(os.path.join(d, part))
+            ]
+        return dirs
+
+    def modules(self, prefix):
+        """Returns the names of the modules in the package that a dotted
+        prefix is in, or the top-level modules if it is not dotted.
+        """
+        pkg, _, _ = prefix.rpartition(".")
+        parts = pkg.split(".") if pkg else []
+        names = set()
+        for d in self._package_dirs(parts):
+            names.update(self._scan(d))
+        if not parts:
+            names.update(sys.builtin_module_names)
+        base = pkg + "." if pkg else ""
+        return {base + name for name in names}
+
+    def members(self, module):
+        """Returns the names defined at the top-level of a module, read from
+        its source without importing it, along with its submodules. Returns
+        None if the module is not found, has no python source, or defines
+        names that cannot be read from its source, e.g. with a star import.
+        """
+        parts = module.split(".")
+        for d in self._package_dirs(parts[:-1]):
+            ispkg = self._scan(d).get(parts[-1])
+            if ispkg is None:
+                continue
+            elif ispkg:
+                pkgdir = os.path.join(d, parts[-1])
+                init = os.path.join(pkgdir, "__init__.py")
+                if os.path.isfile(init):
+                    names = self._source_names(init)
+                elif os.path.isdir(pkgdir):
+                    # namespace package
+                    names = set()
+                else:
+                    names = None
+                return None if names is None else names | set(self._scan(pkgdir))
+            else:
+                return self._source_names(os.path.join(d, parts[-1] + ".py"))
+        return None
+
+    def _source_names(self, filename):
+        try:
+            mtime = os.stat(filename).st_mtime
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._members.get(filename)
+        if cached is not None and cached[0] == mtime:
+            return None if cached[1] is None else set(cached[1])
+        try:
+            with open(filename, "rb") as f:
+                tree = ast.parse(f.read(), filename)
+        except (OSError, SyntaxError, ValueError):
+            return None
+        names = set(_defined_names(tree.body))
+        if names & {"*", "__getattr__"} or _modifies_globals(tree.body):
+            # the module has to be imported to know what it defines
+            names = None
+        with self._lock:
+            self._members[filename] = (mtime, None if names is None else sorted(names))
+            self._dirty = self._dirty or _is_under(filename, _saved_roots())
+        return names
+
+
+def _saved_roots():
+    """Returns the sys.path entries that the saved index covers. These are
+    the absolute ones, since relative entries, e.g. '' for the current
+    directory, stand for a different directory after each cd.
+    """
+    return {os.path.normpath(p) for p in sys.path if p and os.path.isabs(p)}
+
+
+def _is_under(path, roots):
+    """Whether a path is one of the roots, or inside one of them."""
+    while path not in roots:
+        parent = os.path.dirname(path)
+        if parent == path:
+            return False
+        path = parent
+    return True
+
+
+def _entries_under(entries, roots):
+    """Returns the entries of a dict keyed by path that are under the roots."""
+    return {k: v for k, v in entries.items() if _is_under(k, roots)}
+
+
+def _defined_names(body):
+    """Yields the names bound by a list of top-level statements, including
+    those in top-level if and try blocks. Star imports yield ``"*"``.
+    """
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            yield node.name
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                yield alias.asname or alias.name.partition(".")[0]
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                for n in ast.walk(target):
+                    if isinstance(n, ast.Name):
+                        yield n.id
+        elif isinstance(node, ast.If):
+            yield from _defined_names(node.body)
+            yield from _defined_names(node.orelse)
+        elif isinstance(node, ast.Try):
+            yield from _defined_names(node.body)
+            for handler in node.handlers:
+                yield from _defined_names(handler.body)
+            yield from _defined_names(node.orelse)
+            yield from _defined_names(node.finalbody)
+
+
+def _modifies_globals(body):
+    """Whether top-level statements call globals() or vars(), e.g. to define
+    names in a loop.
+    """
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        for n in ast.walk(node):
+            if (
+                isinstance(n, ast.Call)
+                and isinstance(n.func, ast.Name)
+                and n.func.id in {"globals", "vars"}
+            ):
+                return True
+    return False
+
+
+@xl.lazyobject
+def MODULE_INDEX():
+    env = getattr(builtins.__xonsh__, "env", None)
+    datadir = env.get("XONSH_DATA_DIR") if env is not None else None
+    filename = os.path.join(datadir, "module_index_cache") if datadir else None
+    return ModuleIndex(filename)
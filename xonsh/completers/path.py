@@ -23,10 +23,8 @@ def PATTERN_NEED_QUOTES():
 def cd_in_command(line):
     """Returns True if "cd" is a token in the line, False otherwise."""
     lexer = builtins.__xonsh__.execer.parser.lexer
-    lexer.reset()
-    lexer.input(line)
     have_cd = False
-    for tok in lexer:
+    for tok in lexer.cached_tokens(line):
         if tok.type == "NAME" and tok.value == "cd":
             have_cd = True
             break
@@ -1,7 +1,10 @@
 """Completers for pip."""
 # pylint: disable=invalid-name, missing-docstring, unsupported-membership-test
 # pylint: disable=unused-argument, not-an-iterable
+import os
 import re
+import builtins
+import threading
 import subprocess
 
 import xonsh.lazyasd as xl
@@ -18,39 +21,227 @@ def PIP_LIST_RE():
 
 
 @xl.lazyobject
-def ALL_COMMANDS():
+def PIP_VERSION_RE():
+    return re.compile(r" from (.+) \(python [^)]*\)\s*$")
+
+
+def _pip_help_commands(pip):
     try:
         help_text = str(
-            subprocess.check_output(["pip", "--help"], stderr=subprocess.DEVNULL)
+            subprocess.check_output([pip, "--help"], stderr=subprocess.DEVNULL)
         )
-    except FileNotFoundError:
+    except (OSError, subprocess.CalledProcessError):
         return []
     commands = re.findall(r"  (\w+)  ", help_text)
     return [c for c in commands if c not in ["completion", "help"]]
 
 
+def _shebang_python(pip):
+    """Returns the interpreter in the shebang of a pip script, or None if
+    it does not name a python interpreter.
+    """
+    try:
+        with open(pip, "rb") as f:
+            lines = [f.readline(512), f.readline(512)]
+    except OSError:
+        return None
+    if not lines[0].startswith(b"#!"):
+        return None
+    args = lines[0][2:].decode(errors="replace").split()
+    if not args:
+        return None
+    if os.path.basename(args[0]) == "sh":
+        # scripts with long interpreter paths are wrapped as
+        # #!/bin/sh
+        # '''exec' /path/to/python "$0" "$@"
+        m = re.match(r"'''exec' (\S+)", lines[1].decode(errors="replace"))
+        args = [m.group(1)] if m else []
+    elif os.path.basename(args[0]) == "env":
+        args = args[1:]
+        if args:
+            located = builtins.__xonsh__.commands_cache.locate_binary(args[0])
+            args[0] = located or args[0]
+    if not args or not os.path.basename(args[0]).startswith("python"):
+        return None
+    return args[0]
+
+
+def _pip_site_dirs(pip):
+    """Finds the directories that pip looks for installed packages in, by
+    asking the interpreter of the pip script for its path, or else pip for
+    its own location. Returns None if neither works.
+    """
+    python = _shebang_python(pip)
+    if python is not None:
+        code = "import sys; print('\\n'.join(sys.path))"
+        try:
+            out = subprocess.check_output(
+                [python, "-c", code], stderr=subprocess.DEVNULL
+            )
+        except (OSError, subprocess.CalledProcessError):
+            pass
+        else:
+            paths = out.decode(errors="replace").splitlines()
+            return [p for p in paths if os.path.isabs(p) and os.path.isdir(p)]
+    try:
+        out = subprocess.check_output([pip, "--version"], stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    m = PIP_VERSION_RE.search(out.decode(errors="replace"))
+    if m is None:
+        return None
+    return [os.path.dirname(m.group(1))]
+
+
+def _dist_name(path, base):
+    """Reads the project name of an installed distribution from its metadata,
+    falling back to the name of its dist-info or egg-info entry.
+    """
+    if os.path.isdir(path):
+        for name in ("METADATA", "PKG-INFO"):
+            metadata = os.path.join(path, name)
+            if os.path.isfile(metadata):
+                path = metadata
+                break
+        else:
+            return base.split("-")[0]
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if line.startswith("Name:"):
+                    return line[5:].strip()
+                elif not line.strip():
+                    break
+    except OSError:
+        pass
+    return base.split("-")[0]
+
+
+def installed_packages(site_dirs):
+    """Returns the names of the packages installed in the given directories,
+    read from their dist-info, egg-info and egg-link entries.
+    """
+    names = set()
+    for d in site_dirs:
+        try:
+            entries = os.listdir(d)
+        except OSError:
+            continue
+        for entry in entries:
+            base, ext = os.path.splitext(entry)
+            if ext in {".dist-info", ".egg-info"}:
+                names.add(_dist_name(os.path.join(d, entry), base))
+            elif ext == ".egg-link":
+                names.add(base)
+    return names
+
+
+class PipCompletionData:
+    """Caches the subcommands of a pip executable, and the packages that are
+    installed for it. Installing or removing a package changes the mtime of
+    the directory that its dist-info is in, so the packages are read again
+    once one of these mtimes has changed. This happens in the background,
+    while the previous packages are returned.
+    """
+
+    def __init__(self, pip):
+        self.pip = pip
+        self._commands = None
+        self._site_dirs = None
+        self._packages = None
+        self._refresh = None
+
+    @property
+    def commands(self):
+        """The subcommands of pip, except for completion and help."""
+        try:
+            mtime = os.stat(self.pip).st_mtime
+        except OSError:
+            mtime = None
+        if self._commands is None or self._commands[0] != mtime:
+            self._commands = (mtime, _pip_help_commands(self.pip))
+        return self._commands[1]
+
+    @property
+    def site_dirs(self):
+        """The directories that pip looks for packages in, or None if they
+        are not known.
+        """
+        if self._site_dirs is None:
+            self._site_dirs = _pip_site_dirs(self.pip) or ()
+        return self._site_dirs or None
+
+    def _packages_key(self):
+        key = []
+        for d in self.site_dirs:
+            try:
+                key.append(os.stat(d).st_mtime)
+            except OSError:
+                key.append(None)
+        return tuple(key)
+
+    def _read_packages(self, key):
+        self._packages = (key, installed_packages(self.site_dirs))
+
+    @property
+    def packages(self):
+        """The names of the installed packages, or None if they cannot be
+        read from the site directories.
+        """
+        if self.site_dirs is None:
+            return None
+        key = self._packages_key()
+        if self._packages is None:
+            self._read_packages(key)
+        elif self._packages[0] != key and (
+            self._refresh is None or not self._refresh.is_alive()
+        ):
+            self._refresh = threading.Thread(
+                target=self._read_packages, args=(key,), daemon=True
+            )
+            self._refresh.start()
+        return self._packages[1]
+
+
+_PIP_COMPLETION_DATA = {}
+
+
+def pip_completion_data(pip):
+    """Returns the cached completion data of a pip executable, by name."""
+    cc = getattr(builtins.__xonsh__, "commands_cache", None)
+    path = (cc.locate_binary(pip) if cc is not None else None) or pip
+    data = _PIP_COMPLETION_DATA.get(path)
+    if data is None:
+        data = _PIP_COMPLETION_DATA[path] = PipCompletionData(path)
+    return data
+
+
 def complete_pip(prefix, line, begidx, endidx, ctx):
     """Completes python's package manager pip"""
     line_len = len(line.split())
-    if (
-        (line_len > 3)
-        or (line_len > 2 and line.endswith(" "))
-        or (not PIP_RE.search(line))
-    ):
+    m = PIP_RE.search(line)
+    if (line_len > 3) or (line_len > 2 and line.endswith(" ")) or (not m):
         return
+    data = pip_completion_data(m.group(0))
     if PIP_LIST_RE.search(line):
-        try:
-            items = subprocess.check_output(["pip", "list"], stderr=subprocess.DEVNULL)
-        except FileNotFoundError:
-            return set()
-        items = items.decode("utf-8").splitlines()
-        return set(i.split()[0] for i in items if i.split()[0].startswith(prefix))
+        packages = data.packages
+        if packages is None:
+            try:
+                items = subprocess.check_output(
+                    [data.pip, "list"], stderr=subprocess.DEVNULL
+                )
+            except (OSError, subprocess.CalledProcessError):
+                return set()
+            items = items.decode("utf-8").splitlines()
+            packages = (i.split()[0] for i in items if i.strip())
+        return set(p for p in packages if p.startswith(prefix))
 
     if (line_len > 1 and line.endswith(" ")) or line_len > 2:
         # "pip show " -> no complete (note space)
         return
-    if prefix not in ALL_COMMANDS:
-        suggestions = [c for c in ALL_COMMANDS if c.startswith(prefix)]
+    commands = data.commands
+    if prefix not in commands:
+        suggestions = [c for c in commands if c.startswith(prefix)]
         if suggestions:
             return suggestions, len(prefix)
-    return ALL_COMMANDS, len(prefix)
+    return commands, len(prefix)
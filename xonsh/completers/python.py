@@ -10,6 +10,7 @@ import xonsh.tools as xt
 import xonsh.lazyasd as xl
 
 from xonsh.completers.tools import get_filter_function
+from xonsh.completers.module_index import MODULE_INDEX
 
 
 @xl.lazyobject
@@ -277,6 +278,11 @@ def complete_import(prefix, line, start, end, ctx):
         return complete_module(prefix)
     if ntoks > 2 and ltoks[0] == "from" and ltoks[2] == "import":
         # complete thing inside a module
+        if ltoks[1] not in sys.modules and MODULE_INDEX.ready.is_set():
+            # avoid importing the module if its source is indexed
+            names = MODULE_INDEX.members(ltoks[1])
+            if names is not None:
+                return {i for i in names if i.startswith(prefix)}
         try:
             mod = importlib.import_module(ltoks[1])
         except ImportError:
@@ -287,4 +293,10 @@ def complete_import(prefix, line, start, end, ctx):
 
 
 def complete_module(prefix):
-    return {s for s in sys.modules if get_filter_function()(s, prefix)}
+    modules = set(sys.modules)
+    if MODULE_INDEX.ready.is_set():
+        modules.update(MODULE_INDEX.modules(prefix))
+    else:
+        # until the index is built, only imported modules are completed
+        MODULE_INDEX.build_in_background()
+    return {s for s in modules if get_filter_function()(s, prefix)}
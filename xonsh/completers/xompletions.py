@@ -11,7 +11,7 @@ def complete_xonfig(prefix, line, start, end, ctx):
         return None
     curix = args.index(prefix)
     if curix == 1:
-        possible = {"info", "wizard", "styles", "colors", "-h"}
+        possible = {"info", "wizard", "styles", "colors", "events", "-h"}
     elif curix == 2 and args[1] == "colors":
         possible = set(xt.color_style_names())
     else:
@@ -0,0 +1,503 @@
+"""A daemon that keeps a pre-warmed xonsh interpreter around, so that scripts
+start instantly.
+
+Importing xonsh takes a good part of a second, which adds up when scripts
+are run thousands of times, e.g. by cron or CI jobs. The daemon imports
+xonsh once and then forks a child per request. The child runs the request
+with the argv, working directory, environment, and standard streams of the
+client::
+
+    $ xonsh-daemon &
+    $ xonsh-client -c 'echo hello'
+    $ xonsh-client script.xsh arg1 arg2
+
+The client does not import xonsh, so that it starts nearly as fast as
+Python itself. ``#!/usr/bin/env xonsh-client`` may be used as the shebang
+line of scripts. The client runs xonsh itself when no daemon is
+listening and for interactive sessions, since the children of the daemon
+cannot take control of the client's terminal. Signals sent to the client
+are forwarded to the child.
+
+Both use the socket that ``$XONSH_DAEMON_SOCKET`` names, which defaults to
+``xonsh-daemon-<uid>.sock`` in ``$XDG_RUNTIME_DIR``, or else to
+``xonsh-daemon.sock`` in a private ``xonsh-daemon-<uid>`` directory in the
+temporary directory. Only the user that started the daemon may connect to
+it, and the client only talks to a daemon of its own user.
+
+This module only imports the standard library at the top level, since the
+client loads it by path, without importing the xonsh package.
+"""
+import os
+import sys
+import stat
+import json
+import array
+import atexit
+import errno
+import signal
+import socket
+import struct
+import argparse
+import tempfile
+
+DAEMON_PRELOAD_MODULES = (
+    "xonsh.main",
+    "xonsh.execer",
+    "xonsh.shell",
+    "xonsh.base_shell",
+    "xonsh.readline_shell",
+    "xonsh.history.main",
+    "xonsh.xonfig",
+)
+"""Modules that the daemon imports before it serves any requests."""
+
+_HEADER = struct.Struct("!I")
+_REPLY = struct.Struct("!ci")
+_NFDS = 3
+_FORWARDED_SIGNALS = ("SIGINT", "SIGTERM", "SIGHUP", "SIGQUIT", "SIGUSR1", "SIGUSR2")
+_INTERACTIVE_FLAGS = frozenset(["-i", "--interactive"])
+
+
+def default_socket_path():
+    """Returns the path of the daemon's socket."""
+    path = os.environ.get("XONSH_DAEMON_SOCKET")
+    if path:
+        return path
+    rundir = os.environ.get("XDG_RUNTIME_DIR")
+    if rundir:
+        return os.path.join(rundir, "xonsh-daemon-{}.sock".format(os.getuid()))
+    return os.path.join(_fallback_socket_dir(), "xonsh-daemon.sock")
+
+
+def _fallback_socket_dir():
+    """Returns the private directory in the shared temporary directory that
+    holds the socket when there is no $XDG_RUNTIME_DIR.
+    """
+    return os.path.join(tempfile.gettempdir(), "xonsh-daemon-{}".format(os.getuid()))
+
+
+def _is_private_dir(path):
+    """Whether a directory belongs to the user and no one else may use it."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return (
+        stat.S_ISDIR(st.st_mode)
+        and st.st_uid == os.getuid()
+        and not st.st_mode & (stat.S_IRWXG | stat.S_IRWXO)
+    )
+
+
+def _peer_uid(sock):
+    """Returns the uid of the process on the other end of a Unix socket, or
+    None if the platform cannot tell.
+    """
+    if hasattr(socket, "SO_PEERCRED"):
+        creds = sock.getsockopt(
+            socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+        )
+        return struct.unpack("3i", creds)[1]
+    elif hasattr(socket, "LOCAL_PEERCRED"):
+        # struct xucred of the BSDs and macOS: version, uid, groups
+        creds = sock.getsockopt(0, socket.LOCAL_PEERCRED, struct.calcsize("IIh16I"))
+        return struct.unpack_from("II", creds)[1]
+    return None
+
+
+def _recv_exactly(sock, n):
+    data = b""
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise EOFError("connection closed")
+        data += chunk
+    return data
+
+
+def send_request(sock, argv, cwd, env, fds=(0, 1, 2)):
+    """Sends a request to run xonsh with the given arguments, working
+    directory, environment, and standard stream file descriptors.
+    """
+    body = json.dumps({"argv": argv, "cwd": cwd, "env": env}).encode()
+    data = _HEADER.pack(len(body)) + body
+    anc = [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", fds))]
+    sent = sock.sendmsg([data], anc)
+    if sent < len(data):
+        sock.sendall(data[sent:])
+
+
+def recv_request(sock):
+    """Receives a request that was sent with ``send_request()``. Returns the
+    request dict and the list of file descriptors.
+    """
+    fds = array.array("i")
+    ancsize = socket.CMSG_SPACE(_NFDS * fds.itemsize)
+    data, ancdata, _, _ = sock.recvmsg(_HEADER.size, ancsize)
+    for level, kind, cdata in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(cdata[: len(cdata) - (len(cdata) % fds.itemsize)])
+    fds = list(fds)
+    try:
+        if len(data) < _HEADER.size:
+            data += _recv_exactly(sock, _HEADER.size - len(data))
+        (size,) = _HEADER.unpack(data)
+        req = json.loads(_recv_exactly(sock, size).decode())
+        if len(fds) != _NFDS:
+            raise ValueError("expected {} file descriptors".format(_NFDS))
+    except Exception:
+        for fd in fds:
+            os.close(fd)
+        raise
+    return req, fds
+
+
+def _exit_code(status):
+    """Converts a wait status into an exit code, which is negative for a
+    process killed by a signal.
+    """
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+#
+# Client
+#
+
+
+def _run_locally(argv):
+    """Replaces the client with a normal xonsh process."""
+    args = [sys.executable, "-m", "xonsh"] + argv
+    os.execv(sys.executable, args)
+
+
+def _is_interactive(argv):
+    if _INTERACTIVE_FLAGS.intersection(argv):
+        return True
+    if "-c" in argv or any(not a.startswith("-") for a in argv):
+        return False
+    return sys.stdin.isatty()
+
+
+def _server_is_owner(sock, path):
+    """Whether the daemon on the other end of a connection runs as the user.
+    Where the platform cannot tell, the owner of the socket file, which is
+    whoever bound it, is checked instead.
+    """
+    uid = _peer_uid(sock)
+    if uid is None:
+        try:
+            uid = os.lstat(path).st_uid
+        except OSError:
+            return False
+    return uid == os.getuid()
+
+
+def client_main(argv=None, socket_path=None):
+    """Runs xonsh through the daemon and returns its exit code. Falls back
+    to running xonsh in this process if no daemon is listening or if the
+    session would be interactive.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if _is_interactive(argv):
+        _run_locally(argv)
+    path = socket_path or default_socket_path()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        if not _server_is_owner(sock, path):
+            # do not hand the environment and terminal to someone else
+            print(
+                "xonsh-client: ignoring {}, which belongs to another "
+                "user".format(path),
+                file=sys.stderr,
+            )
+            raise EOFError("not our daemon")
+        send_request(sock, argv, os.getcwd(), dict(os.environ))
+        kind, pid = _REPLY.unpack(_recv_exactly(sock, _REPLY.size))
+    except (OSError, EOFError):
+        sock.close()
+        _run_locally(argv)
+
+    def forward(sig, frame):
+        try:
+            os.killpg(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    for name in _FORWARDED_SIGNALS:
+        signal.signal(getattr(signal, name), forward)
+    while True:
+        try:
+            kind, code = _REPLY.unpack(_recv_exactly(sock, _REPLY.size))
+            break
+        except InterruptedError:
+            continue
+        except EOFError:
+            # the daemon went away
+            return 1
+    sock.close()
+    if code < 0:
+        signal.signal(-code, signal.SIG_DFL)
+        os.kill(os.getpid(), -code)
+        code = 128 - code
+    return code
+
+
+#
+# Server
+#
+
+
+def _peer_is_owner(conn, path):
+    """Whether the process on the other end of a connection belongs to the
+    user that runs the daemon. Where the platform cannot tell, this is only
+    assumed if the socket is in a private directory, which no one else can
+    connect through.
+    """
+    uid = _peer_uid(conn)
+    if uid is None:
+        return _is_private_dir(os.path.dirname(os.path.abspath(path)))
+    return uid == os.getuid()
+
+
+def preload():
+    """Imports and initializes the parts of xonsh that do not depend on the
+    environment that a request is run in. Returns the parser, which the
+    children use rather than constructing their own.
+    """
+    import importlib
+
+    for name in DAEMON_PRELOAD_MODULES:
+        importlib.import_module(name)
+    from xonsh.parser import Parser
+
+    # builds or loads the parser tables, and waits for the thread that does
+    # so, since forking while another thread holds a lock may deadlock the
+    # child
+    parser = Parser()
+    parser.wait_until_ready()
+    return parser
+
+
+def _run_child(req, fds, parser=None):
+    """Runs a request in a forked child and exits with xonsh's exit code."""
+    code = 1
+    try:
+        # signals that the client forwards go to the whole process group,
+        # as they would for a foreground job
+        os.setpgid(0, 0)
+        for i, fd in enumerate(fds):
+            if fd != i:
+                os.dup2(fd, i)
+                os.close(fd)
+        sys.stdin = sys.__stdin__ = open(0, "r", closefd=False)
+        sys.stdout = sys.__stdout__ = open(1, "w", closefd=False)
+        sys.stderr = sys.__stderr__ = open(2, "w", closefd=False)
+        os.chdir(req["cwd"])
+        os.environ.clear()
+        os.environ.update(req["env"])
+        sys.argv = ["xonsh"] + req["argv"]
+        from xonsh.main import main
+
+        main(req["argv"], xonsh_parser=parser)
+        code = 0
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+    except BaseException:
+        import traceback
+
+        traceback.print_exc()
+    finally:
+        # exit without unwinding into the daemon's own cleanup, but run the
+        # exit handlers that xonsh registered, e.g. to flush history
+        try:
+            atexit._run_exitfuncs()
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+class XonshDaemon:
+    """Serves requests to run xonsh on a Unix socket, forking a pre-warmed
+    child for each of them.
+    """
+
+    def __init__(self, socket_path=None):
+        self.socket_path = socket_path or default_socket_path()
+        self.sock = None
+        self.children = {}
+        # the preloaded parser that the children use
+        self.parser = None
+        self._wakeup_r = self._wakeup_w = None
+
+    def bind(self):
+        """Creates the socket, replacing a stale one. Raises an error if
+        another daemon is listening on it.
+        """
+        path = self.socket_path
+        sockdir = os.path.dirname(os.path.abspath(path))
+        if sockdir == _fallback_socket_dir():
+            try:
+                os.mkdir(sockdir, 0o700)
+            except FileExistsError:
+                pass
+            if not _is_private_dir(sockdir):
+                raise RuntimeError(sockdir + " is not a private directory")
+        if os.path.exists(path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+            except OSError:
+                os.unlink(path)
+            else:
+                raise RuntimeError("a xonsh daemon is listening on " + path)
+            finally:
+                probe.close()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)
+        try:
+            sock.bind(path)
+        finally:
+            os.umask(umask)
+        sock.listen(64)
+        self.sock = sock
+
+    def serve_forever(self):
+        """Serves requests until the daemon is terminated."""
+        import selectors
+
+        if self.sock is None:
+            self.bind()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        signal.set_wakeup_fd(self._wakeup_w)
+        signal.signal(signal.SIGCHLD, lambda sig, frame: None)
+        sel = selectors.DefaultSelector()
+        sel.register(self.sock, selectors.EVENT_READ)
+        sel.register(self._wakeup_r, selectors.EVENT_READ)
+        try:
+            while True:
+                for key, _ in sel.select():
+                    if key.fileobj is self.sock:
+                        self._accept()
+                    else:
+                        self._drain_wakeup()
+                self._reap()
+        finally:
+            sel.close()
+            self.close()
+
+    def _drain_wakeup(self):
+        try:
+            while os.read(self._wakeup_r, 512):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _accept(self):
+        try:
+            conn, _ = self.sock.accept()
+        except InterruptedError:
+            return
+        try:
+            if not _peer_is_owner(conn, self.socket_path):
+                conn.close()
+                return
+            conn.settimeout(10.0)
+            req, fds = recv_request(conn)
+        except Exception:
+            conn.close()
+            return
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            signal.set_wakeup_fd(-1)
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            for fd in (self._wakeup_r, self._wakeup_w):
+                os.close(fd)
+            self.sock.close()
+            conn.close()
+            _run_child(req, fds, self.parser)
+        for fd in fds:
+            os.close(fd)
+        self.children[pid] = conn
+        self._reply(conn, b"P", pid)
+
+    def _reply(self, conn, kind, value):
+        try:
+            conn.sendall(_REPLY.pack(kind, value))
+        except OSError:
+            pass
+
+    def _reap(self):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            conn = self.children.pop(pid, None)
+            if conn is not None:
+                self._reply(conn, b"X", _exit_code(status))
+                conn.close()
+
+    def close(self):
+        """Closes and removes the socket."""
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+            try:
+                os.unlink(self.socket_path)
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    raise
+
+
+def _create_parser():
+    p = argparse.ArgumentParser(
+        prog="xonsh-daemon",
+        description="Keeps a pre-warmed xonsh interpreter that xonsh-client "
+        "runs scripts with.",
+    )
+    p.add_argument(
+        "--socket",
+        default=None,
+        help="path of the socket to listen on, default: $XONSH_DAEMON_SOCKET "
+        "or xonsh-daemon-<uid>.sock in $XDG_RUNTIME_DIR, or else in a "
+        "private directory in the temporary directory",
+    )
+    return p
+
+
+def main(args=None):
+    """Entry point of the xonsh daemon."""
+    ns = _create_parser().parse_args(args)
+    daemon = XonshDaemon(socket_path=ns.socket)
+    try:
+        daemon.bind()
+    except RuntimeError as e:
+        print("xonsh-daemon: " + str(e), file=sys.stderr)
+        return 1
+    daemon.parser = preload()
+    signal.signal(signal.SIGTERM, lambda sig, frame: sys.exit(0))
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
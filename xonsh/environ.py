@@ -4,6 +4,7 @@ import os
 import re
 import sys
 import pprint
+import functools
 import textwrap
 import locale
 import builtins
@@ -515,6 +516,7 @@ def DEFAULT_ENSURERS():
         "FORCE_POSIX_PATHS": (is_bool, to_bool, bool_to_str),
         "FOREIGN_ALIASES_SUPPRESS_SKIP_MESSAGE": (is_bool, to_bool, bool_to_str),
         "FOREIGN_ALIASES_OVERRIDE": (is_bool, to_bool, bool_to_str),
+        "FOREIGN_SHELL_CACHE": (is_bool, to_bool, bool_to_str),
         "FUZZY_PATH_COMPLETION": (is_bool, to_bool, bool_to_str),
         "GLOB_SORTED": (is_bool, to_bool, bool_to_str),
         "HISTCONTROL": (is_string_set, csv_to_set, set_to_csv),
@@ -577,6 +579,7 @@ def DEFAULT_ENSURERS():
         "XONSH_DEBUG": (always_false, to_debug, bool_or_int_to_str),
         "XONSH_ENCODING": (is_string, ensure_string, ensure_string),
         "XONSH_ENCODING_ERRORS": (is_string, ensure_string, ensure_string),
+        "XONSH_FUSE_ALIAS_PIPES": (is_bool, to_bool, bool_to_str),
         "XONSH_HISTORY_BACKEND": (is_history_backend, to_itself, ensure_string),
         "XONSH_HISTORY_FILE": (is_string, ensure_string, ensure_string),
         "XONSH_HISTORY_MATCH_ANYWHERE": (is_bool, to_bool, bool_to_str),
@@ -585,8 +588,16 @@ def DEFAULT_ENSURERS():
             to_history_tuple,
             history_tuple_to_str,
         ),
+        "XONSH_IDLE_WARMUP": (is_bool, to_bool, bool_to_str),
+        "XONSH_LEAN_BOOT": (is_bool, to_bool, bool_to_str),
         "XONSH_LOGIN": (is_bool, to_bool, bool_to_str),
         "XONSH_PROC_FREQUENCY": (is_float, float, str),
+        "XONSH_PROFILE_COMMANDS": (is_bool, to_bool, bool_to_str),
+        "XONSH_PROFILE_TRACE_FILE": (
+            is_logfile_opt,
+            to_logfile_opt,
+            logfile_opt_to_str,
+        ),
         "XONSH_SHOW_TRACEBACK": (is_bool, to_bool, bool_to_str),
         "XONSH_STDERR_PREFIX": (is_string, ensure_string, ensure_string),
         "XONSH_STDERR_POSTFIX": (is_string, ensure_string, ensure_string),
@@ -594,15 +605,24 @@ def DEFAULT_ENSURERS():
         "XONSH_STORE_STDIN": (is_bool, to_bool, bool_to_str),
         "XONSH_TRACEBACK_LOGFILE": (is_logfile_opt, to_logfile_opt, logfile_opt_to_str),
         "XONSH_DATETIME_FORMAT": (is_string, ensure_string, ensure_string),
+        "XONTRIBS_LAZY": (is_bool, to_bool, bool_to_str),
     }
 
 
 #
 # Defaults
 #
-def default_value(f):
-    """Decorator for making callable default values."""
+def default_value(f=None, deps=None):
+    """Decorator for making callable default values. If ``deps``, a sequence
+    of environment variable names, is given, the default is computed only
+    from these variables. Its value is then cached by the environment, and
+    recomputed only after one of them has been set or deleted, rather than
+    on every lookup.
+    """
+    if f is None:
+        return functools.partial(default_value, deps=deps)
     f._xonsh_callable_default = True
+    f._xonsh_default_deps = None if deps is None else tuple(deps)
     return f
 
 
@@ -614,7 +634,7 @@ def is_callable_default(x):
 DEFAULT_TITLE = "{current_job:{} | }{user}@{hostname}: {cwd} | xonsh"
 
 
-@default_value
+@default_value(deps=("XDG_DATA_HOME",))
 def xonsh_data_dir(env):
     """Ensures and returns the $XONSH_DATA_DIR"""
     xdd = os.path.expanduser(os.path.join(env.get("XDG_DATA_HOME"), "xonsh"))
@@ -622,7 +642,7 @@ def xonsh_data_dir(env):
     return xdd
 
 
-@default_value
+@default_value(deps=("XDG_CONFIG_HOME",))
 def xonsh_config_dir(env):
     """Ensures and returns the $XONSH_CONFIG_DIR"""
     xcd = os.path.expanduser(os.path.join(env.get("XDG_CONFIG_HOME"), "xonsh"))
@@ -637,7 +657,7 @@ def xonshconfig(env):
     return xc
 
 
-@default_value
+@default_value(deps=("XDG_CONFIG_HOME", "XONSH_CONFIG_DIR"))
 def default_xonshrc(env):
     """Creates a new instance of the default xonshrc tuple."""
     xcdrc = os.path.join(xonsh_config_dir(env), "rc.xsh")
@@ -661,7 +681,7 @@ def default_xonshrc(env):
     return dxrc
 
 
-@default_value
+@default_value(deps=("XONSH_INTERACTIVE",))
 def xonsh_append_newline(env):
     """Appends a newline if we are in interactive mode"""
     return env.get("XONSH_INTERACTIVE", False)
@@ -708,6 +728,7 @@ def DEFAULT_VALUES():
         "FORCE_POSIX_PATHS": False,
         "FOREIGN_ALIASES_SUPPRESS_SKIP_MESSAGE": False,
         "FOREIGN_ALIASES_OVERRIDE": False,
+        "FOREIGN_SHELL_CACHE": False,
         "PROMPT_FIELDS": dict(prompt.PROMPT_FIELDS),
         "FUZZY_PATH_COMPLETION": True,
         "GLOB_SORTED": True,
@@ -763,12 +784,17 @@ def DEFAULT_VALUES():
         "XONSH_DEBUG": 0,
         "XONSH_ENCODING": DEFAULT_ENCODING,
         "XONSH_ENCODING_ERRORS": "surrogateescape",
+        "XONSH_FUSE_ALIAS_PIPES": False,
         "XONSH_HISTORY_BACKEND": "json",
         "XONSH_HISTORY_FILE": os.path.expanduser("~/.xonsh_history.json"),
         "XONSH_HISTORY_MATCH_ANYWHERE": False,
         "XONSH_HISTORY_SIZE": (8128, "commands"),
+        "XONSH_IDLE_WARMUP": True,
+        "XONSH_LEAN_BOOT": True,
         "XONSH_LOGIN": False,
         "XONSH_PROC_FREQUENCY": 1e-4,
+        "XONSH_PROFILE_COMMANDS": False,
+        "XONSH_PROFILE_TRACE_FILE": None,
         "XONSH_SHOW_TRACEBACK": False,
         "XONSH_STDERR_PREFIX": "",
         "XONSH_STDERR_POSTFIX": "",
@@ -776,6 +802,7 @@ def DEFAULT_VALUES():
         "XONSH_STORE_STDOUT": False,
         "XONSH_TRACEBACK_LOGFILE": None,
         "XONSH_DATETIME_FORMAT": "%Y-%m-%d %H:%M",
+        "XONTRIBS_LAZY": False,
     }
     if hasattr(locale, "LC_MESSAGES"):
         dv["LC_MESSAGES"] = locale.setlocale(locale.LC_MESSAGES)
@@ -939,6 +966,17 @@ def DEFAULT_DOCS():
             "``.xonshrc`` is parsed",
             configurable=True,
         ),
+        "FOREIGN_SHELL_CACHE": VarDocs(
+            "Whether or not the environments and aliases read from foreign "
+            "shells, e.g. by ``source-bash``, are cached in ``$XONSH_DATA_DIR``. "
+            "Cached data is reused while the shell binary, its arguments, its "
+            "run control files, the sourced files, and the input environment "
+            "stay the same, and is revalidated in the background after the "
+            "next prompt is shown. Non-interactive sessions, such as scripts, "
+            "never show a prompt, so they reuse cached data without "
+            "revalidating it.",
+            configurable=True,
+        ),
         "PROMPT_FIELDS": VarDocs(
             "Dictionary containing variables to be used when formatting $PROMPT "
             "and $TITLE. See 'Customizing the Prompt' "
@@ -1221,6 +1259,15 @@ def DEFAULT_DOCS():
             "* ``XONSH_GITSTATUS_AHEAD``: ``↑·``\n"
             "* ``XONSH_GITSTATUS_BEHIND``: ``↓·``\n"
         ),
+        "XONSH_FUSE_ALIAS_PIPES": VarDocs(
+            "Whether adjacent threadable callable aliases in a pipeline, such as "
+            "``a | b``, are connected by an in-memory pipe rather than an OS "
+            "pipe. Strings written to the pipe are passed on without being "
+            "encoded and decoded, and objects may be passed with the ``send()`` "
+            "method of the writing end. This cuts the cost of setting up short "
+            "alias pipelines, but the pipe ends have no file descriptors or "
+            "binary buffers, which some aliases may need."
+        ),
         "XONSH_HISTORY_BACKEND": VarDocs(
             "Set which history backend to use. Options are: 'json', "
             "'sqlite', and 'dummy'. The default is 'json'. "
@@ -1251,6 +1298,22 @@ def DEFAULT_DOCS():
             "``True`` if xonsh is running interactively, and ``False`` otherwise.",
             configurable=False,
         ),
+        "XONSH_IDLE_WARMUP": VarDocs(
+            "Whether or not interactive sessions warm up parts of xonsh that are "
+            "slow on first use, such as the syntax highlighter and the commands "
+            "cache, in the background while the prompt is shown. This is "
+            "paused while commands run. Use ``xonfig warmup`` to see the "
+            "warm-up tasks and how long they took. Set this in your run control "
+            "file, since the tasks are queued just before the first prompt."
+        ),
+        "XONSH_LEAN_BOOT": VarDocs(
+            "Whether or not non-interactive sessions, i.e. scripts and ``-c`` "
+            "commands, defer building the parts of xonsh that only interactive "
+            "use needs. The history backend and the completers are then built "
+            "when they are first used. Set this in the environment that xonsh "
+            "is started from, since run control files are not loaded by "
+            "non-interactive sessions."
+        ),
         "XONSH_LOGIN": VarDocs(
             "``True`` if xonsh is running as a login shell, and ``False`` otherwise.",
             configurable=False,
@@ -1260,6 +1323,18 @@ def DEFAULT_DOCS():
             "xonsh process threads sleep for while running command pipelines. "
             "The value has units of seconds [s]."
         ),
+        "XONSH_PROFILE_COMMANDS": VarDocs(
+            "Whether or not to time the phases of running each command, such as "
+            "compiling it, starting its processes, and redrawing the prompt. The "
+            "timings are passed to the ``on_command_profile`` event and, if "
+            "``$XONSH_PROFILE_TRACE_FILE`` is set, written to that file."
+        ),
+        "XONSH_PROFILE_TRACE_FILE": VarDocs(
+            "A file to append the command timings to when "
+            "``$XONSH_PROFILE_COMMANDS`` is set, in the Chrome trace event format "
+            "used by ``chrome://tracing`` and Perfetto. Its value must be a "
+            "writable file or None / the empty string to not write a trace."
+        ),
         "XONSH_SHOW_TRACEBACK": VarDocs(
             "Controls if a traceback is shown if exceptions occur in the shell. "
             "Set to ``True`` to always show traceback or ``False`` to always hide. "
@@ -1303,6 +1378,12 @@ def DEFAULT_DOCS():
             "The format that is used for ``datetime.strptime()`` in various places"
             "i.e the history timestamp option"
         ),
+        "XONTRIBS_LAZY": VarDocs(
+            "Whether ``xontrib load`` should defer importing xontribs that "
+            "declare the aliases, events, and completers they provide until one "
+            "of these is first used. Xontribs without such a declaration are "
+            "always loaded immediately."
+        ),
     }
 
 
@@ -1336,6 +1417,16 @@ class Env(cabc.MutableMapping):
         self._ensurers = {k: Ensurer(*v) for k, v in DEFAULT_ENSURERS.items()}
         self._defaults = DEFAULT_VALUES
         self._docs = DEFAULT_DOCS
+        # number of times that each variable has been set or deleted, used to
+        # invalidate the cached callable defaults that depend on it
+        self._versions = collections.Counter()
+        self._default_deps = {}
+        self._default_cache = {}
+        self.lookup_counts = None
+        self.lookup_commands = 0
+        self._lookup_handler = None
+        # old values of the variables changed by the current batch, if any
+        self._batch = None
         if len(args) == 0 and len(kwargs) == 0:
             args = (os_environ,)
         for key, val in dict(*args, **kwargs).items():
@@ -1443,6 +1534,74 @@ class Env(cabc.MutableMapping):
         """
         return varname in self._d
 
+    def profile_lookups(self, enable=True):
+        """Starts counting how many times each variable is looked up, and how
+        many commands the shell runs meanwhile, or stops counting if
+        ``enable`` is false. Starting resets the counts.
+        """
+        if self._lookup_handler is not None:
+            events.on_postcommand.discard(self._lookup_handler)
+            self._lookup_handler = None
+        if not enable:
+            self.lookup_counts = None
+            return
+        self.lookup_counts = collections.Counter()
+        self.lookup_commands = 0
+
+        def count_command(**kwargs):
+            self.lookup_commands += 1
+
+        self._lookup_handler = count_command
+        events.on_postcommand(count_command)
+
+    def lookup_profile(self, n=None):
+        """Returns a list of ``(name, lookups, lookups per command)`` tuples
+        for the ``n`` most looked up variables, most first, or None if the
+        lookups are not being counted.
+        """
+        if self.lookup_counts is None:
+            return None
+        ncmds = max(self.lookup_commands, 1)
+        return [
+            (key, count, count / ncmds)
+            for key, count in self.lookup_counts.most_common(n)
+        ]
+
+    def _default_dependencies(self, key):
+        """Returns the sorted names of the variables that the callable default
+        of a variable is computed from, including the variables that their own
+        defaults are computed from, or None if some are not declared.
+        """
+        deps = set()
+        stack = [key]
+        while stack:
+            dval = self._defaults.get(stack.pop())
+            if not is_callable_default(dval):
+                continue
+            kdeps = getattr(dval, "_xonsh_default_deps", None)
+            if kdeps is None:
+                return None
+            for dep in kdeps:
+                if dep not in deps:
+                    deps.add(dep)
+                    stack.append(dep)
+        return tuple(sorted(deps))
+
+    def _call_default(self, key, func):
+        if key in self._default_deps:
+            deps = self._default_deps[key]
+        else:
+            deps = self._default_deps[key] = self._default_dependencies(key)
+        if deps is None:
+            return func(self)
+        versions = tuple(self._versions[dep] for dep in deps)
+        cached = self._default_cache.get(key)
+        if cached is not None and cached[0] == versions:
+            return cached[1]
+        val = func(self)
+        self._default_cache[key] = (versions, val)
+        return val
+
     @contextlib.contextmanager
     def swap(self, other=None, **kwargs):
         """Provides a context manager for temporarily swapping out certain
@@ -1450,15 +1609,16 @@ class Env(cabc.MutableMapping):
         manager, the original values are restored.
         """
         old = {}
-        # single positional argument should be a dict-like object
-        if other is not None:
-            for k, v in other.items():
+        with self.batch():
+            # single positional argument should be a dict-like object
+            if other is not None:
+                for k, v in other.items():
+                    old[k] = self.get(k, NotImplemented)
+                    self[k] = v
+            # kwargs could also have been sent in
+            for k, v in kwargs.items():
                 old[k] = self.get(k, NotImplemented)
                 self[k] = v
-        # kwargs could also have been sent in
-        for k, v in kwargs.items():
-            old[k] = self.get(k, NotImplemented)
-            self[k] = v
 
         exception = None
         try:
@@ -1467,19 +1627,82 @@ class Env(cabc.MutableMapping):
             exception = e
         finally:
             # restore the values
-            for k, v in old.items():
-                if v is NotImplemented:
-                    del self[k]
-                else:
-                    self[k] = v
+            with self.batch():
+                for k, v in old.items():
+                    if v is NotImplemented:
+                        del self[k]
+                    else:
+                        self[k] = v
             if exception is not None:
                 raise exception from None
 
+    @contextlib.contextmanager
+    def batch(self):
+        """Provides a context manager for updating many environment variables
+        at once. Within it, ``os.environ`` is not updated and no
+        ``on_envvar_new`` or ``on_envvar_change`` events are fired. On exit,
+        ``os.environ`` is updated once, and at most one event is fired per
+        variable, from the value it had before the batch to its final value.
+        If an exception is raised within the batch, all of its changes are
+        rolled back instead. Nested batches are part of the outermost one.
+        """
+        if self._batch is not None:
+            yield self
+            return
+        changes = self._batch = {}
+        try:
+            yield self
+        except BaseException:
+            self._batch = None
+            for key, old_value in changes.items():
+                if old_value is self._no_value:
+                    self._d.pop(key, None)
+                else:
+                    self._d[key] = old_value
+                self._versions[key] += 1
+            self._detyped = None
+            raise
+        self._batch = None
+        if self.get("UPDATE_OS_ENVIRON"):
+            if self._orig_env is None:
+                self.replace_env()
+            else:
+                for key in changes:
+                    self._update_os_environ(key)
+        for key, old_value in changes.items():
+            if key not in self._d:
+                continue
+            val = self._d[key]
+            if old_value is self._no_value:
+                events.on_envvar_new.fire(name=key, value=val)
+            elif old_value != val:
+                events.on_envvar_change.fire(name=key, oldvalue=old_value, newvalue=val)
+
+    def _update_os_environ(self, key):
+        if key not in self._d:
+            os_environ.pop(key, None)
+            return
+        ensurer = self.get_ensurer(key)
+        if ensurer.detype is None:
+            return
+        deval = ensurer.detype(self._d[key])
+        if deval is not None:
+            os_environ[key] = deval
+
+    def update(self, *args, **kwargs):
+        """Updates the environment from a mapping or an iterable of pairs,
+        and keyword arguments, in a single batch.
+        """
+        with self.batch():
+            super().update(*args, **kwargs)
+
     #
     # Mutable mapping interface
     #
 
     def __getitem__(self, key):
+        if self.lookup_counts is not None:
+            self.lookup_counts[key] += 1
         # remove this block on next release
         if key is Ellipsis:
             return self
@@ -1488,7 +1711,7 @@ class Env(cabc.MutableMapping):
         elif key in self._defaults:
             val = self._defaults[key]
             if is_callable_default(val):
-                val = val(self)
+                val = self._call_default(key, val)
         else:
             e = "Unknown environment variable: ${}"
             raise KeyError(e.format(key))
@@ -1505,7 +1728,11 @@ class Env(cabc.MutableMapping):
         # existing envvars can have any value including None
         old_value = self._d[key] if key in self._d else self._no_value
         self._d[key] = val
+        self._versions[key] += 1
         self._detyped = None
+        if self._batch is not None:
+            self._batch.setdefault(key, old_value)
+            return
         if self.get("UPDATE_OS_ENVIRON"):
             if self._orig_env is None:
                 self.replace_env()
@@ -1521,8 +1748,12 @@ class Env(cabc.MutableMapping):
             events.on_envvar_change.fire(name=key, oldvalue=old_value, newvalue=val)
 
     def __delitem__(self, key):
-        del self._d[key]
+        old_value = self._d.pop(key)
+        self._versions[key] += 1
         self._detyped = None
+        if self._batch is not None:
+            self._batch.setdefault(key, old_value)
+            return
         if self.get("UPDATE_OS_ENVIRON") and key in os_environ:
             del os_environ[key]
 
@@ -6,12 +6,22 @@ In all likelihood, you want builtins.events
 The best way to "declare" an event is something like::
 
     events.doc('on_spam', "Comes with eggs")
+
+Slow handlers for notification events may be run on a pool of worker threads
+instead of the main thread, either by registering them with
+``@events.on_spam(asynchronous=True)`` or by setting
+``events.on_spam.asynchronous = True`` for all handlers of an event.
 """
 import abc
+import time
 import builtins
+import threading
+import functools
+import collections
 import collections.abc
 import inspect
 
+from xonsh.lazyasd import lazyobject
 from xonsh.tools import print_exception
 
 
@@ -29,6 +39,100 @@ def debug_level():
         return 0  # Optimize for speed, not guaranteed correctness
 
 
+class HandlerStats:
+    """Timing counters for a single event handler."""
+
+    __slots__ = ("calls", "total", "max")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, dt):
+        """Adds a call that took dt seconds."""
+        self.calls += 1
+        self.total += dt
+        if dt > self.max:
+            self.max = dt
+
+    def __repr__(self):
+        return "HandlerStats(calls={0}, total={1!r}, max={2!r})".format(
+            self.calls, self.total, self.max
+        )
+
+
+class HandlerValues(list):
+    """Return value of a handler that stands in for several others, e.g. the
+    placeholder of a deferred xontrib. ``Event.fire()`` returns each of these
+    values, rather than the list itself.
+    """
+
+
+class EventDispatcher:
+    """Runs asynchronous event handlers on a shared pool of worker threads.
+
+    Handlers for the same event are run one at a time, in the order in which
+    the event was fired, so per-event ordering is preserved while different
+    events may be handled concurrently.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._executor = None
+        self._queues = {}
+        self._cond = threading.Condition()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            import concurrent.futures
+
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="xonsh-events"
+            )
+        return self._executor
+
+    def submit(self, event, handlers, kwargs):
+        """Queues handlers to be called with kwargs on behalf of event."""
+        key = id(event)  # events are sets, and so unhashable
+        with self._cond:
+            queue = self._queues.get(key)
+            if queue is not None:
+                queue.append((handlers, kwargs))
+                return
+            self._queues[key] = collections.deque([(handlers, kwargs)])
+        self.executor.submit(self._drain, event)
+
+    def _drain(self, event):
+        key = id(event)
+        while True:
+            with self._cond:
+                queue = self._queues[key]
+                if not queue:
+                    del self._queues[key]
+                    self._cond.notify_all()
+                    return
+                handlers, kwargs = queue.popleft()
+            for handler in handlers:
+                try:
+                    event._call_handler(handler, kwargs)
+                except Exception:
+                    print_exception("Exception raised in event handler; ignored.")
+
+    def wait(self, timeout=None):
+        """Blocks until all queued handlers have been run. Returns False if
+        the timeout expired first.
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queues, timeout=timeout)
+
+
+@lazyobject
+def EVENT_DISPATCHER():
+    return EventDispatcher()
+
+
 class AbstractEvent(collections.abc.MutableSet, abc.ABC):
     """
     A given event that handlers can register against.
@@ -38,6 +142,12 @@ class AbstractEvent(collections.abc.MutableSet, abc.ABC):
     Note that ordering is never guaranteed.
     """
 
+    #: Whether all handlers of this event are run asynchronously.
+    asynchronous = False
+
+    def __init__(self):
+        self._stats = {}
+
     @property
     def species(self):
         """
@@ -47,7 +157,7 @@ class AbstractEvent(collections.abc.MutableSet, abc.ABC):
             0
         ]  # events.on_chdir -> <class on_chdir> -> <class Event>
 
-    def __call__(self, handler):
+    def __call__(self, handler=None, *, asynchronous=False):
         """
         Registers a handler. It's suggested to use this as a decorator.
 
@@ -60,15 +170,24 @@ class AbstractEvent(collections.abc.MutableSet, abc.ABC):
         Parameters
         ----------
         handler : callable
-            The handler to register
+            The handler to register. If not given, a decorator that registers
+            the handler with the other options is returned.
+        asynchronous : bool, optional
+            Whether the handler should be run on a worker thread rather than
+            blocking the code that fired the event. Asynchronous handlers are
+            called in the order the event was fired, but their return values
+            are not gathered.
 
         Returns
         -------
         rtn : callable
             The handler
         """
+        if handler is None:
+            return functools.partial(self.__call__, asynchronous=asynchronous)
         #  Using Python's "private" munging to minimize hypothetical collisions
         handler.__validator = None
+        handler.__asynchronous = asynchronous
         if debug_level():
             if not has_kwargs(handler):
                 raise ValueError("Event handlers need a **kwargs for future proofing")
@@ -98,6 +217,32 @@ class AbstractEvent(collections.abc.MutableSet, abc.ABC):
                 continue
             yield handler
 
+    def _is_async(self, handler):
+        """Whether a handler should be dispatched asynchronously."""
+        return self.asynchronous or handler.__asynchronous
+
+    def _call_handler(self, handler, kwargs):
+        """Calls a handler, recording how long it took."""
+        t0 = time.perf_counter()
+        try:
+            return handler(**kwargs)
+        finally:
+            dt = time.perf_counter() - t0
+            stats = self._stats.get(handler)
+            if stats is None:
+                stats = self._stats[handler] = HandlerStats()
+            stats.record(dt)
+
+    def stats(self):
+        """Returns a dict mapping each handler that has been called to its
+        ``HandlerStats`` timing counters.
+        """
+        return dict(self._stats)
+
+    def reset_stats(self):
+        """Clears the timing counters of all handlers."""
+        self._stats.clear()
+
     @abc.abstractmethod
     def fire(self, **kwargs):
         """
@@ -117,6 +262,7 @@ class Event(AbstractEvent):
 
     # Wish I could just pull from set...
     def __init__(self):
+        super().__init__()
         self._handlers = set()
         self._firing = False
         self._delayed_adds = None
@@ -162,7 +308,9 @@ class Event(AbstractEvent):
         Fires an event, calling registered handlers with the given arguments. A non-unique iterable
         of the results is returned.
 
-        Each handler is called immediately. Exceptions are turned in to warnings.
+        Each handler is called immediately, unless it is asynchronous, in which
+        case it is queued on a worker thread. Exceptions are turned in to
+        warnings.
 
         Parameters
         ----------
@@ -172,18 +320,27 @@ class Event(AbstractEvent):
         Returns
         -------
         vals : iterable
-            Return values of each handler. If multiple handlers return the same value, it will
-            appear multiple times.
+            Return values of each synchronous handler. If multiple handlers return the
+            same value, it will appear multiple times.
         """
         vals = []
+        deferred = []
         self._firing = True
         for handler in self._filterhandlers(self._handlers, **kwargs):
+            if self._is_async(handler):
+                deferred.append(handler)
+                continue
             try:
-                rv = handler(**kwargs)
+                rv = self._call_handler(handler, kwargs)
             except Exception:
                 print_exception("Exception raised in event handler; ignored.")
             else:
-                vals.append(rv)
+                if isinstance(rv, HandlerValues):
+                    vals.extend(rv)
+                else:
+                    vals.append(rv)
+        if deferred:
+            EVENT_DISPATCHER.submit(self, deferred, kwargs)
         # clean up
         self._firing = False
         if self._delayed_adds is not None:
@@ -208,6 +365,7 @@ class LoadEvent(AbstractEvent):
     """
 
     def __init__(self):
+        super().__init__()
         self._fired = set()
         self._unfired = set()
         self._hasfired = False
@@ -245,7 +403,7 @@ class LoadEvent(AbstractEvent):
 
     def _call(self, handler):
         try:
-            handler(**self._kwargs)
+            self._call_handler(handler, self._kwargs)
         except Exception:
             print_exception("Exception raised in event handler; ignored.")
 
@@ -322,6 +480,26 @@ class EventManager:
         for handler in oldevent:
             newevent.add(handler)
 
+    def stats(self):
+        """Returns timing counters for all event handlers that have been
+        called, as a list of ``(event name, handler, HandlerStats)`` tuples,
+        slowest total first.
+        """
+        rows = []
+        for name, event in vars(self).items():
+            if not isinstance(event, AbstractEvent):
+                continue
+            for handler, stats in event.stats().items():
+                rows.append((name, handler, stats))
+        rows.sort(key=lambda row: row[2].total, reverse=True)
+        return rows
+
+    def reset_stats(self):
+        """Clears the timing counters of all events."""
+        for event in vars(self).values():
+            if isinstance(event, AbstractEvent):
+                event.reset_stats()
+
     def exists(self, name):
         """Checks if an event with a given name exist. If it does not exist, it
         will not be created. That is what makes this different than
@@ -2,7 +2,6 @@
 """Implements the xonsh executer."""
 import sys
 import types
-import inspect
 import builtins
 import collections.abc as cabc
 
@@ -17,6 +16,7 @@ from xonsh.tools import (
     starting_whitespace,
 )
 from xonsh.built_ins import load_builtins, unload_builtins, load_proxies, unload_proxies
+from xonsh.timings import COMMAND_PROFILER
 
 
 class Execer(object):
@@ -31,6 +31,7 @@ class Execer(object):
         xonsh_ctx=None,
         scriptcache=True,
         cacheall=False,
+        parser=None,
     ):
         """Parameters
         ----------
@@ -50,9 +51,13 @@ class Execer(object):
         cacheall : bool, optional
             Whether or not to cache all xonsh code, and not just files. If this
             is set to true, it will cache command line input too, default: False.
+        parser : Parser or None, optional
+            An already constructed parser to use, rather than constructing one
+            with parser_args.
         """
-        parser_args = parser_args or {}
-        self.parser = Parser(**parser_args)
+        if parser is None:
+            parser = Parser(**(parser_args or {}))
+        self.parser = parser
         self.filename = filename
         self.debug_level = debug_level
         self.unload = unload
@@ -128,14 +133,17 @@ class Execer(object):
         if filename is None:
             filename = self.filename
         if glbs is None or locs is None:
-            frame = inspect.stack()[stacklevel][0]
+            frame = sys._getframe(stacklevel)
             glbs = frame.f_globals if glbs is None else glbs
             locs = frame.f_locals if locs is None else locs
-        ctx = set(dir(builtins)) | set(glbs.keys()) | set(locs.keys())
-        tree = self.parse(input, ctx, mode=mode, filename=filename, transform=transform)
-        if tree is None:
-            return None  # handles comment only input
-        code = compile(tree, filename, mode)
+        with COMMAND_PROFILER.span("compile"):
+            ctx = set(dir(builtins)) | set(glbs.keys()) | set(locs.keys())
+            tree = self.parse(
+                input, ctx, mode=mode, filename=filename, transform=transform
+            )
+            if tree is None:
+                return None  # handles comment only input
+            code = compile(tree, filename, mode)
         return code
 
     def eval(
@@ -5,15 +5,21 @@ import re
 import json
 import shlex
 import sys
+import shutil
+import pickle
+import hashlib
 import tempfile
 import builtins
+import threading
 import subprocess
 import warnings
 import functools
 import collections.abc as cabc
 
+from xonsh import __version__ as XONSH_VERSION
 from xonsh.lazyasd import lazyobject
-from xonsh.tools import to_bool, ensure_string
+from xonsh.events import events
+from xonsh.tools import to_bool, ensure_string, print_exception
 from xonsh.platform import ON_WINDOWS, ON_CYGWIN, ON_MSYS
 
 
@@ -143,6 +149,49 @@ def DEFAULT_SETERRPOSTCMD():
     return {"bash": "", "zsh": "", "cmd": "if errorlevel 1 exit 1"}
 
 
+@lazyobject
+def DEFAULT_RC_FILES():
+    """Run control files that a shell may read at start up. Their mtimes are
+    part of the persistent cache key.
+    """
+    zdotdir = os.environ.get("ZDOTDIR", "~")
+    return {
+        "bash": (
+            "/etc/profile",
+            "/etc/bash.bashrc",
+            "/etc/bashrc",
+            "~/.bash_profile",
+            "~/.bash_login",
+            "~/.profile",
+            "~/.bashrc",
+        ),
+        "zsh": (
+            "/etc/zshenv",
+            "/etc/zprofile",
+            "/etc/zshrc",
+            "/etc/zlogin",
+            "/etc/zsh/zshenv",
+            "/etc/zsh/zprofile",
+            "/etc/zsh/zshrc",
+            "/etc/zsh/zlogin",
+            os.path.join(zdotdir, ".zshenv"),
+            os.path.join(zdotdir, ".zprofile"),
+            os.path.join(zdotdir, ".zshrc"),
+            os.path.join(zdotdir, ".zlogin"),
+        ),
+        "cmd": (),
+    }
+
+
+@lazyobject
+def VOLATILE_ENV_VARS():
+    """Environment variables that are left out of the persistent cache key
+    since they change all the time without affecting the foreign shell's
+    start up.
+    """
+    return frozenset(["PWD", "OLDPWD", "SHLVL", "_"])
+
+
 @functools.lru_cache()
 def foreign_shell_data(
     shell,
@@ -164,6 +213,7 @@ def foreign_shell_data(
     seterrpostcmd=None,
     show=False,
     dryrun=False,
+    cache=None,
 ):
     """Extracts data from a foreign (non-xonsh) shells. Currently this gets
     the environment, aliases, and functions but may be extended in the future.
@@ -225,6 +275,13 @@ def foreign_shell_data(
         Whether or not to display the script that will be run.
     dryrun : bool, optional
         Whether or not to actually run and process the command.
+    cache : bool or None, optional
+        Whether or not to use the persistent cache in ``$XONSH_DATA_DIR``.
+        If None, this is taken from ``$FOREIGN_SHELL_CACHE``. Cached results
+        are reused as long as the shell binary, the command, the rc files and
+        any files sourced in ``prevcmd``, and the input environment are
+        unchanged, and are revalidated in the background after the next
+        prompt.
 
 
     Returns
@@ -269,6 +326,58 @@ def foreign_shell_data(
     if dryrun:
         return None, None
     cmd.append(runcmd)
+    if currenv is None and hasattr(builtins.__xonsh__, "env"):
+        currenv = builtins.__xonsh__.env.detype()
+    elif currenv is not None:
+        currenv = dict(currenv)
+    if cache is None:
+        env = getattr(getattr(builtins, "__xonsh__", None), "env", None)
+        cache = env is not None and env.get("FOREIGN_SHELL_CACHE")
+    run = functools.partial(
+        _run_foreign_shell,
+        cmd,
+        command,
+        shell=shell,
+        currenv=currenv,
+        safe=safe,
+        sourcer=sourcer,
+        extra_args=extra_args,
+        use_tmpfile=use_tmpfile,
+        tmpfile_ext=tmpfile_ext,
+    )
+    if not cache:
+        return run()
+    files = foreign_shell_files(shkey, prevcmd, extra_args)
+    key = foreign_shell_cache_key(cmd, command, currenv, files)
+    fscache = ForeignShellCache.instance()
+    data = fscache.get(key)
+    if data is not None:
+        fscache.schedule_refresh(key, run)
+        return dict(data[0]), dict(data[1])
+    env, aliases = run()
+    if env is not None:
+        fscache[key] = (dict(env), dict(aliases))
+    return env, aliases
+
+
+def _run_foreign_shell(
+    cmd,
+    command,
+    shell,
+    currenv=None,
+    safe=True,
+    sourcer=None,
+    extra_args=(),
+    use_tmpfile=False,
+    tmpfile_ext=None,
+    background=False,
+):
+    """Runs the foreign shell command and parses its output into an
+    (env, aliases) tuple. See ``foreign_shell_data()`` for the parameters.
+    If ``background`` is true, the shell is run without access to the
+    terminal, so that it does not compete with the prompt for it.
+    """
+    cmd = list(cmd)
     if not use_tmpfile:
         cmd.append(command)
     else:
@@ -276,13 +385,10 @@ def foreign_shell_data(
         tmpfile.write(command.encode("utf8"))
         tmpfile.close()
         cmd.append(tmpfile.name)
-    if currenv is None and hasattr(builtins.__xonsh__, "env"):
-        currenv = builtins.__xonsh__.env.detype()
-    elif currenv is not None:
-        currenv = dict(currenv)
     try:
         s = subprocess.check_output(
             cmd,
+            stdin=subprocess.DEVNULL if background else None,
             stderr=subprocess.PIPE,
             env=currenv,
             # start new session to avoid hangs
@@ -304,6 +410,168 @@ def foreign_shell_data(
     return env, aliases
 
 
+def foreign_shell_files(shkey, prevcmd="", extra_args=()):
+    """Returns the files that a foreign shell run may read: the default run
+    control files for the shell and any existing files named in prevcmd or
+    in the extra command line arguments.
+    """
+    files = [os.path.expanduser(f) for f in DEFAULT_RC_FILES.get(shkey, ())]
+    try:
+        tokens = shlex.split(prevcmd)
+    except ValueError:
+        tokens = prevcmd.split()
+    tokens.extend(extra_args)
+    files.extend(os.path.abspath(t) for t in tokens if os.path.isfile(t))
+    return files
+
+
+def _file_fingerprint(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (path, None, None)
+    return (path, st.st_mtime_ns, st.st_size)
+
+
+def foreign_shell_cache_key(cmd, command, currenv, files):
+    """Computes the persistent cache key for a foreign shell run from the
+    shell binary, its arguments, the script that is run, the input
+    environment, and the mtimes and sizes of the given files.
+    """
+    h = hashlib.sha256()
+    binary = cmd[0]
+    if not os.path.isabs(binary):
+        binary = (
+            shutil.which(binary, path=(currenv or os.environ).get("PATH")) or binary
+        )
+    env = sorted(
+        (k, v) for k, v in (currenv or {}).items() if k not in VOLATILE_ENV_VARS
+    )
+    parts = (
+        XONSH_VERSION,
+        _file_fingerprint(binary),
+        tuple(cmd),
+        command,
+        env,
+        [_file_fingerprint(f) for f in files],
+    )
+    h.update(repr(parts).encode("utf-8", "surrogateescape"))
+    return h.hexdigest()
+
+
+class ForeignShellCache(cabc.MutableMapping):
+    """Persistent mapping from foreign shell cache keys to the parsed
+    (env, aliases) data, stored in ``$XONSH_DATA_DIR``. Only the most
+    recently stored entries are kept.
+    """
+
+    _instance = None
+    maxsize = 64
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        self._d = None
+        self._lock = threading.RLock()
+        self._pending = []
+
+    @classmethod
+    def instance(cls):
+        """Returns the shared cache for the current session."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def _load(self):
+        if self._d is not None:
+            return self._d
+        if self.filename is None:
+            datadir = builtins.__xonsh__.env["XONSH_DATA_DIR"]
+            self.filename = os.path.join(datadir, "foreign_shells_cache")
+        try:
+            with open(self.filename, "rb") as f:
+                d = pickle.load(f)
+        except Exception:
+            d = {}
+        self._d = d if isinstance(d, dict) else {}
+        return self._d
+
+    def _dump(self):
+        d = self._d
+        while len(d) > self.maxsize:
+            del d[next(iter(d))]
+        tmpname = self.filename + ".{0}.tmp".format(os.getpid())
+        try:
+            os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+            with open(tmpname, "wb") as f:
+                pickle.dump(d, f)
+            os.replace(tmpname, self.filename)
+        except Exception:
+            print_exception("Could not write foreign shell cache; ignored.")
+
+    def __getitem__(self, key):
+        with self._lock:
+            return self._load()[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            d = self._load()
+            d.pop(key, None)  # move to the end as the newest entry
+            d[key] = value
+            self._dump()
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._load()[key]
+            self._dump()
+
+    def __iter__(self):
+        with self._lock:
+            yield from list(self._load())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._load())
+
+    def schedule_refresh(self, key, run):
+        """Reruns the foreign shell in a background thread once the next
+        prompt has been shown, updating or dropping the cached entry if the
+        result has changed. Sessions that never show a prompt, e.g. scripts,
+        do not refresh their entries.
+
+        Parameters
+        ----------
+        key : str
+            The key of the cached entry.
+        run : callable
+            Runs the foreign shell, e.g. a partial of ``_run_foreign_shell()``.
+            It is called with ``background=True``.
+        """
+        with self._lock:
+            self._pending.append((key, run))
+            if len(self._pending) > 1:
+                return
+
+        def refresh_foreign_shell_cache(**kwargs):
+            events.on_pre_prompt.discard(refresh_foreign_shell_cache)
+            with self._lock:
+                pending, self._pending = self._pending, []
+            t = threading.Thread(target=self._refresh, args=(pending,), daemon=True)
+            t.start()
+
+        events.on_pre_prompt(refresh_foreign_shell_cache)
+
+    def _refresh(self, pending):
+        for key, run in pending:
+            try:
+                data = run(background=True)
+            except Exception:
+                data = (None, None)
+            if data[0] is None:
+                self.pop(key, None)
+            elif self.get(key) != data:
+                self[key] = data
+
+
 @lazyobject
 def ENV_RE():
     return re.compile("__XONSH_ENV_BEG__\n(.*)" "__XONSH_ENV_END__", flags=re.DOTALL)
@@ -71,6 +71,7 @@ class History:
         self.outs = None
         self.last_cmd_rtn = None
         self.last_cmd_out = None
+        self.last_cmd_rusage = None
 
     def __len__(self):
         """Return the number of items in current session."""
@@ -116,7 +117,8 @@ class History:
             This dict contains information about the command that is to be
             added to the history list. It should contain the keys ``inp``,
             ``rtn`` and ``ts``. These key names mirror the same names defined
-            as instance variables in the ``HistoryEntry`` class.
+            as instance variables in the ``HistoryEntry`` class. It may also
+            contain an ``info`` dict, which backends store as is.
         """
         pass
 
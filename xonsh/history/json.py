@@ -85,6 +85,14 @@ def _xhj_get_history_files(sort=True, newest_first=False):
     return files
 
 
+def _xhj_item(inp, ts, info):
+    """Returns a history item, which includes the info only if there is any."""
+    item = {"inp": inp.rstrip(), "ts": ts[0]}
+    if info:
+        item["info"] = info
+    return item
+
+
 class JsonHistoryGC(threading.Thread):
     """Shell history garbage collection."""
 
@@ -319,6 +327,7 @@ class JsonHistory(History):
         self._len = 0
         self.last_cmd_out = None
         self.last_cmd_rtn = None
+        self.last_cmd_rusage = None
         meta["cmds"] = []
         meta["sessionid"] = str(self.sessionid)
         with open(self.filename, "w", newline="\n") as f:
@@ -329,6 +338,7 @@ class JsonHistory(History):
         self.inps = JsonCommandField("inp", self)
         self.outs = JsonCommandField("out", self)
         self.rtns = JsonCommandField("rtn", self)
+        self.infos = JsonCommandField("info", self)
 
     def __len__(self):
         return self._len
@@ -382,11 +392,11 @@ class JsonHistory(History):
     def items(self, newest_first=False):
         """Display history items of current session."""
         if newest_first:
-            items = zip(reversed(self.inps), reversed(self.tss))
+            items = zip(reversed(self.inps), reversed(self.tss), reversed(self.infos))
         else:
-            items = zip(self.inps, self.tss)
-        for item, tss in items:
-            yield {"inp": item.rstrip(), "ts": tss[0]}
+            items = zip(self.inps, self.tss, self.infos)
+        for item, tss, info in items:
+            yield _xhj_item(item, tss, info)
 
     def all_items(self, newest_first=False, **kwargs):
         """
@@ -413,7 +423,7 @@ class JsonHistory(History):
             if newest_first:
                 commands = reversed(commands)
             for c in commands:
-                yield {"inp": c["inp"].rstrip(), "ts": c["ts"][0]}
+                yield _xhj_item(c["inp"], c["ts"], c.get("info"))
         # all items should also include session items
         yield from self.items()
 
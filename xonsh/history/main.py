@@ -212,6 +212,74 @@ def _xh_show_history(hist, ns, stdout=None, stderr=None):
             print(c["inp"], file=stdout, end=end)
 
 
+def _xh_rusage_stats(items):
+    """Aggregates the resource usage recorded in history items by the name
+    of the command that was run, i.e. the first word of the input.
+
+    Returns
+    -------
+    list of dict
+        One dict per command name, with the keys ``command``, ``count``,
+        ``cpu`` (total user and system time in seconds), ``mean_cpu``, and
+        ``maxrss`` (largest resident set size in kilobytes).
+    """
+    stats = {}
+    for item in items:
+        rusage = (item.get("info") or {}).get("rusage")
+        if not rusage:
+            continue
+        words = item["inp"].split(None, 1)
+        name = words[0] if words else ""
+        s = stats.get(name)
+        if s is None:
+            s = stats[name] = {"command": name, "count": 0, "cpu": 0.0, "maxrss": 0}
+        s["count"] += 1
+        s["cpu"] += rusage["utime"] + rusage["stime"]
+        s["maxrss"] = max(s["maxrss"], rusage["maxrss"] or 0)
+    for s in stats.values():
+        s["mean_cpu"] = s["cpu"] / s["count"]
+    return list(stats.values())
+
+
+_XH_STATS_SORT_KEYS = {
+    "cpu": lambda s: s["cpu"],
+    "mem": lambda s: s["maxrss"],
+    "count": lambda s: s["count"],
+}
+
+
+def _xh_show_stats(hist, ns, stdout=None):
+    """Shows the commands in history ranked by their resource usage."""
+    items = _XH_HISTORY_SESSIONS[ns.session](hist=hist)
+    stats = _xh_rusage_stats(items)
+    stats.sort(key=_XH_STATS_SORT_KEYS[ns.sort], reverse=True)
+    stats = stats[: ns.n]
+    if ns.json:
+        print(json.dumps(stats), file=stdout)
+        return
+    if not stats:
+        print("no resource usage recorded", file=stdout)
+        return
+    width = max(7, max(len(s["command"]) for s in stats))
+    fmt = "{:<{w}} {:>7} {:>10} {:>10} {:>12}"
+    print(
+        fmt.format("command", "count", "cpu (s)", "mean (s)", "max rss (MB)", w=width),
+        file=stdout,
+    )
+    for s in stats:
+        print(
+            fmt.format(
+                s["command"],
+                s["count"],
+                "{:.3f}".format(s["cpu"]),
+                "{:.3f}".format(s["mean_cpu"]),
+                "{:.1f}".format(s["maxrss"] / 1024),
+                w=width,
+            ),
+            file=stdout,
+        )
+
+
 @xla.lazyobject
 def _XH_HISTORY_SESSIONS():
     return {
@@ -223,7 +291,7 @@ def _XH_HISTORY_SESSIONS():
     }
 
 
-_XH_MAIN_ACTIONS = {"show", "id", "file", "info", "diff", "gc"}
+_XH_MAIN_ACTIONS = {"show", "id", "file", "info", "stats", "diff", "gc"}
 
 
 @functools.lru_cache()
@@ -309,6 +377,34 @@ def _xh_create_parser():
         action="store_true",
         help="print in JSON format",
     )
+    # 'stats' subcommand
+    stats = subp.add_parser(
+        "stats", help="rank commands by the resources their processes used"
+    )
+    stats.add_argument(
+        "--sort",
+        dest="sort",
+        default="cpu",
+        choices=_XH_STATS_SORT_KEYS.keys(),
+        help="rank by total CPU time, peak memory, or count (default: cpu)",
+    )
+    stats.add_argument(
+        "-n", dest="n", type=int, default=10, help="number of commands to show"
+    )
+    stats.add_argument(
+        "--json",
+        dest="json",
+        default=False,
+        action="store_true",
+        help="print in JSON format",
+    )
+    stats.add_argument(
+        "session",
+        nargs="?",
+        choices=("session", "xonsh", "all"),
+        default="session",
+        help="history to use (default: current session)",
+    )
 
     # gc
     gcp = subp.add_parser("gc", help="launches a new history garbage collector")
@@ -395,6 +491,8 @@ def history_main(
         else:
             lines = ["{0}: {1}".format(k, v) for k, v in data.items()]
             print("\n".join(lines), file=stdout)
+    elif ns.action == "stats":
+        _xh_show_stats(hist, ns, stdout=stdout)
     elif ns.action == "id":
         if not hist.sessionid:
             return
@@ -32,7 +32,8 @@ def _xh_sqlite_create_history_table(cursor):
     """Create Table for history items.
 
     Columns:
-        info - JSON formatted, reserved for future extension.
+        info - JSON formatted, holds extra information such as the
+               resource usage of the command under "rusage".
     """
     cursor.execute(
         """
@@ -75,7 +76,7 @@ def _xh_sqlite_get_count(cursor, sessionid=None):
 
 
 def _xh_sqlite_get_records(cursor, sessionid=None, limit=None, newest_first=False):
-    sql = "SELECT inp, tsb, rtn FROM xonsh_history "
+    sql = "SELECT inp, tsb, rtn, info FROM xonsh_history "
     params = []
     if sessionid is not None:
         sql += "WHERE sessionid = ? "
@@ -89,6 +90,16 @@ def _xh_sqlite_get_records(cursor, sessionid=None, limit=None, newest_first=Fals
     return cursor.fetchall()
 
 
+def _xh_sqlite_item(record):
+    """Converts a record into a history item, which includes the info only if
+    there is any.
+    """
+    item = {"inp": record[0], "ts": record[1], "rtn": record[2]}
+    if record[3]:
+        item["info"] = json.loads(record[3])
+    return item
+
+
 def _xh_sqlite_delete_records(cursor, size_to_keep):
     sql = "SELECT min(tsb) FROM ("
     sql += "SELECT tsb FROM xonsh_history ORDER BY tsb DESC "
@@ -209,7 +220,7 @@ class SqliteHistory(History):
     def all_items(self, newest_first=False):
         """Display all history items."""
         for item in xh_sqlite_items(filename=self.filename, newest_first=newest_first):
-            yield {"inp": item[0], "ts": item[1], "rtn": item[2]}
+            yield _xh_sqlite_item(item)
 
     def items(self, newest_first=False):
         """Display history items of current session."""
@@ -218,7 +229,7 @@ class SqliteHistory(History):
             filename=self.filename,
             newest_first=newest_first,
         ):
-            yield {"inp": item[0], "ts": item[1], "rtn": item[2]}
+            yield _xh_sqlite_item(item)
 
     def info(self):
         data = collections.OrderedDict()
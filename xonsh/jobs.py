@@ -195,7 +195,7 @@ else:
         obj = active_task["obj"]
         backgrounded = False
         try:
-            _, wcode = os.waitpid(obj.pid, os.WUNTRACED)
+            _, wcode, rusage = os.wait4(obj.pid, os.WUNTRACED)
         except ChildProcessError as e:  # No child processes
             if return_error:
                 return e
@@ -214,6 +214,8 @@ else:
         else:
             obj.returncode = os.WEXITSTATUS(wcode)
             obj.signal = None
+        if not backgrounded:
+            obj.rusage = rusage
         return wait_for_active_job(last_task=active_task, backgrounded=backgrounded)
 
 
@@ -44,6 +44,14 @@ def tty():
         return importlib.import_module("tty")
 
 
+@lazyobject
+def resource():
+    if ON_WINDOWS:
+        return
+    else:
+        return importlib.import_module("resource")
+
+
 @lazyobject
 def _winapi():
     if ON_WINDOWS:
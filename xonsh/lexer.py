@@ -5,6 +5,8 @@ Written using a hybrid of ``tokenize`` and PLY.
 """
 import io
 import re
+import sys
+import collections
 
 # 'keyword' interferes with ast.keyword
 import keyword as kwmod
@@ -404,12 +406,22 @@ def _new_token(type, value, pos):
     return o
 
 
+def _intern_token(tok):
+    """Interns the value of a token that is kept around, so that the many
+    repeated names, operators, and whitespace in cached token streams share
+    a single string.
+    """
+    if type(tok.value) is str and len(tok.value) <= 32:
+        tok.value = sys.intern(tok.value)
+    return tok
+
+
 class Lexer(object):
     """Implements a lexer for the xonsh language."""
 
     _tokens = None
 
-    def __init__(self):
+    def __init__(self, token_cache_size=128):
         """
         Attributes
         ----------
@@ -419,11 +431,15 @@ class Lexer(object):
             The last token seen.
         lineno : int
             The last line number seen.
+        token_cache_size : int
+            Maximum number of token streams kept by ``cached_tokens()``.
 
         """
         self.fname = ""
         self.last = None
         self.beforelast = None
+        self.token_cache_size = token_cache_size
+        self._token_cache = collections.OrderedDict()
 
     def build(self, **kwargs):
         """Part of the PLY lexer API."""
@@ -448,6 +464,29 @@ class Lexer(object):
             yield t
             t = self.token()
 
+    def cached_tokens(self, s, mincol=0, maxcol=None):
+        """Returns a tuple of the tokens in ``s[mincol:maxcol]``. The token
+        streams of recently seen strings are kept in a bounded cache, so that
+        helpers which examine the same line many times only tokenize it once.
+        The returned tokens are shared, and so must not be modified. This
+        does not affect the state of the token stream set by ``input()``.
+        """
+        if mincol > 0 or maxcol is not None:
+            s = s[max(mincol, 0) : maxcol]
+        cache = self._token_cache
+        toks = cache.get(s)
+        if toks is None:
+            toks = cache[s] = tuple(map(_intern_token, get_tokens(s)))
+            if len(cache) > self.token_cache_size:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(s)
+        return toks
+
+    def clear_token_cache(self):
+        """Empties the cache used by ``cached_tokens()``."""
+        self._token_cache.clear()
+
     def split(self, s):
         """Splits a string into a list of strings which are whitespace-separated
         tokens.
@@ -27,6 +27,7 @@ from xonsh.imphooks import install_import_hooks
 from xonsh.events import events
 from xonsh.environ import xonshrc_context, make_args_env
 from xonsh.built_ins import XonshSession, load_builtins, load_proxies
+from xonsh.warmup import install_warmup
 
 
 events.transmogrify("on_post_init", "LoadEvent")
@@ -271,7 +272,7 @@ class XonshMode(enum.Enum):
     interactive = 3
 
 
-def start_services(shell_kwargs, args):
+def start_services(shell_kwargs, args, parser=None):
     """Starts up the essential services in the proper order.
     This returns the environment instance as a convenience.
     """
@@ -285,6 +286,7 @@ def start_services(shell_kwargs, args):
         debug_level=debug,
         scriptcache=shell_kwargs.get("scriptcache", True),
         cacheall=shell_kwargs.get("cacheall", False),
+        parser=parser,
     )
     events.on_timingprobe.fire(name="post_execer_init")
     # load rc files
@@ -292,20 +294,24 @@ def start_services(shell_kwargs, args):
     env = builtins.__xonsh__.env
     rc = shell_kwargs.get("rc", None)
     rc = env.get("XONSHRC") if rc is None else rc
-    if args.mode != XonshMode.interactive and not args.force_interactive:
+    interactive = args.mode == XonshMode.interactive or args.force_interactive
+    if not interactive:
         #  Don't load xonshrc if not interactive shell
         rc = None
     events.on_pre_rc.fire()
     xonshrc_context(rcfiles=rc, execer=execer, ctx=ctx, env=env, login=login)
     events.on_post_rc.fire()
     # create shell
-    builtins.__xonsh__.shell = Shell(execer=execer, **shell_kwargs)
+    lean = not interactive and env.get("XONSH_LEAN_BOOT")
+    builtins.__xonsh__.shell = Shell(execer=execer, lean=lean, **shell_kwargs)
     ctx["__name__"] = "__main__"
     return env
 
 
-def premain(argv=None):
-    """Setup for main xonsh entry point. Returns parsed arguments."""
+def premain(argv=None, xonsh_parser=None):
+    """Setup for main xonsh entry point. Returns parsed arguments. The
+    execer uses xonsh_parser, if it is given, rather than a new parser.
+    """
     if argv is None:
         argv = sys.argv[1:]
     builtins.__xonsh__ = XonshSession()
@@ -349,7 +355,7 @@ def premain(argv=None):
         args.mode = XonshMode.interactive
         shell_kwargs["completer"] = True
         shell_kwargs["login"] = True
-    env = start_services(shell_kwargs, args)
+    env = start_services(shell_kwargs, args, parser=xonsh_parser)
     env["XONSH_LOGIN"] = shell_kwargs["login"]
     if args.defines is not None:
         env.update([x.split("=", 1) for x in args.defines])
@@ -395,10 +401,10 @@ def _failback_to_other_shells(args, err):
         raise err
 
 
-def main(argv=None):
+def main(argv=None, xonsh_parser=None):
     args = None
     try:
-        args = premain(argv)
+        args = premain(argv, xonsh_parser=xonsh_parser)
         return main_xonsh(args)
     except Exception as err:
         _failback_to_other_shells(args, err)
@@ -427,6 +433,10 @@ def main_xonsh(args):
             ):
                 print_welcome_screen()
             events.on_pre_cmdloop.fire()
+            # remembered for xonfig imports
+            builtins.__xonsh__.startup_modules = tuple(sys.modules)
+            if env.get("XONSH_IDLE_WARMUP"):
+                install_warmup()
             try:
                 shell.shell.cmdloop()
             finally:
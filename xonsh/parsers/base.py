@@ -18,6 +18,7 @@ from xonsh.platform import PYTHON_VERSION_INFO
 from xonsh.tokenize import SearchPath, StringPrefix
 from xonsh.lazyasd import LazyObject, lazyobject
 from xonsh.parsers.context_check import check_contexts
+from xonsh.parsers.lalr import build_driver
 
 
 RE_SEARCHPATH = LazyObject(lambda: re.compile(SearchPath), globals(), "RE_SEARCHPATH")
@@ -265,7 +266,7 @@ class YaccLoader(Thread):
         self.start()
 
     def run(self):
-        self.parser.parser = yacc.yacc(**self.yacc_kwargs)
+        self.parser.parser = build_driver(self.yacc_kwargs)
 
 
 class BaseParser(object):
@@ -502,14 +503,23 @@ class BaseParser(object):
         yacc_kwargs["outputdir"] = outputdir
         if yacc_debug:
             # create parser on main thread
-            self.parser = yacc.yacc(**yacc_kwargs)
+            self.parser = build_driver(yacc_kwargs)
+            self._yacc_loader = None
         else:
             self.parser = None
-            YaccLoader(self, yacc_kwargs)
+            self._yacc_loader = YaccLoader(self, yacc_kwargs)
 
         # Keeps track of the last token given to yacc (the lookahead token)
         self._last_yielded_token = None
 
+    def wait_until_ready(self):
+        """Blocks until the parser tables have been built or loaded, and the
+        thread that does this in the background has finished.
+        """
+        if self._yacc_loader is not None:
+            self._yacc_loader.join()
+            self._yacc_loader = None
+
     def reset(self):
         """Resets for clean parsing."""
         self.lexer.reset()
@@ -2422,7 +2432,7 @@ class BaseParser(object):
         prefix = RE_STRINGPREFIX.match(p1.value).group().lower()
         if "p" in prefix and "f" in prefix:
             new_pref = prefix.replace("p", "")
-            value_without_p = new_pref + p1.value[len(prefix):]
+            value_without_p = new_pref + p1.value[len(prefix) :]
             s = eval_fstr_fields(value_without_p, new_pref, filename=self.lexer.fname)
             s = pyparse(s).body[0].value
             s = ast.increment_lineno(s, p1.lineno - 1)
@@ -0,0 +1,607 @@
+"""An LALR parse driver that is specialized for the xonsh grammar.
+
+The driver runs on the tables that PLY generates, but replaces the generic
+``LRParser.parseopt_notrack()`` loop. Rather than allocating a symbol object
+and slicing the symbol stack on every reduction, it keeps a plain stack of
+values and hands a single, reused production object to the grammar rules.
+
+The tables themselves are kept in a compact form, ``LALRTables``, as flat
+arrays of machine integers rather than as PLY's nested dicts. They are stored
+in a binary file next to the PLY table module, or in $XONSH_DATA_DIR if that
+directory is read-only, which is memory mapped, so that the pages are shared
+between all of the xonsh processes on a host.
+
+Only the rare paths that need PLY's symbol objects, i.e. debugging, position
+tracking, and the error recovery that follows a rule raising a
+``SyntaxError``, are handed to a PLY parser, which is rebuilt from the
+compact tables when first needed.
+"""
+import os
+import sys
+import json
+import builtins
+import mmap
+import array
+import struct
+
+from xonsh.ply.ply import yacc
+
+USE_COMPACT_TABLES = True
+"""Whether parsers should load their tables from the compact table file.
+If False, PLY's table module is used, and its tables are kept in memory.
+"""
+
+LALR_TABLE_EXT = ".lrtab"
+"""Extension of compact table files, which are named after the PLY table
+module.
+"""
+
+_MAGIC = b"XLALR001"
+_HEADER_LEN = struct.Struct("<Q")
+
+
+class LALRProduction(object):
+    """Lightweight stand-in for ``YaccProduction`` that indexes directly into
+    the driver's value stack. ``p[1]`` through ``p[n]`` are the values of the
+    right hand side of the rule, and ``p[0]`` is the result.
+    """
+
+    __slots__ = ("stack", "base", "n", "value", "lexer", "parser")
+
+    def __init__(self, stack, lexer=None, parser=None):
+        self.stack = stack
+        self.base = 0
+        self.n = 0
+        self.value = None
+        self.lexer = lexer
+        self.parser = parser
+
+    def __getitem__(self, n):
+        try:
+            if n > 0:
+                return self.stack[self.base + n]
+            elif n == 0:
+                return self.value
+            else:
+                # values below the production, as in YaccProduction
+                return self.stack[self.base + n + 1]
+        except TypeError:
+            return [self[i] for i in range(*n.indices(self.n + 1))]
+
+    def __setitem__(self, n, v):
+        if n != 0:
+            raise IndexError("only p[0] may be assigned to")
+        self.value = v
+
+    def __len__(self):
+        return self.n + 1
+
+    def lineno(self, n):
+        """Line numbers are not tracked by the driver."""
+        return 0
+
+    def lexpos(self, n):
+        """Lexer positions are not tracked by the driver."""
+        return 0
+
+    def error(self):
+        raise SyntaxError
+
+
+class LALRTables(object):
+    """LALR tables stored as flat arrays of machine integers.
+
+    The action table is a dense ``nstates * nterminals`` array, in which
+    positive entries are shifts, negative entries are reductions, zero is
+    accept, and ``error`` marks a syntax error. Only a few hundred states
+    have gotos, so the goto table is a dense array over just those states,
+    which ``goto_rows`` maps to, with -1 marking no goto.
+    """
+
+    def __init__(
+        self,
+        terminals,
+        nonterminals,
+        action,
+        goto_rows,
+        goto,
+        defaulted,
+        productions,
+        signature="",
+        method="LALR",
+        buffer=None,
+    ):
+        self.terminals = tuple(terminals)
+        self.nonterminals = tuple(nonterminals)
+        self.terminal_index = {t: i for i, t in enumerate(self.terminals)}
+        self.nonterminal_index = {n: i for i, n in enumerate(self.nonterminals)}
+        self.action = action
+        self.goto_rows = goto_rows
+        self.goto = goto
+        self.defaulted = defaulted
+        self.productions = [tuple(p) for p in productions]
+        self.signature = signature
+        self.method = method
+        self.error = _typecode_min(action_typecode(action))
+        self._buffer = buffer  # keeps a memory map alive
+
+    @property
+    def nstates(self):
+        return len(self.defaulted)
+
+    def prefault(self):
+        """Reads a byte from every page of memory mapped tables, so that
+        parsing does not have to wait for them to be paged in later. Does
+        nothing if the tables are not memory mapped.
+        """
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer[:: mmap.PAGESIZE]
+
+    @classmethod
+    def from_lrtable(cls, action, goto, productions, signature="", method="LALR"):
+        """Builds compact tables from PLY's action and goto dicts, and a
+        sequence of MiniProduction argument tuples.
+        """
+        nstates = max(action) + 1
+        terminals = sorted({t for row in action.values() for t in row})
+        nonterminals = sorted({n for row in goto.values() for n in row})
+        tindex = {t: i for i, t in enumerate(terminals)}
+        nindex = {n: i for i, n in enumerate(nonterminals)}
+        values = [v for row in action.values() for v in row.values()]
+        values.extend(v for row in goto.values() for v in row.values())
+        values.append(nstates)
+        typecode = "h" if max(values) < 2 ** 15 and min(values) > -(2 ** 15) else "i"
+        error = _typecode_min(typecode)
+        nterms = len(terminals)
+        act = array.array(typecode, [error]) * (nstates * nterms)
+        for state, row in action.items():
+            base = state * nterms
+            for t, v in row.items():
+                act[base + tindex[t]] = v
+        goto_rows = array.array(typecode, [-1]) * nstates
+        nnts = len(nonterminals)
+        gt = array.array(typecode)
+        for state in sorted(goto):
+            goto_rows[state] = len(gt) // max(nnts, 1)
+            row = array.array(typecode, [-1]) * nnts
+            for n, v in goto[state].items():
+                row[nindex[n]] = v
+            gt.extend(row)
+        defaulted = array.array(typecode, [error]) * nstates
+        for state, row in action.items():
+            rules = list(row.values())
+            if len(rules) == 1 and rules[0] < 0:
+                defaulted[state] = rules[0]
+        return cls(
+            terminals,
+            nonterminals,
+            act,
+            goto_rows,
+            gt,
+            defaulted,
+            productions,
+            signature=signature,
+            method=method,
+        )
+
+    def action_dict(self):
+        """Returns the action table in PLY's format."""
+        nterms = len(self.terminals)
+        error = self.error
+        action = {}
+        for state in range(self.nstates):
+            base = state * nterms
+            row = {}
+            for i, t in enumerate(self.terminals):
+                v = self.action[base + i]
+                if v != error:
+                    row[t] = v
+            action[state] = row
+        return action
+
+    def goto_dict(self):
+        """Returns the goto table in PLY's format."""
+        nnts = len(self.nonterminals)
+        goto = {}
+        for state in range(self.nstates):
+            r = self.goto_rows[state]
+            if r < 0:
+                continue
+            base = r * nnts
+            row = {}
+            for i, n in enumerate(self.nonterminals):
+                v = self.goto[base + i]
+                if v >= 0:
+                    row[n] = v
+            goto[state] = row
+        return goto
+
+    def to_bytes(self):
+        """Serializes the tables. Arrays are written in the native byte order
+        so that they can be used in place once loaded.
+        """
+        typecode = action_typecode(self.action)
+        arrays = [self.action, self.goto_rows, self.goto, self.defaulted]
+        header = {
+            "tabversion": yacc.__tabversion__,
+            "signature": self.signature,
+            "method": self.method,
+            "byteorder": sys.byteorder,
+            "typecode": typecode,
+            "terminals": self.terminals,
+            "nonterminals": self.nonterminals,
+            "productions": self.productions,
+            "lengths": [len(a) for a in arrays],
+        }
+        header = json.dumps(header).encode("utf-8")
+        # align the arrays on 8 byte boundaries
+        header += b" " * (-(len(_MAGIC) + _HEADER_LEN.size + len(header)) % 8)
+        parts = [_MAGIC, _HEADER_LEN.pack(len(header)), header]
+        parts.extend(array.array(typecode, a).tobytes() for a in arrays)
+        return b"".join(parts)
+
+    @classmethod
+    def from_buffer(cls, buf):
+        """Loads tables from a buffer, such as bytes or a memory map, without
+        copying the arrays. Raises ValueError if the buffer is not valid for
+        this interpreter.
+        """
+        n = len(_MAGIC)
+        if len(buf) < n + _HEADER_LEN.size or bytes(buf[:n]) != _MAGIC:
+            raise ValueError("not a compact LALR table")
+        (hlen,) = _HEADER_LEN.unpack(buf[n : n + _HEADER_LEN.size])
+        pos = n + _HEADER_LEN.size
+        header = json.loads(bytes(buf[pos : pos + hlen]).decode("utf-8"))
+        pos += hlen
+        if header["tabversion"] != yacc.__tabversion__:
+            raise ValueError("compact LALR table version is out of date")
+        elif header["byteorder"] != sys.byteorder:
+            raise ValueError("compact LALR table has the wrong byte order")
+        typecode = header["typecode"]
+        itemsize = array.array(typecode).itemsize
+        if len(buf) < pos + sum(header["lengths"]) * itemsize:
+            raise ValueError("compact LALR table is truncated")
+        mv = memoryview(buf)
+        arrays = []
+        for length in header["lengths"]:
+            end = pos + length * itemsize
+            arrays.append(mv[pos:end].cast(typecode))
+            pos = end
+        return cls(
+            header["terminals"],
+            header["nonterminals"],
+            *arrays,
+            header["productions"],
+            signature=header["signature"],
+            method=header["method"],
+            buffer=buf
+        )
+
+    @classmethod
+    def load(cls, filename):
+        """Memory maps tables from a file."""
+        with open(filename, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls.from_buffer(buf)
+        except Exception:
+            buf.close()
+            raise
+
+    def save(self, filename):
+        """Writes the tables to a file, atomically replacing any that exists."""
+        tmp = "{0}.{1}.tmp".format(filename, os.getpid())
+        with open(tmp, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(tmp, filename)
+
+
+def action_typecode(a):
+    """Returns the array typecode of an array or memoryview."""
+    return getattr(a, "typecode", None) or a.format
+
+
+def _typecode_min(typecode):
+    return -(2 ** (8 * array.array(typecode).itemsize - 1))
+
+
+class LALRDriver(object):
+    """Parses with compact LALR tables and a fast parse loop. Other
+    attributes are looked up on the PLY parser.
+    """
+
+    def __init__(self, tables, pdict, errorfunc, lrparser=None):
+        """
+        Parameters
+        ----------
+        tables : LALRTables
+            The parse tables.
+        pdict : dict
+            Mapping from names to the grammar rule functions.
+        errorfunc : callable
+            The grammar's error function.
+        lrparser : xonsh.ply.ply.yacc.LRParser, optional
+            A PLY parser for the same tables. It is built when first needed
+            if not given.
+        """
+        self.tables = tables
+        self.pdict = pdict
+        self.errorfunc = errorfunc
+        self._lrparser = lrparser
+        nindex = tables.nonterminal_index
+        self.productions = [
+            (nindex.get(name, -1), plen, _rule_callable(pdict.get(func), plen))
+            for _, name, plen, func, _, _ in tables.productions
+        ]
+
+    @property
+    def lrparser(self):
+        """A PLY parser for the same tables."""
+        if self._lrparser is None:
+            lr = yacc.LRTable()
+            lr.lr_action = self.tables.action_dict()
+            lr.lr_goto = self.tables.goto_dict()
+            lr.lr_productions = [
+                yacc.MiniProduction(*p) for p in self.tables.productions
+            ]
+            lr.lr_method = self.tables.method
+            lr.bind_callables(self.pdict)
+            self._lrparser = yacc.LRParser(lr, self.errorfunc)
+        return self._lrparser
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.lrparser, name)
+
+    def parse(
+        self, input=None, lexer=None, debug=False, tracking=False, tokenfunc=None
+    ):
+        """Parses the input, with the same interface as ``LRParser.parse()``."""
+        if debug or tracking or tokenfunc is not None or lexer is None:
+            return self.lrparser.parse(
+                input=input,
+                lexer=lexer,
+                debug=debug,
+                tracking=tracking,
+                tokenfunc=tokenfunc,
+            )
+        try:
+            return self._parse(input, lexer)
+        except _RuleError:
+            # Let PLY replay the parse, so that its error recovery applies.
+            return self.lrparser.parse(input=input, lexer=lexer)
+
+    def _parse(self, input, lexer):
+        tables = self.tables
+        action = tables.action
+        goto_rows = tables.goto_rows
+        goto = tables.goto
+        defaulted = tables.defaulted
+        error = tables.error
+        tindex = tables.terminal_index
+        nterms = len(tables.terminals)
+        nnts = len(tables.nonterminals)
+        prods = self.productions
+        if input is not None:
+            lexer.input(input)
+        get_token = lexer.token
+        statestack = [0]
+        valstack = [None]
+        p = LALRProduction(valstack, lexer=lexer, parser=self)
+        push_state = statestack.append
+        push_val = valstack.append
+        state = 0
+        lookahead = None
+        ti = -1
+        while True:
+            t = defaulted[state]
+            if t == error:
+                if lookahead is None:
+                    lookahead = get_token() or _END
+                    ti = tindex.get(lookahead.type, -1)
+                if ti < 0:
+                    return self._error(lookahead, lexer, state)
+                t = action[state * nterms + ti]
+                if t == error:
+                    return self._error(lookahead, lexer, state)
+            if t > 0:
+                # shift
+                push_state(t)
+                state = t
+                push_val(lookahead.value)
+                lookahead = None
+            elif t < 0:
+                # reduce
+                nt, plen, func = prods[-t]
+                if func is None:
+                    # trivial rule, p[0] is p[1] or None for empty rules
+                    if plen:
+                        del statestack[-1]
+                    else:
+                        push_val(None)
+                    state = goto[goto_rows[statestack[-1]] * nnts + nt]
+                    push_state(state)
+                    continue
+                p.base = len(valstack) - plen - 1
+                p.n = plen
+                p.value = None
+                try:
+                    func(p)
+                except SyntaxError as e:
+                    raise _RuleError() from e
+                if plen:
+                    del valstack[-plen:]
+                    del statestack[-plen:]
+                state = goto[goto_rows[statestack[-1]] * nnts + nt]
+                push_state(state)
+                push_val(p.value)
+            else:
+                # accept
+                return valstack[-1]
+
+    def _error(self, lookahead, lexer, state):
+        self.state = state
+        errtoken = None if lookahead is _END else lookahead
+        if errtoken is not None and not hasattr(errtoken, "lexer"):
+            errtoken.lexer = lexer
+        self.errorfunc(errtoken)
+        # the xonsh error function always raises, but fall back just in case
+        raise SyntaxError("invalid syntax")
+
+
+def table_filename(tabmodule, outputdir):
+    """Returns the name of the compact table file for a PLY table module."""
+    return os.path.join(outputdir, tabmodule.rpartition(".")[2] + LALR_TABLE_EXT)
+
+
+def fallback_table_dir():
+    """Returns the directory that compact table files are saved in when the
+    directory of the PLY table module is not writable, i.e. $XONSH_DATA_DIR.
+    """
+    env = getattr(getattr(builtins, "__xonsh__", None), "env", None)
+    ddir = env.get("XONSH_DATA_DIR") if env is not None else None
+    if not ddir:
+        ddir = os.environ.get("XONSH_DATA_DIR")
+    if not ddir:
+        xdh = os.environ.get("XDG_DATA_HOME") or os.path.join("~", ".local", "share")
+        ddir = os.path.join(xdh, "xonsh")
+    return os.path.expanduser(ddir)
+
+
+def table_filenames(tabmodule, outputdir):
+    """Returns the names that the compact table file for a PLY table module
+    may have: next to the table module, or in the fallback directory.
+    """
+    return [
+        table_filename(tabmodule, outputdir),
+        table_filename(tabmodule, fallback_table_dir()),
+    ]
+
+
+def save_tables(tables, tabmodule, outputdir):
+    """Saves compact tables next to their PLY table module, or in the fallback
+    directory if that is not writable. Returns the file name, or None if the
+    tables could not be saved.
+    """
+    if os.access(outputdir, os.W_OK):
+        fname = table_filename(tabmodule, outputdir)
+    else:
+        fname = table_filename(tabmodule, fallback_table_dir())
+    try:
+        os.makedirs(os.path.dirname(fname), exist_ok=True)
+        tables.save(fname)
+    except OSError:
+        return None
+    return fname
+
+
+def build_driver(yacc_kwargs):
+    """Builds a parse driver for a grammar, with the same keyword arguments
+    as ``yacc.yacc()``. The compact tables are loaded from their file, if it
+    is up to date with the grammar. Otherwise, PLY loads or generates its
+    tables, which are then compacted and saved for next time.
+    """
+    module = yacc_kwargs["module"]
+    tabmodule = yacc_kwargs["tabmodule"]
+    debug = yacc_kwargs.get("debug", False)
+    pdict = {k: getattr(module, k) for k in dir(module)}
+    pdict["start"] = yacc_kwargs.get("start")
+    pinfo = yacc.ParserReflect(pdict, log=yacc.NullLogger())
+    pinfo.get_all()
+    signature = pinfo.signature()
+    if not USE_COMPACT_TABLES:
+        lr = yacc.yacc(**yacc_kwargs)
+        tables = LALRTables.from_lrtable(
+            lr.action, lr.goto, _production_args(lr.productions), signature
+        )
+        return LALRDriver(tables, pinfo.pdict, pinfo.error_func, lrparser=lr)
+    outputdir = yacc_kwargs["outputdir"]
+    for fname in table_filenames(tabmodule, outputdir) if not debug else ():
+        if not os.path.isfile(fname):
+            continue
+        try:
+            tables = LALRTables.load(fname)
+        except (OSError, ValueError):
+            continue
+        if tables.signature == signature:
+            return LALRDriver(tables, pinfo.pdict, pinfo.error_func)
+    lr = yacc.yacc(**yacc_kwargs)
+    tables = LALRTables.from_lrtable(
+        lr.action, lr.goto, _production_args(lr.productions), signature
+    )
+    save_tables(tables, tabmodule, outputdir)
+    if debug:
+        return LALRDriver(tables, pinfo.pdict, pinfo.error_func, lrparser=lr)
+    # release PLY's dict tables, which the table module also holds on to
+    sys.modules.pop(tabmodule, None)
+    return LALRDriver(tables, pinfo.pdict, pinfo.error_func)
+
+
+def _production_args(productions):
+    return [(p.str, p.name, p.len, p.func, p.file, p.line) for p in productions]
+
+
+def _passthrough_rule(self, p):
+    p[0] = p[1]
+
+
+def _passthrough_rule_doc(self, p):
+    """doc"""
+    p[0] = p[1]
+
+
+def _empty_rule(self, p):
+    p[0] = None
+
+
+def _empty_rule_doc(self, p):
+    """doc"""
+    p[0] = None
+
+
+def _code_signature(f):
+    f = getattr(f, "__func__", f)
+    code = getattr(f, "__code__", None)
+    if code is None:
+        return None
+    # skip the docstring, if any
+    return (code.co_code, code.co_consts[1:], code.co_names, code.co_argcount)
+
+
+def _rule_callable(func, plen):
+    """Returns the callable for a grammar rule, or None if the rule merely
+    passes p[1] up, or sets p[0] to None when it is empty, in which case the
+    driver need not call it.
+    """
+    sig = _code_signature(func)
+    if sig is None:
+        return func
+    elif plen == 1 and sig in (
+        _code_signature(_passthrough_rule),
+        _code_signature(_passthrough_rule_doc),
+    ):
+        return None
+    elif plen == 0 and sig in (
+        _code_signature(_empty_rule),
+        _code_signature(_empty_rule_doc),
+    ):
+        return None
+    return func
+
+
+class _EndSymbol(object):
+    """The end of the input."""
+
+    __slots__ = ()
+    type = "$end"
+    value = None
+
+
+_END = _EndSymbol()
+
+
+class _RuleError(Exception):
+    """Raised when a grammar rule raises a SyntaxError, which PLY treats as
+    the start of error recovery.
+    """
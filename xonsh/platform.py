@@ -108,6 +108,12 @@ CAN_RESIZE_WINDOW = LazyBool(
 """``True`` if we can resize terminal window, as provided by the presense of
 signal.SIGWINCH, else ``False``.
 """
+HAVE_POSIX_SPAWN = LazyBool(
+    lambda: hasattr(os, "posix_spawn"), globals(), "HAVE_POSIX_SPAWN"
+)
+"""``True`` if commands may be started with ``os.posix_spawn()``, else
+``False``.
+"""
 
 
 @lazybool
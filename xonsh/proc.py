@@ -14,6 +14,7 @@ import sys
 import time
 import queue
 import array
+import errno
 import ctypes
 import signal
 import inspect
@@ -26,6 +27,7 @@ import collections.abc as cabc
 from xonsh.platform import (
     ON_WINDOWS,
     ON_POSIX,
+    ON_DARWIN,
     ON_MSYS,
     ON_CYGWIN,
     CAN_RESIZE_WINDOW,
@@ -45,7 +47,8 @@ from xonsh.tools import (
 )
 from xonsh.lazyasd import lazyobject, LazyObject
 from xonsh.jobs import wait_for_active_job, give_terminal_to, _continue
-from xonsh.lazyimps import fcntl, termios, _winapi, msvcrt, winutils
+from xonsh.timings import COMMAND_PROFILER
+from xonsh.lazyimps import fcntl, termios, _winapi, msvcrt, winutils, resource
 
 # these decorators are imported for users back-compatible
 from xonsh.tools import unthreadable, uncapturable  # NOQA
@@ -204,6 +207,199 @@ class QueueReader:
             yield chunk
 
 
+_PIPE_EOF = object()
+
+
+class ObjectPipeReader(io.TextIOBase):
+    """The reading end of an in-memory pipe between callable aliases, see
+    ``object_pipe()``. Objects that were sent, rather than written, are read
+    as their string form followed by a newline, or as is with
+    ``iterobjects()``.
+    """
+
+    def __init__(self, maxsize=64):
+        self.queue = queue.Queue(maxsize)
+        self.broken = False
+        self._sio = io.StringIO()
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def _get(self):
+        """Returns the next item from the pipe, or _PIPE_EOF."""
+        if self._eof:
+            return _PIPE_EOF
+        item = self.queue.get()
+        if item is _PIPE_EOF:
+            self._eof = True
+        return item
+
+    def _next_chunk(self, rest=""):
+        """Returns the next chunk of text, prefixed by rest, or None at the
+        end of the input.
+        """
+        item = self._get()
+        if item is _PIPE_EOF:
+            return None
+        elif not isinstance(item, str):
+            item = str(item) + "\n"
+        return rest + item if rest else item
+
+    def read(self, size=-1):
+        self._checkClosed()
+        size = -1 if size is None else size
+        rtn = self._sio.read()
+        while size < 0 or len(rtn) < size:
+            chunk = self._next_chunk()
+            if chunk is None:
+                break
+            rtn += chunk
+        if 0 <= size < len(rtn):
+            self._sio = io.StringIO(rtn[size:])
+            rtn = rtn[:size]
+        else:
+            self._sio = io.StringIO()
+        return rtn
+
+    def readline(self, size=-1):
+        self._checkClosed()
+        size = -1 if size is None else size
+        line = self._sio.readline(size)
+        while not line.endswith("\n") and (size < 0 or len(line) < size):
+            chunk = self._next_chunk(line)
+            if chunk is None:
+                break
+            self._sio = io.StringIO(chunk)
+            line = self._sio.readline(size)
+        return line
+
+    def __iter__(self):
+        self._checkClosed()
+        return self._iterlines()
+
+    def _iterlines(self):
+        rest = ""
+        for line in self._sio:
+            if line.endswith("\n"):
+                yield line
+            else:
+                rest = line
+        while True:
+            chunk = self._next_chunk(rest)
+            if chunk is None:
+                break
+            lines = chunk.splitlines(True)
+            rest = "" if lines[-1].endswith("\n") else lines.pop()
+            # keep the rest readable, if the iteration is not resumed
+            self._sio = io.StringIO(rest)
+            yield from lines
+        self._sio = io.StringIO()
+        if rest:
+            yield rest
+
+    def iterobjects(self):
+        """Iterates over the items in the pipe as they were sent, without
+        converting objects to strings. Text that was written is yielded in
+        chunks, which need not be split on lines.
+        """
+        self._checkClosed()
+        rest = self._sio.read()
+        if rest:
+            yield rest
+        while True:
+            item = self._get()
+            if item is _PIPE_EOF:
+                return
+            yield item
+
+    def close(self):
+        """Closes the reading end, after which writing raises a
+        BrokenPipeError, as it would for an OS pipe.
+        """
+        self.broken = True
+        # unblock the writer, if it is waiting on a full queue
+        try:
+            while True:
+                self.queue.get_nowait()
+        except queue.Empty:
+            pass
+        super().close()
+
+
+class ObjectPipeWriter(io.TextIOBase):
+    """The writing end of an in-memory pipe between callable aliases, see
+    ``object_pipe()``. Written text is passed on after every chunksize
+    writes, or when flushed. Writing blocks while the pipe is full.
+    """
+
+    def __init__(self, reader, chunksize=512):
+        self.reader = reader
+        self.chunksize = chunksize
+        self._pending = []
+        self._done = False
+
+    def writable(self):
+        return True
+
+    def _put(self, item):
+        reader = self.reader
+        while True:
+            if reader.broken:
+                raise BrokenPipeError(errno.EPIPE, "reading end of pipe closed")
+            try:
+                reader.queue.put(item, timeout=0.05)
+            except queue.Full:
+                continue
+            return
+
+    def write(self, s):
+        if self._done:
+            raise BrokenPipeError(errno.EPIPE, "writing end of pipe closed")
+        pending = self._pending
+        pending.append(s)
+        if len(pending) >= self.chunksize:
+            self.flush()
+        return len(s)
+
+    def flush(self):
+        if self._pending:
+            s = "".join(self._pending)
+            self._pending.clear()
+            self._put(s)
+
+    def send(self, obj):
+        """Sends an object through the pipe, as is."""
+        if self._done:
+            raise BrokenPipeError(errno.EPIPE, "writing end of pipe closed")
+        self.flush()
+        self._put(obj)
+
+    def close(self):
+        """Closes the writing end, which the reader sees as the end of
+        the input.
+        """
+        if self._done:
+            return
+        self._done = True
+        try:
+            self.flush()
+            self._put(_PIPE_EOF)
+        except BrokenPipeError:
+            pass
+        super().close()
+
+
+def object_pipe(maxsize=64):
+    """Creates an in-memory pipe for connecting callable aliases that run in
+    the same process, returning ``(reader, writer)`` like ``os.pipe()``. Text
+    and objects pass through the pipe without being encoded, and at most
+    maxsize chunks are buffered.
+    """
+    reader = ObjectPipeReader(maxsize=maxsize)
+    return reader, ObjectPipeWriter(reader)
+
+
 def populate_fd_queue(reader, fd, queue):
     """Reads 1 kb of data from a file descriptor into a queue.
     If this ends or fails, it flags the calling reader object as closed.
@@ -1248,9 +1444,65 @@ def partial_proxy(f):
         raise XonshError(e.format(", ".join(ALIAS_KWARG_NAMES), numargs))
 
 
-class ProcProxyThread(threading.Thread):
+class ProcProxyPool:
+    """A pool of reusable worker threads that callable aliases are run on,
+    so that running an alias does not have to start a new thread. The pool
+    never makes a task wait for a worker, since the aliases in a pipeline
+    must run at the same time, but rather starts a new worker whenever all
+    of them are busy. Workers that finish a task while ``max_idle`` others
+    are already idle exit.
+    """
+
+    def __init__(self, max_idle=4):
+        self.max_idle = max_idle
+        self._tasks = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._nidle = 0
+        self._nworkers = 0
+
+    @property
+    def nworkers(self):
+        """The number of worker threads."""
+        return self._nworkers
+
+    def submit(self, func):
+        """Runs a callable with no arguments on a worker thread."""
+        with self._lock:
+            if self._nidle > 0:
+                self._nidle -= 1
+                self._tasks.put(func)
+                return
+            self._nworkers += 1
+        t = threading.Thread(
+            target=self._work, args=(func,), name="xonsh-alias-worker", daemon=True
+        )
+        t.start()
+
+    def _work(self, func):
+        tasks = self._tasks
+        while True:
+            try:
+                func()
+            except BaseException:
+                print_exception()
+            with self._lock:
+                if self._nidle >= self.max_idle:
+                    self._nworkers -= 1
+                    return
+                self._nidle += 1
+            func = tasks.get()
+
+
+@lazyobject
+def PROC_PROXY_POOL():
+    return ProcProxyPool()
+
+
+class ProcProxyThread(object):
     """
     Class representing a function to be run as a subprocess-mode command.
+    Despite its name, the function is run on a worker thread from
+    ``PROC_PROXY_POOL`` rather than on a thread of its own.
     """
 
     def __init__(
@@ -1299,7 +1551,17 @@ class ProcProxyThread(threading.Thread):
         self.returncode = None
         self._closed_handle_cache = {}
 
-        handles = self._get_handles(stdin, stdout, stderr)
+        # in-memory pipes from other aliases are handed to the function as is
+        self._pipe_stdin = stdin if isinstance(stdin, ObjectPipeReader) else None
+        self._pipe_stdout = stdout if isinstance(stdout, ObjectPipeWriter) else None
+        self._stderr_to_stdout = stderr is subprocess.STDOUT or (
+            stderr is not None and stderr is stdout
+        )
+        handles = self._get_handles(
+            None if self._pipe_stdin is not None else stdin,
+            None if self._pipe_stdout is not None else stdout,
+            stderr,
+        )
         (
             self.p2cread,
             self.p2cwrite,
@@ -1350,16 +1612,34 @@ class ProcProxyThread(threading.Thread):
         if on_main_thread():
             self.old_int_handler = signal.signal(signal.SIGINT, self._signal_int)
         # start up the proc
-        super().__init__()
+        self._done = threading.Event()
         self.start()
 
     def __del__(self):
         self._restore_sigint()
 
+    def start(self):
+        """Starts running the function on a worker thread."""
+        PROC_PROXY_POOL.submit(self._run_and_finish)
+
+    def _run_and_finish(self):
+        try:
+            self.run()
+        finally:
+            self._done.set()
+
+    def is_alive(self):
+        """Whether the function is still running."""
+        return not self._done.is_set()
+
+    def join(self, timeout=None):
+        """Waits for the function to finish."""
+        self._done.wait(timeout)
+
     def run(self):
-        """Set up input/output streams and execute the child function in a new
-        thread.  This is part of the `threading.Thread` interface and should
-        not be called directly.
+        """Set up input/output streams and execute the child function. This
+        is called on a worker thread by start() and should not be called
+        directly.
         """
         if self.f is None:
             return
@@ -1381,6 +1661,8 @@ class ProcProxyThread(threading.Thread):
         # get stdin
         if self.stdin is None:
             sp_stdin = None
+        elif self._pipe_stdin is not None:
+            sp_stdin = self._pipe_stdin
         elif self.p2cread != -1:
             sp_stdin = io.TextIOWrapper(
                 io.open(self.p2cread, "rb", -1), encoding=enc, errors=err
@@ -1388,14 +1670,18 @@ class ProcProxyThread(threading.Thread):
         else:
             sp_stdin = sys.stdin
         # stdout
-        if self.c2pwrite != -1:
+        if self._pipe_stdout is not None:
+            sp_stdout = self._pipe_stdout
+        elif self.c2pwrite != -1:
             sp_stdout = io.TextIOWrapper(
                 io.open(self.c2pwrite, "wb", -1), encoding=enc, errors=err
             )
         else:
             sp_stdout = sys.stdout
         # stderr
-        if self.errwrite == self.c2pwrite:
+        if self._pipe_stdout is not None and self._stderr_to_stdout:
+            sp_stderr = sp_stdout
+        elif self._pipe_stdout is None and self.errwrite == self.c2pwrite:
             sp_stderr = sp_stdout
         elif self.errwrite != -1:
             sp_stderr = io.TextIOWrapper(
@@ -1412,7 +1698,11 @@ class ProcProxyThread(threading.Thread):
         except SystemExit as e:
             r = e.code if isinstance(e.code, int) else int(bool(e.code))
         except OSError:
-            status = still_writable(self.c2pwrite) and still_writable(self.errwrite)
+            if self._pipe_stdout is not None:
+                status = not self._pipe_stdout.reader.broken
+            else:
+                status = still_writable(self.c2pwrite)
+            status = status and still_writable(self.errwrite)
             if status:
                 # stdout and stderr are still writable, so error must
                 # come from function itself.
@@ -1431,6 +1721,11 @@ class ProcProxyThread(threading.Thread):
         safe_flush(sp_stdout)
         safe_flush(sp_stderr)
         self.returncode = parse_proxy_return(r, sp_stdout, sp_stderr)
+        # the ends of in-memory pipes are closed right away, so that the
+        # next alias sees the end of its input
+        for handle in (self._pipe_stdin, self._pipe_stdout):
+            if handle is not None:
+                safe_fdclose(handle, cache=self._closed_handle_cache)
         if not last_in_pipeline and not ON_WINDOWS:
             # mac requires us *not to* close the handles here while
             # windows requires us *to* close the handles here
@@ -1741,6 +2036,100 @@ class ProcProxy(object):
         return getattr(self, name)
 
 
+class SpawnedProc:
+    """A Popen-like handle for a command that was started with
+    ``os.posix_spawn()``, and which inherits the standard streams of xonsh.
+    This skips the pipes and fork of ``subprocess.Popen`` for the simple
+    commands that can be run this way.
+    """
+
+    stdin = stdout = stderr = None
+
+    def __init__(self, args, executable, env):
+        """
+        Parameters
+        ----------
+        args : list of str
+            The command line.
+        executable : str
+            Path of the program to run.
+        env : dict
+            The detyped environment to run the program with.
+        """
+        self.args = args
+        self.returncode = None
+        self.signal = None
+        self.rusage = None
+        # python ignores these, but the program should get the default
+        # dispositions, as with the restore_signals of subprocess.Popen
+        self.pid = os.posix_spawn(
+            executable, args, env, setsigdef=(signal.SIGPIPE, signal.SIGXFSZ)
+        )
+
+    def _set_status(self, status):
+        if os.WIFSIGNALED(status):
+            sig = os.WTERMSIG(status)
+            self.signal = (sig, os.WCOREDUMP(status))
+            self.returncode = -sig
+        else:
+            self.returncode = os.WEXITSTATUS(status)
+
+    def poll(self):
+        """Returns the return code, or None if the process is running."""
+        if self.returncode is None:
+            try:
+                pid, status, rusage = os.wait4(self.pid, os.WNOHANG)
+            except ChildProcessError:
+                # already reaped elsewhere, e.g. by the job control after a
+                # wait() that was interrupted, so the status is lost; report
+                # success, as subprocess.Popen does
+                self.returncode = 0
+                return self.returncode
+            if pid != 0:
+                self._set_status(status)
+                self.rusage = rusage
+        return self.returncode
+
+    def wait(self, timeout=None):
+        """Waits for the process to finish and returns the return code. If
+        the wait is interrupted by a KeyboardInterrupt, the process is given
+        a moment to exit, as it got the SIGINT too, and is killed otherwise,
+        so that it is always reaped before the exception propagates.
+        """
+        if timeout is not None:
+            endtime = time.monotonic() + timeout
+            while self.poll() is None:
+                if time.monotonic() >= endtime:
+                    raise subprocess.TimeoutExpired(self.args, timeout)
+                time.sleep(1e-3)
+        elif self.returncode is None:
+            try:
+                _, status, self.rusage = os.wait4(self.pid, 0)
+            except ChildProcessError:
+                self.returncode = 0
+            except KeyboardInterrupt:
+                try:
+                    self.wait(timeout=0.25)
+                except subprocess.TimeoutExpired:
+                    self.kill()
+                    self.wait()
+                raise
+            else:
+                self._set_status(status)
+        return self.returncode
+
+    def send_signal(self, sig):
+        """Sends a signal to the process, if it is still running."""
+        if self.returncode is None:
+            os.kill(self.pid, sig)
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+
 @lazyobject
 def SIGNAL_MESSAGES():
     sm = {
@@ -1786,6 +2175,39 @@ def update_fg_process_group(pipeline_group, background):
     return give_terminal_to(pipeline_group)
 
 
+RUSAGE_FIELDS = ("utime", "stime", "maxrss", "minflt", "majflt", "inblock", "oublock")
+
+
+def rusage_to_dict(rusage):
+    """Converts a ``resource.struct_rusage`` into a dict of the
+    ``RUSAGE_FIELDS``, with ``maxrss`` in kilobytes on all platforms.
+    """
+    ru = {f: getattr(rusage, "ru_" + f) for f in RUSAGE_FIELDS}
+    if ON_DARWIN:
+        ru["maxrss"] //= 1024
+    return ru
+
+
+def children_rusage():
+    """Returns the resource usage of the child processes that have been
+    reaped so far as a dict, or None if this is not available.
+    """
+    if not ON_POSIX:
+        return None
+    return rusage_to_dict(resource.getrusage(resource.RUSAGE_CHILDREN))
+
+
+def merge_rusage(x, y):
+    """Combines two resource usage dicts, either of which may be None. The
+    counts are summed and the largest ``maxrss`` is kept.
+    """
+    if x is None or y is None:
+        return x or y
+    ru = {f: x[f] + y[f] for f in RUSAGE_FIELDS}
+    ru["maxrss"] = max(x["maxrss"] or 0, y["maxrss"] or 0) or None
+    return ru
+
+
 class CommandPipeline:
     """Represents a subprocess-mode command pipeline."""
 
@@ -1801,6 +2223,7 @@ class CommandPipeline:
         "stdout_redirect",
         "stderr_redirect",
         "timestamps",
+        "rusage",
         "executed_cmd",
         "input",
         "output",
@@ -1809,12 +2232,15 @@ class CommandPipeline:
 
     nonblocking = (io.BytesIO, NonBlockingFDReader, ConsoleParallelReader)
 
-    def __init__(self, specs):
+    def __init__(self, specs, procs=None):
         """
         Parameters
         ----------
         specs : list of SubprocSpec
             Process specifications
+        procs : list of Popen-like, optional
+            Processes that have already been started for the specs. If not
+            given, the specs are run.
 
         Attributes
         ----------
@@ -1834,8 +2260,14 @@ class CommandPipeline:
             The output lines
         starttime : floats or None
             Pipeline start timestamp.
+        rusage : dict or None
+            Resource usage of the processes in the pipeline, once it has
+            finished.
         """
         self.starttime = None
+        self._perf_starttime = time.perf_counter()
+        self.rusage = None
+        self._start_rusage = children_rusage()
         self.ended = False
         self.procs = []
         self.specs = specs
@@ -1847,6 +2279,11 @@ class CommandPipeline:
         self._stderr_prefix = self._stderr_postfix = None
         self.term_pgid = None
 
+        if procs is not None:
+            self.starttime = time.time()
+            self.procs = list(procs)
+            self.proc = self.procs[-1]
+            return
         background = self.spec.background
         pipeline_group = None
         for spec in specs:
@@ -2035,7 +2472,12 @@ class CommandPipeline:
         nl = b"\n"
         cr = b"\r"
         crnl = b"\r\n"
+        first = COMMAND_PROFILER.active
         for line in self.iterraw():
+            if first:
+                now = time.perf_counter()
+                COMMAND_PROFILER.add("first_output", self._perf_starttime, now)
+                first = False
             # write to stdout line ASAP, if needed
             if stream:
                 if stdout_has_buffer:
@@ -2114,8 +2556,9 @@ class CommandPipeline:
         """
         if self.ended:
             return
-        self._end(tee_output=tee_output)
-        self._return_terminal()
+        with COMMAND_PROFILER.span("end"):
+            self._end(tee_output=tee_output)
+            self._return_terminal()
 
     def _end(self, tee_output):
         """Waits for the command to complete and then runs any closing and
@@ -2161,6 +2604,28 @@ class CommandPipeline:
         """Sets the closing timestamp if it hasn't been already."""
         if self.endtime is None:
             self.endtime = time.time()
+            self._set_rusage()
+
+    def _set_rusage(self):
+        """Sets the resource usage of the pipeline. The CPU time and I/O
+        counts are those of the children reaped while the pipeline ran.
+        The maximum resident set size is taken from the processes that
+        were reaped with ``os.wait4()``, when there are any.
+        """
+        before = self._start_rusage
+        after = children_rusage()
+        if before is None or after is None:
+            return
+        ru = {f: after[f] - before[f] for f in RUSAGE_FIELDS}
+        maxrss = [p.rusage.ru_maxrss for p in self.procs if getattr(p, "rusage", None)]
+        if maxrss:
+            ru["maxrss"] = max(maxrss) // 1024 if ON_DARWIN else max(maxrss)
+        elif after["maxrss"] > before["maxrss"]:
+            # the largest child so far belongs to this pipeline
+            ru["maxrss"] = after["maxrss"]
+        else:
+            ru["maxrss"] = None
+        self.rusage = ru
 
     def _safe_close(self, handle):
         safe_fdclose(handle, cache=self._closed_handle_cache)
@@ -2245,9 +2710,14 @@ class CommandPipeline:
 
     def _apply_to_history(self):
         """Applies the results to the current history object."""
+        if not builtins.__xonsh__.is_loaded("history"):
+            return
         hist = builtins.__xonsh__.history
         if hist is not None:
-            hist.last_cmd_rtn = 1 if self.proc is None else self.proc.returncode
+            with COMMAND_PROFILER.span("apply_to_history"):
+                hist.last_cmd_rtn = 1 if self.proc is None else self.proc.returncode
+                rusage = getattr(hist, "last_cmd_rusage", None)
+                hist.last_cmd_rusage = merge_rusage(rusage, self.rusage)
 
     def _raise_subproc_error(self):
         """Raises a subprocess error, if we are supposed to."""
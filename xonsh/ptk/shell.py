@@ -16,6 +16,7 @@ from xonsh.ptk.history import PromptToolkitHistory
 from xonsh.ptk.key_bindings import load_xonsh_bindings
 from xonsh.ptk.shortcuts import Prompter
 from xonsh.events import events
+from xonsh.timings import COMMAND_PROFILER
 from xonsh.shell import transform_command
 from xonsh.platform import HAS_PYGMENTS, ON_WINDOWS
 from xonsh.style_tools import (
@@ -190,10 +191,12 @@ class PromptToolkitShell(BaseShell):
     def prompt_tokens(self, cli):
         """Returns a list of (token, str) tuples for the current prompt."""
         p = builtins.__xonsh__.env.get("PROMPT")
-        try:
-            p = self.prompt_formatter(p)
-        except Exception:  # pylint: disable=broad-except
-            print_exception()
+        with COMMAND_PROFILER.span("prompt"):
+            try:
+                p = self.prompt_formatter(p)
+            except Exception:  # pylint: disable=broad-except
+                print_exception()
+        COMMAND_PROFILER.stop()
         toks = partial_color_tokenize(p)
         if self._first_prompt:
             carriage_return()
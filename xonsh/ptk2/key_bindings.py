@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """Key bindings for prompt_toolkit xonsh shell."""
 import builtins
+import functools
 
 from prompt_toolkit import search
 from prompt_toolkit.enums import DEFAULT_BUFFER
@@ -83,6 +84,13 @@ def can_compile(src):
     src = src if src.endswith("\n") else src + "\n"
     src = transform_command(src, show_diff=False)
     src = src.lstrip()
+    return _can_compile_transformed(src)
+
+
+@functools.lru_cache(maxsize=32)
+def _can_compile_transformed(src):
+    # Whether code compiles does not depend on the context, only on the
+    # source, so that pressing enter repeatedly on the same buffer is cheap.
     try:
         builtins.__xonsh__.execer.compile(
             src, mode="single", glbs=None, locs=builtins.__xonsh__.ctx
@@ -5,6 +5,7 @@ import builtins
 from types import MethodType
 
 from xonsh.events import events
+from xonsh.timings import COMMAND_PROFILER
 from xonsh.base_shell import BaseShell
 from xonsh.shell import transform_command
 from xonsh.tools import print_exception, carriage_return
@@ -203,10 +204,12 @@ class PromptToolkit2Shell(BaseShell):
     def prompt_tokens(self):
         """Returns a list of (token, str) tuples for the current prompt."""
         p = builtins.__xonsh__.env.get("PROMPT")
-        try:
-            p = self.prompt_formatter(p)
-        except Exception:  # pylint: disable=broad-except
-            print_exception()
+        with COMMAND_PROFILER.span("prompt"):
+            try:
+                p = self.prompt_formatter(p)
+            except Exception:  # pylint: disable=broad-except
+                print_exception()
+        COMMAND_PROFILER.stop()
         toks = partial_color_tokenize(p)
         if self._first_prompt:
             carriage_return()
@@ -63,8 +63,13 @@ def _command_is_valid(cmd):
         cmd_abspath = os.path.abspath(os.path.expanduser(cmd))
     except (FileNotFoundError, OSError):
         return False
-    return cmd in builtins.__xonsh__.commands_cache or (
-        os.path.isfile(cmd_abspath) and os.access(cmd_abspath, os.X_OK)
+    # names already in the cache are accepted without revalidating it, which
+    # would stat every directory in $PATH on each keystroke
+    cc = builtins.__xonsh__.commands_cache
+    return (
+        cc.lazyin(cmd)
+        or cmd in cc
+        or (os.path.isfile(cmd_abspath) and os.access(cmd_abspath, os.X_OK))
     )
 
 
@@ -46,6 +46,7 @@ from xonsh.platform import (
 )
 from xonsh.lazyimps import pygments, pyghooks, winutils
 from xonsh.events import events
+from xonsh.timings import COMMAND_PROFILER
 
 readline = None
 RL_COMPLETION_SUPPRESS_APPEND = RL_LIB = RL_STATE = None
@@ -595,10 +596,12 @@ class ReadlineShell(BaseShell, cmd.Cmd):
             return self.mlprompt
         env = builtins.__xonsh__.env  # pylint: disable=no-member
         p = env.get("PROMPT")
-        try:
-            p = self.prompt_formatter(p)
-        except Exception:  # pylint: disable=broad-except
-            print_exception()
+        with COMMAND_PROFILER.span("prompt"):
+            try:
+                p = self.prompt_formatter(p)
+            except Exception:  # pylint: disable=broad-except
+                print_exception()
+        COMMAND_PROFILER.stop()
         hide = True if self._force_hide is None else self._force_hide
         p = ansi_partial_color_format(p, style=env.get("XONSH_COLOR_STYLE"), hide=hide)
         self._current_prompt = p
@@ -69,17 +69,17 @@ class Replayer(object):
         return new_hist
 
     def _merge_envs(self, merge_envs, re_env):
-        new_env = {}
-        for e in merge_envs:
-            if e == "replay":
-                new_env.update(re_env)
-            elif e == "native":
-                new_env.update(builtins.__xonsh__.env)
-            elif isinstance(e, cabc.Mapping):
-                new_env.update(e)
-            else:
-                raise TypeError("Type of env not understood: {0!r}".format(e))
-        new_env = Env(**new_env)
+        new_env = Env({})
+        with new_env.batch():
+            for e in merge_envs:
+                if e == "replay":
+                    new_env.update(re_env)
+                elif e == "native":
+                    new_env.update(builtins.__xonsh__.env)
+                elif isinstance(e, cabc.Mapping):
+                    new_env.update(e)
+                else:
+                    raise TypeError("Type of env not understood: {0!r}".format(e))
         return new_env
 
 
@@ -148,14 +148,21 @@ class Shell(object):
         shell_type : str, optional
             The shell type to start, such as 'readline', 'prompt_toolkit1',
             or 'random'.
+        lean : bool, optional
+            Whether to defer building the history backend until it is first
+            used. This is meant for non-interactive sessions, which usually
+            never touch the history.
         """
         self.execer = execer
         self.ctx = {} if ctx is None else ctx
         env = builtins.__xonsh__.env
-        # build history backend before creating shell
-        builtins.__xonsh__.history = hist = xhm.construct_history(
-            env=env.detype(), ts=[time.time(), None], locked=True
-        )
+        lean = kwargs.pop("lean", False)
+        if lean:
+            hist = None
+            builtins.__xonsh__.defer("history", self._construct_lazy_history)
+        else:
+            # build history backend before creating shell
+            builtins.__xonsh__.history = hist = self._construct_history()
 
         # pick a valid shell -- if no shell is specified by the user,
         # shell type is pulled from env
@@ -205,8 +212,21 @@ class Shell(object):
             raise XonshError("{} is not recognized as a shell type".format(shell_type))
         self.shell = shell_class(execer=self.execer, ctx=self.ctx, **kwargs)
         # allows history garbage collector to start running
+        if hist is not None and hist.gc is not None:
+            hist.gc.wait_for_shell = False
+
+    @staticmethod
+    def _construct_history():
+        env = builtins.__xonsh__.env
+        return xhm.construct_history(
+            env=env.detype(), ts=[time.time(), None], locked=True
+        )
+
+    def _construct_lazy_history(self):
+        hist = self._construct_history()
         if hist.gc is not None:
             hist.gc.wait_for_shell = False
+        return hist
 
     def __getattr__(self, attr):
         """Delegates calls to appropriate shell instance."""
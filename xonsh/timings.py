@@ -10,6 +10,7 @@ The following time_it alias and Timer was forked from the IPython project:
 import os
 import gc
 import sys
+import json
 import math
 import time
 import timeit
@@ -335,3 +336,172 @@ def setup_timings(argv):
                 print(entry_format.format(name, ts - tstart, ts - prevtime))
                 prevtime = ts
             print(sepline)
+
+
+events.doc(
+    "on_command_profile",
+    """
+on_command_profile(cmd: str, spans: list) -> None
+
+Fires once a command has run and the prompt has been redrawn, if
+``$XONSH_PROFILE_COMMANDS`` is set. The spans are ``(name, start, end)``
+tuples that give the times, from ``time.perf_counter()``, of the phases of
+running the command.
+""",
+)
+
+
+class _Span:
+    """Context manager that records how long its body takes."""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, self.start, time.perf_counter())
+
+
+class _NoSpan:
+    """Context manager that does nothing, used when profiling is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class CommandProfiler:
+    """Collects the timing spans of the phases of running a command, when
+    ``$XONSH_PROFILE_COMMANDS`` is set. Spans are only recorded while a
+    command is being profiled, so that they cost a single attribute
+    lookup otherwise.
+
+    Attributes
+    ----------
+    active : bool
+        Whether a command is being profiled.
+    cmd : str or None
+        The command being profiled.
+    spans : list of tuples
+        The ``(name, start, end)`` spans recorded for the command.
+    """
+
+    def __init__(self):
+        self.active = False
+        self.cmd = None
+        self.spans = []
+
+    @property
+    def enabled(self):
+        """Whether ``$XONSH_PROFILE_COMMANDS`` is set."""
+        return bool(builtins.__xonsh__.env.get("XONSH_PROFILE_COMMANDS"))
+
+    def start(self, cmd):
+        """Starts profiling a command, unless another command is being
+        profiled. Returns whether a profile was started.
+        """
+        if self.active:
+            return False
+        self.active = True
+        self.cmd = cmd
+        self.spans = []
+        return True
+
+    def cancel(self):
+        """Stops profiling the current command without reporting it."""
+        self.active = False
+        self.cmd, self.spans = None, []
+
+    def stop(self):
+        """Stops profiling the current command, fires the
+        ``on_command_profile`` event, and writes the trace file, if any.
+        """
+        if not self.active:
+            return
+        self.active = False
+        cmd, spans = self.cmd, self.spans
+        self.cmd, self.spans = None, []
+        events.on_command_profile.fire(cmd=cmd, spans=spans)
+        filename = builtins.__xonsh__.env.get("XONSH_PROFILE_TRACE_FILE")
+        if filename:
+            write_chrome_trace(filename, cmd, spans)
+
+    def span(self, name):
+        """Returns a context manager that records the time spent in its body
+        as a span with the given name.
+        """
+        return _Span(self, name) if self.active else _NO_SPAN
+
+    def add(self, name, start, end):
+        """Records a span, given its start and end times."""
+        if self.active:
+            self.spans.append((name, start, end))
+
+
+COMMAND_PROFILER = CommandProfiler()
+
+
+def chrome_trace_events(cmd, spans, pid=None, tid=None):
+    """Converts spans into a list of Chrome trace events. The command
+    itself is an event that covers all of the spans.
+    """
+    if not spans:
+        return []
+    pid = os.getpid() if pid is None else pid
+    tid = 0 if tid is None else tid
+    start = min(s for _, s, _ in spans)
+    end = max(e for _, _, e in spans)
+    evts = [
+        {
+            "name": cmd.strip(),
+            "cat": "command",
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": pid,
+            "tid": tid,
+        }
+    ]
+    for name, s, e in spans:
+        evts.append(
+            {
+                "name": name,
+                "cat": "phase",
+                "ph": "X",
+                "ts": s * 1e6,
+                "dur": (e - s) * 1e6,
+                "pid": pid,
+                "tid": tid,
+            }
+        )
+    return evts
+
+
+def write_chrome_trace(filename, cmd, spans):
+    """Appends the spans of a command to a Chrome trace file. The file is a
+    JSON array that is left open, which the trace viewers accept, so that
+    each command may be appended cheaply.
+    """
+    evts = chrome_trace_events(cmd, spans)
+    if not evts:
+        return
+    with open(filename, "a") as f:
+        if f.tell() == 0:
+            f.write("[\n")
+        for evt in evts:
+            f.write(json.dumps(evt))
+            f.write(",\n")
@@ -21,9 +21,9 @@ import builtins
 import collections
 import collections.abc as cabc
 import contextlib
+import copy
 import ctypes
 import datetime
-from distutils.version import LooseVersion
 import functools
 import glob
 import itertools
@@ -327,8 +327,7 @@ def balanced_parens(line, mincol=0, maxcol=None, lexer=None):
     if "(" not in line and ")" not in line:
         return True
     cnt = 0
-    lexer.input(line)
-    for tok in lexer:
+    for tok in lexer.cached_tokens(line):
         if tok.type in LPARENS:
             cnt += 1
         elif tok.type == "RPAREN":
@@ -351,8 +350,7 @@ def find_next_break(line, mincol=0, lexer=None):
         return None
     maxcol = None
     lparens = []
-    lexer.input(line)
-    for tok in lexer:
+    for tok in lexer.cached_tokens(line):
         if tok.type in LPARENS:
             lparens.append(tok.type)
         elif tok.type in END_TOK_TYPES:
@@ -387,13 +385,11 @@ def subproc_toks(
         lexer = builtins.__xonsh__.execer.parser.lexer
     if maxcol is None:
         maxcol = len(line) + 1
-    lexer.reset()
-    lexer.input(line)
     toks = []
     lparens = []
     saw_macro = False
     end_offset = 0
-    for tok in lexer:
+    for tok in lexer.cached_tokens(line):
         pos = tok.lexpos
         if tok.type not in END_TOK_TYPES and pos >= maxcol:
             break
@@ -429,7 +425,9 @@ def subproc_toks(
         elif tok.type == "NEWLINE":
             break
         elif tok.type == "DEDENT":
-            # fake a newline when dedenting without a newline
+            # fake a newline when dedenting without a newline, on a copy
+            # since cached tokens are shared
+            tok = toks[-1] = copy.copy(tok)
             tok.type = "NEWLINE"
             tok.value = "\n"
             tok.lineno -= 1
@@ -2448,7 +2446,9 @@ def _deprecated_message_suffix(deprecated_in, removed_in):
 def _deprecated_error_on_expiration(name, removed_in):
     if not removed_in:
         return
-    elif LooseVersion(__version__) >= LooseVersion(removed_in):
+    from distutils.version import LooseVersion
+
+    if LooseVersion(__version__) >= LooseVersion(removed_in):
         raise AssertionError(
             "{} has passed its version {} expiry date!".format(name, removed_in)
         )
@@ -2,16 +2,19 @@
 import os
 import re
 import sys
+import atexit
 import inspect
 import argparse
 import linecache
 import importlib
 import functools
+import threading
+import collections
 
 from xonsh.lazyasd import LazyObject
 from xonsh.platform import HAS_PYGMENTS
 from xonsh.tools import DefaultNotGiven, print_color, normabspath, to_bool
-from xonsh.inspectors import find_file, getouterframes
+from xonsh.inspectors import getouterframes
 from xonsh.lazyimps import pygments, pyghooks
 from xonsh.proc import STDOUT_CAPTURE_KINDS
 import xonsh.prompt.cwd as prompt
@@ -23,13 +26,103 @@ terminal = LazyObject(
 )
 
 
+class TraceWriter(object):
+    """Buffers trace records and formats and prints them in batches on a
+    background thread, so that colorizing does not slow down the traced code.
+    """
+
+    def __init__(self, tracer, interval=0.05, maxsize=1024):
+        self.tracer = tracer
+        self.interval = interval
+        self.maxsize = maxsize
+        self._records = collections.deque()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def write(self, fname, lineno):
+        """Queues a (fname, lineno) record to be printed."""
+        self._records.append((fname, lineno))
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+        if len(self._records) >= self.maxsize:
+            self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Formats and prints all pending records."""
+        with self._lock:
+            records = self._records
+            tracer = self.tracer
+            while records:
+                fname, lineno = records.popleft()
+                line = linecache.getline(fname, lineno).rstrip()
+                s = tracer_format_line(
+                    fname,
+                    lineno,
+                    line,
+                    color=tracer.usecolor,
+                    lexer=tracer.lexer,
+                    formatter=tracer.formatter,
+                )
+                print_color(s)
+
+
+class TraceSampler(object):
+    """Periodically samples the stack of a thread and counts the lines of the
+    traced files that it is executing. This does not install a trace function
+    at all, so the traced code runs at nearly full speed.
+    """
+
+    def __init__(self, tracer, thread_id, interval=0.001):
+        self.tracer = tracer
+        self.thread_id = thread_id
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        tracer = self.tracer
+        counts = tracer.counts
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            while frame is not None:
+                fname = tracer.code_file(frame.f_code)
+                if fname is not None:
+                    counts[fname, frame.f_lineno] += 1
+                    break
+                frame = frame.f_back
+            del frame
+
+
 class TracerType(object):
     """Represents a xonsh tracer object, which keeps track of all tracing
     state. This is a singleton.
+
+    The tracer has three modes: ``"print"``, which prints each line of the
+    traced files as it is run; ``"count"``, which only counts how many times
+    each line was run; and ``"sample"``, which periodically samples the
+    running line rather than tracing at all. Only frames whose code objects
+    belong to the traced files are traced line by line.
     """
 
     _inst = None
-    valid_events = frozenset(["line", "call"])
+    modes = frozenset(["print", "count", "sample"])
 
     def __new__(cls, *args, **kwargs):
         if cls._inst is None:
@@ -40,8 +133,15 @@ class TracerType(object):
         self.prev_tracer = DefaultNotGiven
         self.files = set()
         self.usecolor = True
+        self.buffered = True
+        self.mode = "print"
+        self.counts = collections.Counter()
         self.lexer = pyghooks.XonshLexer()
         self.formatter = terminal.TerminalFormatter()
+        self.writer = TraceWriter(self)
+        self.sampler = None
+        self.interval = 0.001
+        self._codes = {}  # code object -> traced file name or None
         self._last = ("", -1)  # filename, lineno tuple
 
     def __del__(self):
@@ -56,51 +156,128 @@ class TracerType(object):
         # setting an attr look like getting a function.
         self.usecolor = usecolor
 
+    def buffer_output(self, buffered):
+        """Specify whether or not the tracer output should be buffered and
+        printed in batches from a background thread.
+        """
+        if not buffered:
+            self.writer.flush()
+        self.buffered = buffered
+
+    def set_mode(self, mode, interval=None):
+        """Sets the tracing mode, which may only be changed while no files
+        are being traced.
+        """
+        if mode not in self.modes:
+            raise ValueError("invalid tracer mode: {0!r}".format(mode))
+        if mode != self.mode and len(self.files) > 0:
+            raise ValueError(
+                "cannot switch the tracer to {0!r} mode while files are "
+                "being traced in {1!r} mode".format(mode, self.mode)
+            )
+        self.mode = mode
+        if interval is not None:
+            self.interval = interval
+
+    def code_file(self, code):
+        """Returns the traced file that a code object belongs to, or None."""
+        try:
+            return self._codes[code]
+        except KeyError:
+            pass
+        fname = normabspath(code.co_filename)
+        fname = fname if fname in self.files else None
+        self._codes[code] = fname
+        return fname
+
     def start(self, filename):
         """Starts tracing a file."""
         files = self.files
-        if len(files) == 0:
-            self.prev_tracer = sys.gettrace()
+        first = len(files) == 0
         files.add(normabspath(filename))
+        self._codes.clear()
+        if self.mode == "sample":
+            if first:
+                tid = threading.get_ident()
+                self.sampler = TraceSampler(self, tid, interval=self.interval)
+                self.sampler.start()
+            return
+        if first:
+            self.prev_tracer = sys.gettrace()
         sys.settrace(self.trace)
+        local = self._local_tracer()
         curr = inspect.currentframe()
         for frame, fname, *_ in getouterframes(curr, context=0):
             if normabspath(fname) in files:
-                frame.f_trace = self.trace
+                frame.f_trace = local
 
     def stop(self, filename):
         """Stops tracing a file."""
         filename = normabspath(filename)
         self.files.discard(filename)
-        if len(self.files) == 0:
-            sys.settrace(self.prev_tracer)
-            curr = inspect.currentframe()
-            for frame, fname, *_ in getouterframes(curr, context=0):
-                if normabspath(fname) == filename:
-                    frame.f_trace = self.prev_tracer
-            self.prev_tracer = DefaultNotGiven
+        self._codes.clear()
+        if len(self.files) > 0:
+            return
+        if self.mode == "sample":
+            if self.sampler is not None:
+                self.sampler.stop()
+                self.sampler = None
+            return
+        sys.settrace(self.prev_tracer)
+        curr = inspect.currentframe()
+        for frame, fname, *_ in getouterframes(curr, context=0):
+            if normabspath(fname) == filename:
+                frame.f_trace = self.prev_tracer
+        self.prev_tracer = DefaultNotGiven
+        self.writer.flush()
 
     def trace(self, frame, event, arg):
-        """Implements a line tracing function."""
-        if event not in self.valid_events:
-            return self.trace
-        fname = find_file(frame)
-        if fname in self.files:
-            lineno = frame.f_lineno
-            curr = (fname, lineno)
-            if curr != self._last:
-                line = linecache.getline(fname, lineno).rstrip()
-                s = tracer_format_line(
-                    fname,
-                    lineno,
-                    line,
-                    color=self.usecolor,
-                    lexer=self.lexer,
-                    formatter=self.formatter,
-                )
-                print_color(s)
-                self._last = curr
-        return self.trace
+        """Global tracing function. This only enables line tracing for frames
+        whose code objects belong to the traced files.
+        """
+        fname = self.code_file(frame.f_code)
+        if fname is None:
+            return None
+        local = self._local_tracer()
+        local(frame, event, arg)
+        return local
+
+    def _local_tracer(self):
+        return self.count_line if self.mode == "count" else self.print_line
+
+    def print_line(self, frame, event, arg):
+        """Local tracing function which prints the line being run."""
+        if event == "line" or event == "call":
+            fname = self.code_file(frame.f_code)
+            if fname is not None:
+                curr = (fname, frame.f_lineno)
+                if curr != self._last:
+                    self._last = curr
+                    self.writer.write(*curr)
+                    if not self.buffered:
+                        self.writer.flush()
+        return self.print_line
+
+    def count_line(self, frame, event, arg):
+        """Local tracing function which counts how often each line is run."""
+        if event == "line":
+            fname = self.code_file(frame.f_code)
+            if fname is not None:
+                self.counts[fname, frame.f_lineno] += 1
+        return self.count_line
+
+    def report(self, top=None):
+        """Returns a string reporting the per-line hit counts, most frequent
+        first.
+        """
+        lines = []
+        for (fname, lineno), n in self.counts.most_common(top):
+            line = linecache.getline(fname, lineno).rstrip()
+            fname = min(
+                fname, prompt._replace_home(fname), os.path.relpath(fname), key=len
+            )
+            lines.append("{0:>8} {1}:{2}:{3}".format(n, fname, lineno, line))
+        return "\n".join(lines)
 
 
 tracer = LazyObject(TracerType, globals(), "tracer")
@@ -156,8 +333,13 @@ def _find_caller(args):
         print(msg, file=sys.stderr)
 
 
-def _on(ns, args):
+def _on(ns, args, mode="print"):
     """Turns on tracing for files."""
+    try:
+        tracer.set_mode(mode, interval=getattr(ns, "interval", None))
+    except ValueError as e:
+        print("xonsh: trace: " + str(e), file=sys.stderr)
+        return 1
     for f in ns.files:
         if f == "__file__":
             f = _find_caller(args)
@@ -176,11 +358,35 @@ def _off(ns, args):
         tracer.stop(f)
 
 
+def _count(ns, args):
+    """Turns on line counting for files."""
+    return _on(ns, args, mode="count")
+
+
+def _sample(ns, args):
+    """Turns on line sampling for files."""
+    return _on(ns, args, mode="sample")
+
+
+def _report(ns, args):
+    """Prints the per-line hit counts."""
+    s = tracer.report(top=ns.top)
+    if s:
+        print(s)
+    if ns.reset:
+        tracer.counts.clear()
+
+
 def _color(ns, args):
     """Manages color action for tracer CLI."""
     tracer.color_output(ns.toggle)
 
 
+def _buffer(ns, args):
+    """Manages output buffering for tracer CLI."""
+    tracer.buffer_output(ns.toggle)
+
+
 @functools.lru_cache(1)
 def _tracer_create_parser():
     """Creates tracer argument parser"""
@@ -216,6 +422,51 @@ def _tracer_create_parser():
     col.add_argument(
         "toggle", type=to_bool, help="true/false, y/n, etc. to toggle color usage."
     )
+    buf = subp.add_parser(
+        "buffer", help="whether trace output is printed in batches from a thread."
+    )
+    buf.add_argument(
+        "toggle", type=to_bool, help="true/false, y/n, etc. to toggle buffering."
+    )
+    cnt = subp.add_parser(
+        "count", help="counts how often each line of the selected files is run."
+    )
+    cnt.add_argument(
+        "files",
+        nargs="*",
+        default=["__file__"],
+        help=(
+            'file paths to count lines in, use "__file__" (default) to '
+            "select the current file."
+        ),
+    )
+    smp = subp.add_parser(
+        "sample",
+        help="periodically samples which line of the selected files is running.",
+    )
+    smp.add_argument(
+        "-i",
+        "--interval",
+        type=float,
+        default=None,
+        help="sampling interval in seconds, default 0.001.",
+    )
+    smp.add_argument(
+        "files",
+        nargs="*",
+        default=["__file__"],
+        help=(
+            'file paths to sample, use "__file__" (default) to select the '
+            "current file."
+        ),
+    )
+    rep = subp.add_parser("report", help="prints the counted or sampled line hits.")
+    rep.add_argument(
+        "-n", "--top", type=int, default=None, help="only show the top N lines."
+    )
+    rep.add_argument(
+        "--reset", action="store_true", default=False, help="reset the counts."
+    )
     return p
 
 
@@ -228,6 +479,10 @@ _TRACER_MAIN_ACTIONS = {
     "del": _off,
     "stop": _off,
     "color": _color,
+    "buffer": _buffer,
+    "count": _count,
+    "sample": _sample,
+    "report": _report,
 }
 
 
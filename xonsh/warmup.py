@@ -0,0 +1,264 @@
+"""Warm-up tasks that run in the background while the shell is idle.
+
+Some parts of xonsh are slow the first time that they are used, e.g. the
+pygments lexer compiles its regular expressions on first use, and the commands
+cache scans the whole ``$PATH``. Rather than paying for these during start up,
+or on the first command that needs them, interactive sessions queue warm-up
+tasks. These run one at a time on a background thread, once the prompt has
+been shown and the user has been idle for a moment, and are paused while
+commands run. ``xonfig warmup`` shows which tasks have completed and how long
+each one took.
+"""
+import time
+import builtins
+import importlib
+import threading
+import collections
+import collections.abc as cabc
+
+from xonsh.events import events
+from xonsh.platform import HAS_PYGMENTS
+
+
+class WarmupTask:
+    """A named warm-up task, along with its status."""
+
+    def __init__(self, name, func):
+        """
+        Parameters
+        ----------
+        name : str
+            Name of the task.
+        func : callable
+            Function that takes no arguments. If it returns an iterator, e.g.
+            if it is a generator function, the iterator is exhausted step by
+            step, and the task may be paused between steps.
+        """
+        self.name = name
+        self.func = func
+        self.state = "pending"
+        self.duration = 0.0
+        self.error = None
+
+    def __repr__(self):
+        return "WarmupTask({0!r}, state={1!r}, duration={2!r})".format(
+            self.name, self.state, self.duration
+        )
+
+
+class WarmupScheduler:
+    """Runs warm-up tasks, in the order that they were added, on a
+    background thread. Tasks are only started or continued once the shell has
+    been idle for ``idle_delay`` seconds. A task that is not an iterator
+    cannot be paused, and runs to completion once it has started.
+    """
+
+    def __init__(self, idle_delay=0.5):
+        self.idle_delay = idle_delay
+        self.tasks = collections.OrderedDict()
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._idle_since = None
+        self._cancelled = False
+        self._thread = None
+
+    def add(self, name, func):
+        """Queues a warm-up task, returning its ``WarmupTask``."""
+        task = WarmupTask(name, func)
+        with self._cond:
+            self.tasks[name] = task
+            if self._cancelled:
+                task.state = "cancelled"
+            else:
+                self._queue.append(task)
+                self._cond.notify()
+        return task
+
+    def idle(self):
+        """Tells the scheduler that the shell has become idle, e.g. because
+        it shows its prompt. The background thread is started on the first
+        call.
+        """
+        with self._cond:
+            if self._cancelled:
+                return
+            if self._idle_since is None:
+                self._idle_since = time.monotonic()
+                self._cond.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="xonsh-warmup", daemon=True
+                )
+                self._thread.start()
+
+    def busy(self):
+        """Tells the scheduler that the shell is busy, e.g. running a command.
+        No task is started or continued until ``idle()`` is called again.
+        """
+        with self._cond:
+            self._idle_since = None
+
+    def cancel(self):
+        """Cancels the pending and paused tasks, and stops the background
+        thread.
+        """
+        with self._cond:
+            self._cancelled = True
+            while self._queue:
+                self._queue.popleft().state = "cancelled"
+            self._cond.notify_all()
+
+    def join(self, timeout=None):
+        """Waits for the queued tasks to be done, returning whether they
+        are. Meant for testing.
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or any(
+                t.state in {"running", "paused"} for t in self.tasks.values()
+            ):
+                left = None if end is None else end - time.monotonic()
+                if left is not None and left <= 0:
+                    return False
+                self._cond.wait(left)
+        return True
+
+    def _wait_until_idle(self):
+        # must be called with the lock held, returns False if cancelled
+        while not self._cancelled:
+            if self._idle_since is None:
+                timeout = None
+            else:
+                timeout = self._idle_since + self.idle_delay - time.monotonic()
+                if timeout <= 0:
+                    return True
+            self._cond.wait(timeout)
+        return False
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._cancelled:
+                    self._cond.wait()
+                if not self._wait_until_idle():
+                    return
+                if not self._queue:
+                    continue
+                task = self._queue.popleft()
+                task.state = "running"
+            self._run_task(task)
+            with self._cond:
+                self._cond.notify_all()
+
+    def _run_task(self, task):
+        start = time.perf_counter()
+        try:
+            steps = task.func()
+            if not isinstance(steps, cabc.Iterator):
+                task.state = "done"
+                return
+            for _ in steps:
+                if self._idle_since is not None:
+                    continue
+                task.duration += time.perf_counter() - start
+                with self._cond:
+                    task.state = "paused"
+                    if not self._wait_until_idle():
+                        task.state = "cancelled"
+                        steps.close()
+                        return
+                    task.state = "running"
+                start = time.perf_counter()
+            task.state = "done"
+        except Exception as e:
+            task.state = "failed"
+            task.error = "{0}: {1}".format(type(e).__name__, e)
+        finally:
+            if task.state != "cancelled":
+                task.duration += time.perf_counter() - start
+
+
+WARMUP_SCHEDULER = WarmupScheduler()
+
+DEFAULT_WARMUP_TASKS = collections.OrderedDict()
+"""Mapping from the names of the warm-up tasks that interactive sessions run
+to their functions.
+"""
+
+
+def warmup_task(name):
+    """Decorator that registers a default warm-up task under a name."""
+
+    def dec(f):
+        DEFAULT_WARMUP_TASKS[name] = f
+        return f
+
+    return dec
+
+
+@warmup_task("pygments")
+def _warmup_pygments():
+    if not HAS_PYGMENTS:
+        return
+    pyghooks = importlib.import_module("xonsh.pyghooks")
+    yield
+    # lexers compile their regular expressions on first use
+    for _ in pyghooks.XonshLexer().get_tokens("echo $HOME | grep -v x\n"):
+        pass
+    yield
+    importlib.import_module("pygments.formatters.terminal256")
+
+
+@warmup_task("parser_tables")
+def _warmup_parser_tables():
+    parser = builtins.__xonsh__.execer.parser
+    while parser.parser is None:
+        # still being loaded by the parser itself
+        time.sleep(0.01)
+        yield
+    tables = getattr(parser.parser, "tables", None)
+    if tables is not None:
+        tables.prefault()
+
+
+@warmup_task("commands_cache")
+def _warmup_commands_cache():
+    cc = builtins.__xonsh__.commands_cache
+    cc.all_commands
+    yield
+    # builds the index that command completion looks names up in
+    cc.names_with_prefix("")
+
+
+@warmup_task("completers")
+def _warmup_completers():
+    builtins.__xonsh__.completers
+
+
+@warmup_task("module_index")
+def _warmup_module_index():
+    mod = importlib.import_module("xonsh.completers.module_index")
+    yield from mod.MODULE_INDEX.build()
+
+
+def _warmup_on_pre_prompt(**kwargs):
+    WARMUP_SCHEDULER.idle()
+
+
+def _warmup_on_post_prompt(**kwargs):
+    WARMUP_SCHEDULER.busy()
+
+
+def _warmup_on_exit(**kwargs):
+    WARMUP_SCHEDULER.cancel()
+
+
+def install_warmup():
+    """Queues the default warm-up tasks, and ties the scheduler to the
+    prompt, so that the tasks run while the prompt is shown.
+    """
+    for name, func in DEFAULT_WARMUP_TASKS.items():
+        WARMUP_SCHEDULER.add(name, func)
+    events.on_pre_prompt(_warmup_on_pre_prompt)
+    events.on_post_prompt(_warmup_on_post_prompt)
+    events.on_exit(_warmup_on_exit)
@@ -43,6 +43,7 @@ from xonsh.tools import (
     print_color,
     color_style,
 )
+from xonsh.events import events
 from xonsh.foreign_shells import CANON_SHELL_NAMES
 from xonsh.xontribs import xontrib_metadata, find_xontrib
 from xonsh.lazyasd import lazyobject
@@ -610,6 +611,165 @@ def _colors(args):
     builtins.__xonsh__.env["XONSH_COLOR_STYLE"] = style_stash
 
 
+def _handler_name(handler):
+    name = getattr(handler, "__qualname__", None) or repr(handler)
+    module = getattr(handler, "__module__", None)
+    return name if module is None else module + "." + name
+
+
+def _events(ns):
+    """Shows how long event handlers have taken, slowest first."""
+    if ns.reset:
+        events.reset_stats()
+        return
+    rows = []
+    for name, handler, stats in events.stats():
+        mode = "async" if getattr(events, name)._is_async(handler) else "sync"
+        rows.append(
+            {
+                "event": name,
+                "handler": _handler_name(handler),
+                "mode": mode,
+                "calls": stats.calls,
+                "total_ms": stats.total * 1e3,
+                "mean_ms": stats.total * 1e3 / max(stats.calls, 1),
+                "max_ms": stats.max * 1e3,
+            }
+        )
+    if ns.json:
+        s = json.dumps(rows, indent=1)
+        print(s)
+        return
+    lines = []
+    for row in rows:
+        line = (
+            "{{PURPLE}}{event}{{NO_COLOR}} {handler} ({mode}): "
+            "{calls} calls, {{YELLOW}}{total_ms:.2f} ms{{NO_COLOR}} total, "
+            "{mean_ms:.2f} ms mean, {max_ms:.2f} ms max"
+        )
+        lines.append(line.format(**row))
+    print_color("\n".join(lines) or "No event handlers have been called.")
+
+
+def _imports(ns):
+    """Shows which modules were imported before the first prompt, and which
+    of the modules that xonsh imports eagerly could be deferred.
+    """
+    from xonsh.bench import measure_imports, deferrable_imports
+
+    startup = getattr(builtins.__xonsh__, "startup_modules", None)
+    imports = measure_imports(repeat=ns.repeat)
+    candidates = deferrable_imports(imports["modules"], threshold=ns.threshold * 1e-3)
+    # packages that were imported before the first prompt, but not by
+    # xonsh.main, e.g. by the shell or the run control files
+    others = collections.Counter()
+    measured = {rec["name"] for rec in imports["modules"]}
+    measured.update(imports["preloaded"])
+    for name in startup or ():
+        if name not in measured:
+            others[name.partition(".")[0]] += 1
+    if ns.json:
+        data = {
+            "startup_modules": None if startup is None else list(startup),
+            "import_time": imports["total"],
+            "deferrable": candidates,
+            "other_packages": dict(others),
+        }
+        print(json.dumps(data, indent=1))
+        return
+    lines = []
+    if startup is None:
+        lines.append("Modules imported before the first prompt: not recorded")
+    else:
+        nxonsh = sum(1 for name in startup if name.split(".")[0] == "xonsh")
+        lines.append(
+            "Modules imported before the first prompt: {0} ({1} from "
+            "xonsh)".format(len(startup), nxonsh)
+        )
+    lines.append(
+        "Importing xonsh.main: {{YELLOW}}{0:.1f} ms{{NO_COLOR}}".format(
+            imports["total"] * 1e3
+        )
+    )
+    if candidates:
+        lines.append(
+            "\nModules that xonsh imports eagerly, which could be deferred with "
+            "lazyobject() or load_module_in_background():"
+        )
+    for rec in candidates:
+        lines.append(
+            "  {{PURPLE}}{0}{{NO_COLOR}} {1:.1f} ms, imported by {2}".format(
+                rec["name"], rec["cumulative"] * 1e3, rec["parent"]
+            )
+        )
+    if others:
+        lines.append(
+            "\nPackages imported before the first prompt, but not by xonsh.main:"
+        )
+    for name, count in others.most_common():
+        noun = "module" if count == 1 else "modules"
+        lines.append("  {{PURPLE}}{0}{{NO_COLOR}} {1} {2}".format(name, count, noun))
+    print_color("\n".join(lines))
+
+
+def _warmup(ns):
+    """Shows the idle-time warm-up tasks, and how long each one took."""
+    from xonsh.warmup import WARMUP_SCHEDULER
+
+    rows = [
+        {
+            "task": task.name,
+            "state": task.state,
+            "duration_ms": task.duration * 1e3,
+            "error": task.error,
+        }
+        for task in WARMUP_SCHEDULER.tasks.values()
+    ]
+    if ns.json:
+        s = json.dumps(rows, indent=1)
+        print(s)
+        return
+    lines = []
+    for row in rows:
+        line = "{{PURPLE}}{task}{{NO_COLOR}} {state}"
+        if row["state"] != "pending":
+            line += ", {{YELLOW}}{duration_ms:.2f} ms{{NO_COLOR}}"
+        if row["error"] is not None:
+            line += ": {{RED}}{error}{{NO_COLOR}}"
+        lines.append(line.format(**row))
+    print_color("\n".join(lines) or "No warm-up tasks have been queued.")
+
+
+def _envlookups(ns):
+    """Starts or stops counting the environment variable lookups, or shows
+    the variables that are looked up the most per command.
+    """
+    env = builtins.__xonsh__.env
+    if ns.start or ns.stop:
+        env.profile_lookups(ns.start)
+        return
+    profile = env.lookup_profile(ns.number)
+    if profile is None:
+        print(
+            "Environment variable lookups are not being counted, "
+            "start counting with 'xonfig envlookups --start'."
+        )
+        return
+    if ns.json:
+        rows = [
+            {"name": key, "lookups": count, "per_command": per_cmd}
+            for key, count, per_cmd in profile
+        ]
+        s = json.dumps(rows, indent=1)
+        print(s)
+        return
+    lines = ["{0} commands run since counting started".format(env.lookup_commands)]
+    for key, count, per_cmd in profile:
+        line = "{{PURPLE}}${0}{{NO_COLOR}} {{YELLOW}}{1:.1f}{{NO_COLOR}} per command"
+        lines.append((line + ", {2} total").format(key, per_cmd, count))
+    print_color("\n".join(lines))
+
+
 def _tutorial(args):
     import webbrowser
 
@@ -647,6 +807,68 @@ def _xonfig_create_parser():
         "style", nargs="?", default=None, help="style to preview, default: <current>"
     )
     subp.add_parser("tutorial", help="Launch tutorial in browser.")
+    evs = subp.add_parser(
+        "events", help="shows the time spent in event handlers, slowest first"
+    )
+    evs.add_argument(
+        "--json", action="store_true", default=False, help="reports results as json"
+    )
+    evs.add_argument(
+        "--reset", action="store_true", default=False, help="resets the counters"
+    )
+    imps = subp.add_parser(
+        "imports",
+        help="shows the modules imported before the first prompt, "
+        "and which imports could be deferred",
+    )
+    imps.add_argument(
+        "--json", action="store_true", default=False, help="reports results as json"
+    )
+    imps.add_argument(
+        "--threshold",
+        type=float,
+        default=1.0,
+        metavar="MS",
+        help="smallest import time in milliseconds of the imports to show, "
+        "default 1",
+    )
+    imps.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="number of times to measure the imports, default 3",
+    )
+    warm = subp.add_parser(
+        "warmup", help="shows the warm-up tasks run while the shell is idle"
+    )
+    warm.add_argument(
+        "--json", action="store_true", default=False, help="reports results as json"
+    )
+    envl = subp.add_parser(
+        "envlookups",
+        help="shows the environment variables that are looked up the most "
+        "per command",
+    )
+    envl_toggle = envl.add_mutually_exclusive_group()
+    envl_toggle.add_argument(
+        "--start",
+        action="store_true",
+        default=False,
+        help="starts counting the lookups, resetting the counts",
+    )
+    envl_toggle.add_argument(
+        "--stop", action="store_true", default=False, help="stops counting the lookups"
+    )
+    envl.add_argument(
+        "--json", action="store_true", default=False, help="reports results as json"
+    )
+    envl.add_argument(
+        "-n",
+        "--number",
+        type=int,
+        default=20,
+        help="number of variables to show, default 20",
+    )
     return p
 
 
@@ -656,6 +878,10 @@ _XONFIG_MAIN_ACTIONS = {
     "styles": _styles,
     "colors": _colors,
     "tutorial": _tutorial,
+    "events": _events,
+    "imports": _imports,
+    "warmup": _warmup,
+    "envlookups": _envlookups,
 }
 
 
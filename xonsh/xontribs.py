@@ -2,15 +2,28 @@
 import os
 import sys
 import json
+import time
 import builtins
 import argparse
 import functools
 import importlib
 import importlib.util
 
+from xonsh.events import events, Event, HandlerValues
 from xonsh.tools import print_color, unthreadable
 
 
+XONTRIB_LOAD_TIMES = {}
+"""Mapping from xontrib names to the wall time, in seconds, that it took to
+load them.
+"""
+
+DEFERRED_XONTRIBS = {}
+"""Mapping from xontrib names to the ``DeferredXontrib`` instances that are
+standing in for them until they are first used.
+"""
+
+
 @functools.lru_cache(1)
 def xontribs_json():
     return os.path.join(os.path.dirname(__file__), "xontribs.json")
@@ -66,10 +79,12 @@ def update_context(name, ctx=None):
         ctx = builtins.__xonsh__.ctx
     if not hasattr(update_context, "bad_imports"):
         update_context.bad_imports = []
+    t0 = time.perf_counter()
     modctx = xontrib_context(name)
     if modctx is None:
         update_context.bad_imports.append(name)
         return ctx
+    XONTRIB_LOAD_TIMES[name] = time.perf_counter() - t0
     return ctx.update(modctx)
 
 
@@ -81,21 +96,211 @@ def xontrib_metadata():
     return md
 
 
-def xontribs_load(names, verbose=False):
-    """Load xontribs from a list of names"""
+def xontrib_provides(name):
+    """Returns the aliases, events, and completers that a xontrib declares
+    in its metadata as a dict, or None if nothing has been declared.
+    """
+    for md in xontrib_metadata()["xontribs"]:
+        if md["name"] == name:
+            return md.get("provides", None)
+    return None
+
+
+class DeferredXontribAlias:
+    """Placeholder alias for a deferred xontrib. Looking it up through
+    ``Aliases.get()`` loads the xontrib, which replaces the placeholder
+    with the real alias.
+    """
+
+    def __init__(self, xontrib, name):
+        self.xontrib = xontrib
+        self.name = name
+
+    def load(self):
+        """Loads the xontrib that provides this alias."""
+        self.xontrib.load()
+
+    def __call__(
+        self, args, stdin=None, stdout=None, stderr=None, spec=None, stack=None
+    ):
+        from xonsh.proc import partial_proxy
+
+        self.load()
+        alias = builtins.aliases.get(self.name)
+        if not callable(alias):
+            msg = "xontrib {0!r} did not provide a callable {1!r} alias\n"
+            return None, msg.format(self.xontrib.name, self.name), 1
+        return partial_proxy(alias)(alias, args, stdin, stdout, stderr, spec, stack)
+
+    def __repr__(self):
+        return "<deferred alias {0!r} from xontrib {1!r}>".format(
+            self.name, self.xontrib.name
+        )
+
+
+class DeferredXontrib:
+    """Stands in for a xontrib whose import is deferred until one of the
+    aliases, events, or completers that it declares is first used.
+    """
+
+    def __init__(self, name, aliases=(), events=(), completers=None):
+        """
+        Parameters
+        ----------
+        name : str
+            Name of the xontrib.
+        aliases : iterable of str, optional
+            Names of the aliases that the xontrib defines.
+        events : iterable of str, optional
+            Names of the events that the xontrib registers handlers for.
+        completers : iterable of str or dict, optional
+            Names of the completers that the xontrib adds. If this is a dict,
+            the values are positions as given to ``completer add``, or None
+            for the completers that the xontrib removes. Placeholders are
+            appended to the end by default.
+        """
+        self.name = name
+        self.aliases = tuple(aliases)
+        self.events = tuple(events)
+        if completers is None:
+            completers = {}
+        elif not isinstance(completers, dict):
+            completers = dict.fromkeys(completers, "end")
+        self.completers = completers
+        self.loaded = False
+        self._aliases = {}
+        self._handlers = {}
+        self._completers = {}
+        self._removed_completers = []
+
+    def install(self):
+        """Registers placeholders for everything that the xontrib provides."""
+        from xonsh.completers._aliases import _add_one_completer
+
+        for alias in self.aliases:
+            if alias in builtins.aliases:
+                continue
+            placeholder = DeferredXontribAlias(self, alias)
+            builtins.aliases[alias] = placeholder
+            self._aliases[alias] = placeholder
+        for name in self.events:
+            handler = self._make_handler(name)
+            getattr(events, name)(handler)
+            self._handlers[name] = handler
+        completers = builtins.__xonsh__.completers
+        for name, loc in self.completers.items():
+            if loc is None:
+                # removed by the xontrib, so that its own completer is used
+                # instead; remember where it was, to restore it before loading
+                if name in completers:
+                    names = list(completers)
+                    after = names[names.index(name) + 1 :]
+                    self._removed_completers.append((name, completers[name], after))
+                    del completers[name]
+                continue
+            if name in completers:
+                continue
+            completer = self._make_completer(name)
+            _add_one_completer(name, completer, loc)
+            self._completers[name] = completer
+        DEFERRED_XONTRIBS[self.name] = self
+
+    def uninstall(self):
+        """Removes any placeholders that are still registered."""
+        for alias, placeholder in self._aliases.items():
+            if alias in builtins.aliases and builtins.aliases[alias] is placeholder:
+                del builtins.aliases[alias]
+        for name, handler in self._handlers.items():
+            getattr(events, name).discard(handler)
+        completers = builtins.__xonsh__.completers
+        for name, completer in self._completers.items():
+            if completers.get(name) is completer:
+                del completers[name]
+        for name, completer, after in reversed(self._removed_completers):
+            if name in completers:
+                continue
+            items = list(completers.items())
+            i = next((i for i, (n, _) in enumerate(items) if n in after), len(items))
+            items.insert(i, (name, completer))
+            completers.clear()
+            completers.update(items)
+        self._aliases.clear()
+        self._handlers.clear()
+        self._completers.clear()
+        self._removed_completers.clear()
+        DEFERRED_XONTRIBS.pop(self.name, None)
+
+    def load(self):
+        """Removes the placeholders and actually loads the xontrib."""
+        if self.loaded:
+            return
+        self.loaded = True
+        self.uninstall()
+        xontribs_load([self.name], lazy=False)
+
+    def _make_handler(self, name):
+        event = getattr(events, name)
+
+        def deferred_xontrib_handler(**kwargs):
+            # handlers added to an Event while it is firing are held back
+            # until the firing is done, so call the freshly loaded ones
+            # ourselves, and return all of their values.
+            holds_back_adds = isinstance(event, Event)
+            if holds_back_adds:
+                before = set(event._delayed_adds or ())
+            self.load()
+            if not holds_back_adds:
+                return None
+            added = set(event._delayed_adds or ()) - before
+            return HandlerValues(
+                h(**kwargs) for h in event._filterhandlers(added, **kwargs)
+            )
+
+        doc = "Loads the deferred xontrib {0!r} when {1} fires."
+        deferred_xontrib_handler.__doc__ = doc.format(self.name, name)
+        return deferred_xontrib_handler
+
+    def _make_completer(self, name):
+        def deferred_xontrib_completer(prefix, line, begidx, endidx, ctx):
+            self.load()
+            completer = builtins.__xonsh__.completers.get(name)
+            if completer is None or completer is deferred_xontrib_completer:
+                return set()
+            return completer(prefix, line, begidx, endidx, ctx)
+
+        doc = "Loads the deferred xontrib {0!r} on first use."
+        deferred_xontrib_completer.__doc__ = doc.format(self.name)
+        return deferred_xontrib_completer
+
+
+def xontribs_load(names, verbose=False, lazy=None):
+    """Load xontribs from a list of names. If lazy is True (or None and
+    $XONTRIBS_LAZY is set), xontribs which declare what they provide are
+    deferred until first use.
+    """
     ctx = builtins.__xonsh__.ctx
+    if lazy is None:
+        lazy = builtins.__xonsh__.env.get("XONTRIBS_LAZY")
     for name in names:
+        provides = xontrib_provides(name) if lazy else None
+        if provides is not None and find_xontrib(name) is not None:
+            if name in DEFERRED_XONTRIBS:
+                continue
+            if verbose:
+                print("deferring xontrib {0!r}".format(name))
+            DeferredXontrib(name, **provides).install()
+            continue
         if verbose:
             print("loading xontrib {0!r}".format(name))
         update_context(name, ctx=ctx)
-    if update_context.bad_imports:
+    if getattr(update_context, "bad_imports", None):
         prompt_xontrib_install(update_context.bad_imports)
         del update_context.bad_imports
 
 
 def _load(ns):
     """load xontribs"""
-    xontribs_load(ns.names, verbose=ns.verbose)
+    xontribs_load(ns.names, verbose=ns.verbose, lazy=ns.lazy or None)
 
 
 def _list(ns):
@@ -115,7 +320,13 @@ def _list(ns):
         else:
             installed = True
             loaded = spec.name in sys.modules
-        d = {"name": name, "installed": installed, "loaded": loaded}
+        d = {
+            "name": name,
+            "installed": installed,
+            "loaded": loaded,
+            "deferred": name in DEFERRED_XONTRIBS,
+            "load_time": XONTRIB_LOAD_TIMES.get(name, None),
+        }
         data.append(d)
     if ns.json:
         jdata = {d.pop("name"): d for d in data}
@@ -133,6 +344,10 @@ def _list(ns):
                 s += "{RED}not-installed{NO_COLOR}  "
             if d["loaded"]:
                 s += "{GREEN}loaded{NO_COLOR}"
+                if d["load_time"] is not None:
+                    s += "  {0:.1f} ms".format(d["load_time"] * 1000)
+            elif d["deferred"]:
+                s += "{YELLOW}deferred{NO_COLOR}"
             else:
                 s += "{RED}not-loaded{NO_COLOR}"
             s += "\n"
@@ -150,9 +365,22 @@ def _create_xontrib_parser():
     load.add_argument(
         "-v", "--verbose", action="store_true", default=False, dest="verbose"
     )
+    load.add_argument(
+        "-l",
+        "--lazy",
+        action="store_true",
+        default=False,
+        dest="lazy",
+        help="defer loading xontribs that declare what they provide until "
+        "they are first used",
+    )
     load.add_argument("names", nargs="+", default=(), help="names of xontribs")
     lyst = subp.add_parser(
-        "list", help=("list xontribs, whether they are " "installed, and loaded.")
+        "list",
+        help=(
+            "list xontribs, whether they are installed, loaded, or deferred, "
+            "and how long they took to load."
+        ),
     )
     lyst.add_argument(
         "--json", action="store_true", default=False, help="reports results as json"